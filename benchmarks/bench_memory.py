@@ -0,0 +1,72 @@
+"""
+Registry memory footprint, measured with tracemalloc:
+
+    python benchmarks/bench_memory.py --components 50 --handlers 1000 [--output mem.json]
+"""
+import gc
+import sys
+import json
+import argparse
+import tracemalloc
+from typed import Int
+from system import new, Message
+
+def build(components, handlers):
+    act = new.handler(name="act")
+    Node = new.component("Node")
+    Node.attach(name="act", handler=act)
+    Root = new.system("mem")
+    Root.allow(Node)
+
+    def h(x: Int) -> Message:
+        return act.success(data=x)
+
+    # One handler function object shared by every registration, so the
+    # measurement is dominated by the registry rather than by closures.
+    func = Node.act(h)
+    system = Root()
+    for c in range(components):
+        comp = Node(name=f"c{c}", prefix=f"/c{c}")
+        for i in range(handlers):
+            comp.act(f"/group{i % 10}/h{i}")(func)
+        system.include(comp, None)
+    return system
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", type=int, default=50)
+    parser.add_argument("--handlers", type=int, default=1000)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    system = build(args.components, args.handlers)
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+    tracemalloc.stop()
+
+    total = len(system._handlers)
+    report = {
+        "handlers": total,
+        "components": args.components,
+        "bytes": after - before,
+        "peak_bytes": peak - before,
+        "bytes_per_handler": (after - before) / total,
+        "top": [{"where": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count} for stat in top],
+    }
+
+    print(f"{total} handlers: {report['bytes'] / 2**20:.1f} MiB retained, "
+          f"{report['bytes_per_handler']:.0f} B/handler, peak {report['peak_bytes'] / 2**20:.1f} MiB",
+          file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Compare attribute-style calls, path-style calls and a direct handler call:
+
+    python benchmarks/bench_proxy.py [--number N]
+"""
+import argparse
+import timeit
+from system import new, Message
+
+def build():
+    act = new.handler(name="act")
+    system = new.system("Root")()
+
+    def c(x: int) -> Message:
+        return act.success(data=x)
+
+    act._registrar(system, "/a/b/c")(c)
+    return system
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    system = build()
+    direct = system.get_handler_info("/a/b/c").func
+
+    cases = {
+        "direct":    lambda: direct(x=1),
+        "attribute": lambda: system.a.b.c(x=1),
+        "path":      lambda: system("/a/b/c", x=1),
+    }
+    for label, stmt in cases.items():
+        stmt()
+        best = min(timeit.repeat(stmt, number=args.number, repeat=5))
+        print(f"{label:<10} {best / args.number * 1e9:10.1f} ns/call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark suite for the dispatch, construction and fan-out hot paths:
+
+    python benchmarks/suite.py --width 4 --depth 3 --handlers 4 --output run.json
+    python benchmarks/suite.py --compare run.json
+
+Every case reports the best and mean time per operation over --repeat rounds,
+and the whole run is written as JSON so runs can be compared over time.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from typed import Int
+from system import new, Message, propagate
+from system.mods.handler import handler
+from system.mods.message import Propagate
+from system.mods.helper import _get_entity, _list_entities, _info_entity
+from system.mods.bench import synthetic, leaf_paths
+
+def _measure(fn, ops, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    mean = sum(times) / len(times)
+    return {
+        "ops": ops,
+        "best_s": best,
+        "mean_s": mean,
+        "best_ns_per_op": best / ops * 1e9,
+        "mean_ns_per_op": mean / ops * 1e9,
+    }
+
+def cases(width, depth, handlers, fanout):
+    system = synthetic(width, depth, handlers)
+    paths = leaf_paths(width, depth, handlers)
+    tuples = [tuple(p.strip("/").split("/")) for p in paths]
+    prefixes = sorted({t[:-1] for t in tuples})
+    first = tuples[0]
+
+    act = new.handler(name="act")
+    Node = new.component("Node")
+    Node.attach(name="act", handler=act)
+    Root = new.system("reg")
+    Root.allow(Node)
+
+    def registration():
+        comp = Node(name="reg", prefix="/reg")
+        for i in range(500):
+            def h(x: Int) -> Message:
+                return act.success(data=x)
+            comp.act(f"/h{i}")(h)
+
+    def include_deep():
+        top = node = Node(name="d0", prefix="/d0")
+        for level in range(1, 32):
+            child = Node(name=f"d{level}", prefix=f"/d{level}")
+            def h(x: Int) -> Message:
+                return act.success(data=x)
+            child.act("/h")(h)
+            node.include(child)
+            node = child
+        Root().include(top, None)
+
+    def get_entity():
+        for t in tuples:
+            _get_entity(system, t)
+
+    def list_entities():
+        for p in prefixes:
+            _list_entities(system, p)
+
+    def info_entity():
+        for t in tuples:
+            _info_entity(system, t)
+        for p in prefixes:
+            _info_entity(system, p)
+
+    proxy = system
+    for seg in first[:-1]:
+        proxy = getattr(proxy, seg)
+
+    def attribute_call():
+        leaf = first[-1]
+        for _ in range(1000):
+            getattr(proxy, leaf)(x=1)
+
+    def path_call():
+        for p in paths:
+            system(p, x=1)
+
+    def system_call():
+        async def _run():
+            for p in paths:
+                await system.call(p, x=1)
+        asyncio.run(_run())
+
+    calls = [(paths[i % len(paths)], (), {"x": i}) for i in range(fanout)]
+
+    def call_many():
+        asyncio.run(system.call_many(*calls))
+
+    def call_many_sync():
+        system.call_many_sync(*calls)
+
+    def messages():
+        for i in range(1000):
+            handler.success(message="ok", data={"i": i}, code=200)
+            handler.failure(message="failed", code=500)
+            act.success(data=i)
+            act.failure(message="failed")
+
+    ok = handler.success(message="ok")
+    failed = handler.failure(message="failed")
+
+    def propagation():
+        for _ in range(1000):
+            propagate.failure(ok)
+            try:
+                propagate.failure(failed)
+            except Propagate:
+                pass
+
+    return {
+        "registration": (registration, 500),
+        "include_deep": (include_deep, 32),
+        "get_entity": (get_entity, len(tuples)),
+        "list_entities": (list_entities, len(prefixes)),
+        "info_entity": (info_entity, len(tuples) + len(prefixes)),
+        "attribute_call": (attribute_call, 1000),
+        "path_call": (path_call, len(paths)),
+        "system_call": (system_call, len(paths)),
+        "call_many": (call_many, fanout),
+        "call_many_sync": (call_many_sync, fanout),
+        "messages": (messages, 4000),
+        "propagate": (propagation, 2000),
+    }
+
+def compare(current, previous):
+    print(f"{'case':<16}{'previous ns/op':>16}{'current ns/op':>16}{'ratio':>9}")
+    for name, res in current["results"].items():
+        old = previous["results"].get(name)
+        if old is None:
+            continue
+        ratio = res["best_ns_per_op"] / old["best_ns_per_op"]
+        print(f"{name:<16}{old['best_ns_per_op']:>16.1f}{res['best_ns_per_op']:>16.1f}{ratio:>9.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--handlers", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="compare against a previous JSON report")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (fn, ops) in cases(args.width, args.depth, args.handlers, args.fanout).items():
+        if args.only and name not in args.only:
+            continue
+        fn()
+        results[name] = _measure(fn, ops, args.repeat)
+        print(f"{name:<16}{results[name]['best_ns_per_op']:>14.1f} ns/op", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "params": {
+                "width": args.width,
+                "depth": args.depth,
+                "handlers": args.handlers,
+                "fanout": args.fanout,
+                "repeat": args.repeat,
+            },
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    if not args.output and not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING as __lsp__
 
 __all__ = [
     "Data", "Status", "Message", "propagate",
+    "lazy", "LazyBytes", "LazyList",
+    "MessageBatch",
     "Handler",
     "System",
     "Component",
@@ -14,6 +16,10 @@ __lazy__ = {
     "Status":    ("system.mods.message",   "Status"),
     "Message":   ("system.mods.message",   "Message"),
     "propagate": ("system.mods.message",   "propagate"),
+    "lazy":      ("system.mods.lazy",      "lazy"),
+    "LazyBytes": ("system.mods.lazy",      "LazyBytes"),
+    "LazyList":  ("system.mods.lazy",      "LazyList"),
+    "MessageBatch": ("system.mods.batch", "MessageBatch"),
     "Handler":   ("system.mods.handler",   "Handler"),
     "System":    ("system.mods.system_",   "System"),
     "Component": ("system.mods.component", "Component"),
@@ -37,6 +43,8 @@ def __dir__():
 
 if __lsp__:
     from system.mods.message   import Data, Status, Message, propagate
+    from system.mods.lazy      import lazy, LazyBytes, LazyList
+    from system.mods.batch     import MessageBatch
     from system.mods.handler   import Handler
     from system.mods.system_   import System
     from system.mods.component import Component
@@ -0,0 +1,21 @@
+"""
+Command-line tools:
+
+    python -m system bench [options]    load-test a System (see --help)
+"""
+import sys
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(__doc__.strip())
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command == "bench":
+        from system.mods.bench import main as bench
+        return bench(rest)
+    print(f"unknown command {command!r}\n\n{__doc__.strip()}", file=sys.stderr)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
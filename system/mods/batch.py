@@ -0,0 +1,178 @@
+from array import array
+from system.mods.message import Message
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# Column encodings: status and success as small ints, code with a sentinel for None.
+_STATUS = {None: 0, "success": 1, "failure": 2}
+_STATUS_NAMES = (None, "success", "failure")
+_SUCCESS = {None: -1, False: 0, True: 1}
+_SUCCESS_VALUES = {-1: None, 0: False, 1: True}
+_NO_CODE = -(2 ** 63)
+
+class MessageBatch:
+    """
+    Columnar results of a fan-out:
+      - success, status and code are compact arrays (NumPy arrays when NumPy is
+        installed), message and data parallel lists
+      - failures(), successes(), by_code() and counts() work on the columns,
+        without creating a Message per result
+      - batch[i] and iteration build Messages on demand, of the type of the
+        first result; batch[i:j] is a batch
+    """
+    __slots__ = ("_success", "_status", "_code", "_ok", "messages", "data", "_model")
+
+    def __init__(self, messages=(), model=Message):
+        self._success = array("b")
+        self._status = array("b")
+        self._code = array("q")
+        self._ok = array("b")
+        self.messages = []
+        self.data = []
+        self._model = model
+        self.extend(messages)
+
+    def append(self, msg):
+        success, status, code = msg.success, msg.status, msg.code
+        self._success.append(_SUCCESS[success])
+        self._status.append(_STATUS[status])
+        self._code.append(_NO_CODE if code is None else code)
+        if success is None and status is not None:
+            success = status == "success"
+        self._ok.append(success is not False)
+        if not self.data:
+            self._model = type(msg)
+        self.messages.append(msg.message)
+        self.data.append(msg.data)
+
+    def extend(self, messages):
+        for msg in messages:
+            self.append(msg)
+
+    def _column(self, values):
+        # A copy, so the batch can keep growing while the column is in use.
+        if _np is not None and len(values):
+            return _np.frombuffer(values, dtype=values.typecode).copy()
+        return array(values.typecode, values)
+
+    @property
+    def success(self):
+        """-1 (unset), 0 (False) or 1 (True) per result"""
+        return self._column(self._success)
+
+    @property
+    def status(self):
+        """0 (unset), 1 ('success') or 2 ('failure') per result"""
+        return self._column(self._status)
+
+    @property
+    def code(self):
+        """The code per result; results without a code hold MessageBatch.NO_CODE"""
+        return self._column(self._code)
+
+    NO_CODE = _NO_CODE
+
+    @property
+    def ok(self):
+        """1 where the result did not fail (success, or status when success is unset)"""
+        return self._column(self._ok)
+
+    def __len__(self):
+        return len(self._ok)
+
+    def _message(self, i):
+        code = self._code[i]
+        return self._model(
+            message=self.messages[i],
+            data=self.data[i],
+            success=_SUCCESS_VALUES[self._success[i]],
+            status=_STATUS_NAMES[self._status[i]],
+            code=None if code == _NO_CODE else code,
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MessageBatch index out of range")
+        return self._message(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._message(i)
+
+    def to_list(self):
+        return list(self)
+
+    def take(self, indices):
+        """A new batch with the results at indices, in that order"""
+        out = MessageBatch(model=self._model)
+        if _np is not None and isinstance(indices, _np.ndarray):
+            for name in ("_success", "_status", "_code", "_ok"):
+                column = getattr(self, name)
+                getattr(out, name).frombytes(_np.frombuffer(column, dtype=column.typecode)[indices].tobytes())
+            indices = indices.tolist()
+            out.messages = [self.messages[i] for i in indices]
+            out.data = [self.data[i] for i in indices]
+            return out
+        for i in indices:
+            i = int(i)
+            out._success.append(self._success[i])
+            out._status.append(self._status[i])
+            out._code.append(self._code[i])
+            out._ok.append(self._ok[i])
+            out.messages.append(self.messages[i])
+            out.data.append(self.data[i])
+        return out
+
+    def _where(self, column, predicate, mask):
+        if _np is not None and len(column):
+            return _np.flatnonzero(mask(_np.frombuffer(column, dtype=column.typecode)))
+        return [i for i, value in enumerate(column) if predicate(value)]
+
+    def indices(self, failed=True):
+        """Positions of the failed results (or, with failed=False, of the others)"""
+        want = 0 if failed else 1
+        return self._where(self._ok, lambda v: v == want, lambda c: c == want)
+
+    def failures(self):
+        return self.take(self.indices(failed=True))
+
+    def successes(self):
+        return self.take(self.indices(failed=False))
+
+    def by_code(self, *codes):
+        """The results whose code is one of codes (None selects results without a code)"""
+        codes = frozenset(_NO_CODE if c is None else c for c in codes)
+        mask = lambda c: _np.isin(c, _np.fromiter(codes, dtype="q", count=len(codes)))
+        return self.take(self._where(self._code, codes.__contains__, mask))
+
+    def counts(self):
+        """Number of results per code (None for results without one)"""
+        if _np is not None and len(self):
+            values, counts = _np.unique(self.code, return_counts=True)
+            pairs = zip(values.tolist(), counts.tolist())
+        else:
+            counts = {}
+            for code in self._code:
+                counts[code] = counts.get(code, 0) + 1
+            pairs = counts.items()
+        return {None if code == _NO_CODE else code: n for code, n in pairs}
+
+    def summary(self):
+        failed = len(self) - (int(self.ok.sum()) if _np is not None and len(self) else sum(self._ok))
+        return {
+            "total": len(self),
+            "succeeded": len(self) - failed,
+            "failed": failed,
+            "codes": self.counts(),
+        }
+
+    def __repr__(self):
+        s = self.summary()
+        return f"MessageBatch(total={s['total']}, succeeded={s['succeeded']}, failed={s['failed']})"
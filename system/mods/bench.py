@@ -0,0 +1,328 @@
+"""
+Load generator for a System:
+
+    python -m system bench --width 4 --depth 3 --concurrency 32 --duration 10
+    python -m system bench --system app.main:system --path /users/get --kwargs '{"id": 1}'
+    python -m system bench --op call_many --batch 100 --caller async --rate 2000 --output run.json
+    python -m system bench --compare run.json
+
+Without --system a synthetic tree of --width components per level, --depth levels
+and --handlers handlers per component is built, and its leaf handlers are called.
+Calls run from --concurrency sync threads or async tasks, closed-loop by default;
+with --rate they arrive on a fixed schedule and latency is measured from the
+scheduled arrival, so a slow system is not hidden by a slowed-down generator.
+"""
+import sys
+import json
+import inspect
+import time
+import asyncio
+import argparse
+import platform
+import threading
+from array import array
+from itertools import count, product
+from typed import Int
+from system import new, Message
+from system.mods.shard import _load
+from system.mods.helper import _normalize_path
+
+def _failed(msg):
+    success = msg.success
+    if success is None and msg.status is not None:
+        success = msg.status == "success"
+    return success is False
+
+def synthetic(width=4, depth=3, handlers=4, name="bench"):
+    """Build a System whose component tree has the given width and depth, with handlers on every component"""
+    act = new.handler(name="act")
+    Node = new.component("Node")
+    Node.attach(name="act", handler=act)
+    Root = new.system(name)
+    Root.allow(Node)
+
+    def _node(label, level):
+        comp = Node(name=label, prefix=f"/{label}")
+        for i in range(handlers):
+            def h(x: Int) -> Message:
+                return act.success(data=x)
+            h.__name__ = f"h{i}"
+            comp.act(f"/h{i}")(h)
+        if level < depth:
+            for j in range(width):
+                comp.include(_node(f"c{j}", level + 1))
+        return comp
+
+    system = Root()
+    for j in range(width):
+        system.include(_node(f"c{j}", 1), None)
+    return system
+
+def leaf_paths(width, depth, handlers):
+    return [
+        "/" + "/".join(f"c{j}" for j in chain) + f"/h{i}"
+        for chain in product(range(width), repeat=depth)
+        for i in range(handlers)
+    ]
+
+class Load:
+    """
+    One load run against a system:
+      - targets: [(path, kwargs)], called round-robin
+      - op: 'call' (one call per operation) or 'call_many' (batch calls per operation)
+      - caller: 'sync' (threads calling call_sync / call_many_sync) or 'async'
+        (tasks awaiting call / call_many on one event loop)
+      - stops after requests operations or duration seconds, whichever comes first
+    """
+    def __init__(self, system, targets, op="call", caller="sync", concurrency=8,
+                 rate=None, requests=None, duration=None, batch=100):
+        if op not in ("call", "call_many"):
+            raise ValueError(f"op must be 'call' or 'call_many', got {op!r}")
+        if caller not in ("sync", "async"):
+            raise ValueError(f"caller must be 'sync' or 'async', got {caller!r}")
+        if not targets:
+            raise ValueError("no handler paths to call")
+        if requests is None and duration is None:
+            duration = 10.0
+        self.system = system
+        self.targets = [(_normalize_path(path), kwargs) for path, kwargs in targets]
+        self.op = op
+        self.caller = caller
+        self.concurrency = concurrency
+        self.rate = rate
+        self.requests = requests
+        self.duration = duration
+        self.batch = batch if op == "call_many" else 1
+        self._lock = threading.Lock()
+
+    def _next(self, ticket, t0):
+        """The scheduled start of the next operation, or None once the run is over"""
+        with self._lock:
+            k = next(ticket)
+        if self.requests is not None and k >= self.requests:
+            return None
+        now = time.perf_counter()
+        if self.duration is not None and now - t0 >= self.duration:
+            return None
+        return k, (t0 + k / self.rate) if self.rate else now
+
+    def _calls(self, k):
+        n = len(self.targets)
+        return [
+            (path, (), kwargs)
+            for path, kwargs in (self.targets[(k * self.batch + i) % n] for i in range(self.batch))
+        ]
+
+    def _record(self, stats, start, results):
+        stats["latency"].append(time.perf_counter() - start)
+        stats["calls"] += len(results)
+        stats["failures"] += sum(1 for msg in results if _failed(msg))
+
+    def _worker(self, ticket, t0, stats):
+        system = self.system
+        while True:
+            step = self._next(ticket, t0)
+            if step is None:
+                return
+            k, start = step
+            delay = start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                if self.op == "call":
+                    path, args, kwargs = self._calls(k)[0]
+                    results = (system.call_sync(path, **kwargs),)
+                else:
+                    results = system.call_many_sync(*self._calls(k))
+            except Exception:
+                stats["errors"] += self.batch
+                stats["latency"].append(time.perf_counter() - start)
+                continue
+            self._record(stats, start, results)
+
+    async def _task(self, ticket, t0, stats):
+        system = self.system
+        while True:
+            step = self._next(ticket, t0)
+            if step is None:
+                return
+            k, start = step
+            delay = start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                if self.op == "call":
+                    path, args, kwargs = self._calls(k)[0]
+                    results = (await system.call(path, **kwargs),)
+                else:
+                    results = await system.call_many(*self._calls(k))
+            except Exception:
+                stats["errors"] += self.batch
+                stats["latency"].append(time.perf_counter() - start)
+                continue
+            self._record(stats, start, results)
+
+    def run(self):
+        stats = [
+            {"latency": array("d"), "calls": 0, "failures": 0, "errors": 0}
+            for _ in range(self.concurrency)
+        ]
+        ticket = count()
+        t0 = time.perf_counter()
+        if self.caller == "sync":
+            threads = [
+                threading.Thread(target=self._worker, args=(ticket, t0, s), name=f"bench-{i}", daemon=True)
+                for i, s in enumerate(stats)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            async def _main():
+                await asyncio.gather(*(self._task(ticket, t0, s) for s in stats))
+            asyncio.run(_main())
+        elapsed = time.perf_counter() - t0
+        return self._summary(stats, elapsed)
+
+    def _summary(self, stats, elapsed):
+        latency = sorted(v for s in stats for v in s["latency"])
+        calls = sum(s["calls"] for s in stats)
+        failures = sum(s["failures"] for s in stats)
+        errors = sum(s["errors"] for s in stats)
+        total = calls + errors
+        return {
+            "operations": len(latency),
+            "calls": total,
+            "elapsed_s": elapsed,
+            "throughput_ops": len(latency) / elapsed if elapsed else 0.0,
+            "throughput_calls": total / elapsed if elapsed else 0.0,
+            "failures": failures,
+            "errors": errors,
+            "failure_rate": (failures + errors) / total if total else 0.0,
+            "latency_ms": _percentiles(latency),
+        }
+
+def _percentiles(values):
+    if not values:
+        return {}
+    n = len(values)
+    pick = lambda q: values[min(n - 1, max(int(q * n + 0.5) - 1, 0))] * 1e3
+    return {
+        "mean": sum(values) / n * 1e3,
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "p999": pick(0.999),
+        "max": values[-1] * 1e3,
+    }
+
+def compare(current, previous, out=sys.stdout):
+    cur, old = current["results"], previous["results"]
+    rows = [("throughput_calls", "calls/s")] + [
+        (f"latency_ms.{q}", f"{q} ms") for q in ("p50", "p90", "p99", "max")
+    ] + [("failure_rate", "failure rate")]
+    print(f"{'metric':<16}{'previous':>14}{'current':>14}{'ratio':>9}", file=out)
+    for key, label in rows:
+        a, b = old, cur
+        for part in key.split("."):
+            a, b = (a or {}).get(part), (b or {}).get(part)
+        if a is None or b is None:
+            continue
+        ratio = f"{b / a:>9.2f}" if a else f"{'-':>9}"
+        print(f"{label:<16}{a:>14.3f}{b:>14.3f}{ratio}", file=out)
+
+def _accepts(func, kwargs):
+    """Whether func can be called with exactly kwargs: every required parameter given, none unknown"""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    names = {p.name for p in params}
+    if not any(p.kind is p.VAR_KEYWORD for p in params) and not kwargs.keys() <= names:
+        return False
+    return all(
+        p.name in kwargs or p.default is not p.empty or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+        for p in params
+    )
+
+def _targets(system, args):
+    kwargs = json.loads(args.kwargs) if args.kwargs else {}
+    if args.path:
+        return [(path, kwargs) for path in args.path]
+    if args.system is None:
+        return [(path, {"x": 1}) for path in leaf_paths(args.width, args.depth, args.handlers)]
+    # Without --path, only the handlers that can be called with --kwargs alone.
+    return [(path, kwargs) for path, info in system._handlers.copy().items() if _accepts(info.func, kwargs)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m system bench", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--system", help="the system to load, as 'module:attr' or 'module.attr' (a System or a factory)")
+    parser.add_argument("--path", action="append", help="handler path to call (repeatable); default: every handler callable with --kwargs alone")
+    parser.add_argument("--kwargs", help="JSON object of keyword arguments for every call")
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--handlers", type=int, default=4)
+    parser.add_argument("--op", choices=("call", "call_many"), default="call")
+    parser.add_argument("--caller", choices=("sync", "async"), default="sync")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, help="target operations per second (open loop)")
+    parser.add_argument("--requests", type=int, help="stop after this many operations")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds (default 10 without --requests)")
+    parser.add_argument("--batch", type=int, default=100, help="calls per call_many operation")
+    parser.add_argument("--warmup", type=int, default=100, help="operations to run and discard first")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="compare against a previous JSON report")
+    args = parser.parse_args(argv)
+
+    system = _load(args.system) if args.system else synthetic(args.width, args.depth, args.handlers)
+    targets = _targets(system, args)
+    if not targets:
+        system.shutdown()
+        parser.error("no handler can be called with --kwargs alone; name the handlers with --path")
+    options = dict(
+        op=args.op, caller=args.caller, concurrency=args.concurrency, batch=args.batch,
+    )
+    try:
+        if args.warmup:
+            Load(system, targets, requests=args.warmup, **options).run()
+        results = Load(
+            system, targets, rate=args.rate, requests=args.requests, duration=args.duration, **options,
+        ).run()
+    finally:
+        system.shutdown()
+
+    report = {
+        "meta": {
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "params": {
+                k: v for k, v in vars(args).items() if k not in ("output", "compare")
+            },
+            "targets": len(targets),
+        },
+        "results": results,
+    }
+
+    latency = results["latency_ms"]
+    print(
+        f"{results['calls']} calls in {results['elapsed_s']:.2f}s: "
+        f"{results['throughput_calls']:.0f} calls/s, "
+        f"p50 {latency.get('p50', 0):.3f} ms, p99 {latency.get('p99', 0):.3f} ms, "
+        f"failure rate {results['failure_rate']:.2%}",
+        file=sys.stderr,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    if not args.output and not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
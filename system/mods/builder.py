@@ -1,11 +1,12 @@
 from __future__ import annotations
+import inspect
 from functools import wraps, partial
 from typed import name
 from system.mods.system_ import System, SYSTEM
 from system.mods.component import Component, COMPONENT, include_method
 from system.mods.handler import handler, HandlerInfo, register_handler, Handler
 from system.mods.message import Message, message as _message, _plain_message
-from system.mods.helper import _normalize_path
+from system.mods.helper import _normalize_path, _set_local
 
 class _ClassOnly:
     def __init__(self, func):
@@ -49,7 +50,16 @@ class HandlerFactory:
         def _decorate(func):
             orig = func
 
-            if self.validators:
+            if self.validators and inspect.iscoroutinefunction(orig):
+                @wraps(orig)
+                async def validated(*args, **kw):
+                    for v in self.validators:
+                        v(*args, **kw)
+                    return await orig(*args, **kw)
+
+                validated.__annotations__ = getattr(orig, "__annotations__", {}).copy()
+                target = validated
+            elif self.validators:
                 @wraps(orig)
                 def validated(*args, **kw):
                     for v in self.validators:
@@ -95,6 +105,10 @@ class HandlerFactory:
 
         _decorate.call = self.call
         _decorate.data = self.data
+        _decorate.acall = self.acall
+        _decorate.adata = self.adata
+        _decorate.iter_data = self.iter_data
+        _decorate.page = self.page
         _decorate.success = self.success
         _decorate.failure = self.failure
         _decorate.propagate = self.propagate
@@ -107,11 +121,16 @@ class HandlerFactory:
 
         return partial(self._registrar, instance)
 
-    def _registrar(self, owner_obj, path, name= None, **meta):
+    def _registrar(self, owner_obj, path, name= None, paginated=False, **meta):
         rel_path = _normalize_path(path)
 
         def decorator(func):
-            h = self(func)
+            if getattr(func, "action_factory", None) is self:
+                h = func
+                if paginated and not h.is_paginated:
+                    raise TypeError(f"Handler '{getattr(func, '__name__', 'handler')}' was not declared paginated=True")
+            else:
+                h = self(func, paginated=paginated)
             h_name = name or getattr(func, "__name__", "handler")
 
             meta_full = dict(meta)
@@ -129,7 +148,7 @@ class HandlerFactory:
                     owner=owner_obj,
                     meta=meta_full,
                 )
-                owner_obj._local_handlers[rel_path] = entry
+                _set_local(owner_obj, rel_path, entry)
 
                 if not hasattr(owner_obj, h_name):
                     setattr(owner_obj, h_name, h)
@@ -171,6 +190,18 @@ class HandlerFactory:
     def data(self, *args, **kwargs):
         return handler.data(*args, **kwargs)
 
+    def iter_data(self, *args, **kwargs):
+        return handler.iter_data(*args, **kwargs)
+
+    def page(self, items, next=None, message=None, code=None):
+        return handler.page(items, next, message, code)
+
+    async def acall(self, *args, **kwargs):
+        return await handler.acall(*args, **kwargs)
+
+    async def adata(self, *args, **kwargs):
+        return await handler.adata(*args, **kwargs)
+
     def success(self, obj=_UNSET, message=_UNSET, data=_UNSET, code=_UNSET, **kwargs):
         if obj is not _UNSET:
             if not isinstance(obj, Message):
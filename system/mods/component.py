@@ -1,5 +1,22 @@
+import inspect
 from typed import Maybe, Str
-from system.mods.helper import _normalize_path, _InfoProxy, _get_entity
+from system.mods.helper import (
+    _normalize_path,
+    _InfoProxy,
+    _get_entity,
+    _lookup,
+    _relative_prefix,
+    _tables,
+    _writing,
+    _set_local,
+    _assign,
+    _children,
+    _set_children,
+    _on_publish,
+    _note,
+    _registry_changed
+)
+from system.mods.profiling import _match
 from system.mods.handler import (
     Message,
     Handler,
@@ -38,19 +55,25 @@ class COMPONENT(type):
         return cls
 
 def include_method(self, component, prefix=None):
+    system = getattr(self, "system", None)
+    scope = system if system is not None else self
+
     def _attach(component, system, absolute_prefix=None):
         existing = getattr(component, "system", None)
         if existing is not None and existing is not system:
             if hasattr(existing, "_components_by_prefix") and hasattr(system, "_components_by_prefix"):
                 raise ValueError("Component is already attached to a different System")
 
-        component.system = system
+        _assign(scope, component, "system", system)
         if absolute_prefix is not None:
-            component.prefix = _normalize_path(absolute_prefix)
+            _assign(scope, component, "prefix", _normalize_path(absolute_prefix))
 
         if hasattr(system, "_components_by_prefix"):
             key = tuple(component.prefix)
-            system._components_by_prefix[key] = component
+            _, components_by_prefix = _tables(system)
+            components_by_prefix[key] = component
+            _note(system, key)
+            _registry_changed(system)
 
         for rel_path, info in component._local_handlers.items():
             abs_path = component.prefix + rel_path
@@ -63,20 +86,11 @@ def include_method(self, component, prefix=None):
                 meta=info.meta,
             )
 
-        for child in component._components:
+        for child in _children(scope, component):
             child_abs_prefix = component.prefix + child.prefix
             _attach(child, system, absolute_prefix=child_abs_prefix)
 
-    extra = _normalize_path(prefix)
-    component.prefix = extra + component.prefix
-    self._components.append(component)
-
-    system = getattr(self, "system", None)
-    if system is not None:
-        abs_prefix = component.prefix if not getattr(self, "prefix", None) else self.prefix + component.prefix
-        _attach(component, system, absolute_prefix=abs_prefix)
-    else:
-        _attach(component, self, absolute_prefix=component.prefix)  # optional; can keep or drop
+    def _bind():
         comp_name = getattr(component, "name", None)
         if comp_name:
             if hasattr(self, "get"):
@@ -87,8 +101,103 @@ def include_method(self, component, prefix=None):
         if component.name and not hasattr(self, component.name):
             setattr(self, component.name, component)
 
+    with _writing(scope):
+        extra = _normalize_path(prefix)
+        _assign(scope, component, "prefix", extra + component.prefix)
+        _set_children(scope, self, _children(scope, self) + [component])
+
+        if system is not None:
+            abs_prefix = component.prefix if not getattr(self, "prefix", None) else self.prefix + component.prefix
+            _attach(component, system, absolute_prefix=abs_prefix)
+        else:
+            if hasattr(self, "_components_by_prefix"):
+                _attach(component, self, absolute_prefix=component.prefix)
+            else:
+                # Detached parent: prefixes stay relative until an ancestor is attached.
+                component.system = self
+            _on_publish(scope, _bind)
+
     return component
 
+def _find_parent(owner, component):
+    if component in _children(owner, owner):
+        return owner
+
+    _, components_by_prefix = _tables(owner) if hasattr(owner, "_components_by_prefix") else (None, {})
+    prefix = tuple(component.prefix)
+    for i in range(len(prefix), -1, -1):
+        parent = components_by_prefix.get(prefix[:i])
+        if parent is not None and component in _children(owner, parent):
+            return parent
+    return None
+
+def exclude_method(self, component):
+    with _writing(self):
+        return _exclude(self, component)
+
+def _exclude(self, component):
+    # Only a System holds absolute prefixes; under a detached parent they are already relative.
+    absolute = hasattr(self, "_components_by_prefix")
+    handlers = components_by_prefix = None
+    if absolute:
+        handlers, components_by_prefix = _tables(self)
+    info_names = []
+
+    def _detach(component):
+        for child in _children(self, component):
+            _detach(child)
+            if absolute:
+                _assign(self, child, "prefix", _relative_prefix(child, component))
+
+        key = tuple(component.prefix)
+        if components_by_prefix is not None and components_by_prefix.get(key) is component:
+            del components_by_prefix[key]
+            _note(self, key)
+
+        for rel_path in component._local_handlers if handlers is not None else ():
+            abs_path = key + rel_path
+            info = handlers.get(abs_path)
+            if info is not None and info.owner is component:
+                del handlers[abs_path]
+                _note(self, abs_path)
+                getattr(self, "_chains", {}).pop(abs_path, None)
+                if len(abs_path) == 1:
+                    info_names.append(abs_path[0])
+        _registry_changed(component)
+
+        _assign(self, component, "system", None)
+
+    parent = _find_parent(self, component)
+    if parent is None:
+        raise ValueError(
+            f"Component '{getattr(component, 'name', 'component')}' is not included in "
+            f"'{getattr(self, 'name', 'system')}'"
+        )
+
+    _set_children(self, parent, [c for c in _children(self, parent) if c is not component])
+    _detach(component)
+    if parent is not self and absolute:
+        _assign(self, component, "prefix", _relative_prefix(component, parent))
+
+    def _unbind():
+        info = getattr(self, "info", None)
+        if info is not None:
+            for name in info_names:
+                info.__dict__.pop(name, None)
+        if parent is not self:
+            return
+        comp_name = getattr(component, "name", None)
+        if comp_name and self.__dict__.get(comp_name) is component:
+            delattr(self, comp_name)
+        if comp_name and info is not None:
+            proxy = info.__dict__.get(comp_name)
+            if proxy is not None and (comp_name,) not in (getattr(self, "_handlers", None) or {}):
+                del info.__dict__[comp_name]
+
+    _on_publish(self, _unbind)
+    _registry_changed(self)
+    return parent
+
 class Component:
     def __init__(self, name: Str="component", desc: Str="", prefix: Maybe(Str)=None, attach=None, allow=None):
         self.name = name
@@ -97,6 +206,7 @@ class Component:
 
         self.system = None
         self._local_handlers = {}
+        self._lookup_cache = {}
         self._components = []
         self._allowed_components = set()
 
@@ -158,7 +268,7 @@ class Component:
             owner=self,
             meta={"kind": kind or name, "desc": desc},
         )
-        self._local_handlers[rel_path] = entry
+        _set_local(self, rel_path, entry)
         if not hasattr(self, name):
             setattr(self, name, derived)
 
@@ -200,6 +310,16 @@ class Component:
         normalized_path = _normalize_path(path)
         return _get_entity(self, normalized_path)
 
+    def detach(self):
+        system = getattr(self, "system", None)
+        if system is None:
+            return self
+        if hasattr(system, "exclude"):
+            system.exclude(self)
+        else:
+            exclude_method(system, self)
+        return self
+
     def include(self, component, prefix=None):
         cls = self.__class__
         global_allowed = getattr(cls, "_allowed_components", set())
@@ -253,15 +373,29 @@ class Component:
 
     def get_handler_info(self, path):
         """Helper method to get handler info by path"""
-        normalized_path = _normalize_path(path)
-        return self._local_handlers.get(normalized_path)
+        return _lookup(self, path)[0]
 
     async def call(self, path, *args, **kwargs):
         """Call a handler by path"""
         info = self.get_handler_info(path)
         if info is None:
             raise KeyError(f"No handler registered at path {path!r}")
-        result = info.func(*args, **kwargs)
+
+        # Local entries are relative; attached to a System, dispatch through its record.
+        system = self.system
+        handlers = getattr(system, "_handlers", None)
+        if handlers is not None and hasattr(system, "_components_by_prefix"):
+            info = handlers.get(self.prefix + info.path, info)
+        profiles = getattr(system, "_profiles", None)
+        func = system._target(info) if getattr(system, "_middleware", None) else info.func
+        session = _match(profiles, info.path) if profiles else None
+        if session is None:
+            result = func(*args, **kwargs)
+        else:
+            result = session.run(info.path, func, args, kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+
         if not isinstance(result, Message):
             raise TypeError(
                 f"Handler at path {path!r} returned {type(result)!r}, "
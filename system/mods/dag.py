@@ -0,0 +1,202 @@
+import asyncio
+import inspect
+from time import perf_counter
+from system.mods.message import Message
+from system.mods.helper import _normalize_path
+
+def _status(msg):
+    if msg.status is not None:
+        return msg.status
+    if msg.success is True:
+        return "success"
+    if msg.success is False:
+        return "failure"
+    return None
+
+class Node:
+    __slots__ = ("name", "path", "kwargs", "deps", "params")
+
+    def __init__(self, name, path, kwargs=None, deps=None):
+        self.name = name
+        self.path = _normalize_path(path)
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.params = tuple(inspect.signature(kwargs).parameters) if callable(kwargs) else ()
+        self.deps = tuple(deps) if deps is not None else self.params
+
+    def arguments(self, upstream):
+        if not callable(self.kwargs):
+            return self.kwargs
+        return self.kwargs(**{d: upstream[d] for d in self.params if d in upstream})
+
+class GraphRun:
+    """Outcome of one graph run: per-node messages, skipped nodes and timings"""
+    def __init__(self, messages, skipped, timings, duration, deps):
+        self._deps = deps
+        self.messages = messages
+        self.skipped = skipped
+        self.timings = timings
+        self.duration = duration
+        self.critical_path, self.critical = self._critical()
+
+    def _critical(self):
+        if not self.timings:
+            return [], 0.0
+        ends = {n: t[1] for n, t in self.timings.items()}
+        node = max(ends, key=ends.get)
+        path = [node]
+        deps = self._deps
+        while True:
+            ran = [d for d in deps.get(node, ()) if d in ends]
+            if not ran:
+                break
+            node = max(ran, key=ends.get)
+            path.append(node)
+        path.reverse()
+        return path, ends[path[-1]] - self.timings[path[0]][0]
+
+    @property
+    def ok(self):
+        return not self.skipped and all(_status(m) != "failure" for m in self.messages.values())
+
+    def __getitem__(self, name):
+        return self.messages[name]
+
+    def to_dict(self):
+        return {
+            "ok": self.ok,
+            "skipped": sorted(self.skipped),
+            "duration": self.duration,
+            "critical_path": self.critical_path,
+            "critical": self.critical,
+            "nodes": {
+                n: {"start": t[0], "end": t[1], "duration": t[1] - t[0]}
+                for n, t in self.timings.items()
+            },
+        }
+
+    def __repr__(self):
+        return f"GraphRun(ok={self.ok}, nodes={len(self.messages)}, skipped={sorted(self.skipped)}, duration={self.duration:.6f})"
+
+class Graph:
+    """
+    A DAG of handler calls, validated once and runnable many times:
+      - nodes maps a name to (path, kwargs) or (path, kwargs, deps); kwargs may be
+        a callable whose parameters name the upstream nodes whose data it receives
+      - every node whose dependencies are done runs concurrently, at most
+        concurrency at a time
+      - when a node's status equals propagate, its downstream nodes are skipped
+        and get a failure Message naming the upstream node
+    """
+    def __init__(self, system, nodes, propagate="failure", concurrency=None):
+        if propagate not in ("success", "failure", None):
+            raise ValueError(f"propagate must be 'success', 'failure' or None, got {propagate!r}")
+        self.system = system
+        self.propagate = propagate
+        self.concurrency = concurrency
+        self.nodes = {name: Node(name, *spec) for name, spec in nodes.items()}
+        self.order = self._toposort()
+        self.dependents = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            for dep in node.deps:
+                self.dependents[dep].append(node.name)
+
+    def _toposort(self):
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise KeyError(f"Node {node.name!r} depends on unknown node {dep!r}")
+
+        order, state = [], {}
+        def _visit(name, trail):
+            mark = state.get(name)
+            if mark == 1:
+                return
+            if mark == 0:
+                raise ValueError("Cycle in graph: " + " -> ".join(trail + [name]))
+            state[name] = 0
+            for dep in self.nodes[name].deps:
+                _visit(dep, trail + [name])
+            state[name] = 1
+            order.append(name)
+
+        for name in self.nodes:
+            _visit(name, [])
+        return order
+
+    async def run(self):
+        system = self.system
+        nodes = self.nodes
+        waiting = {name: len(node.deps) for name, node in nodes.items()}
+        messages, upstream, timings = {}, {}, {}
+        skipped = set()
+        limit = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+        t0 = perf_counter()
+
+        async def _one(node):
+            if limit is not None:
+                await limit.acquire()
+            start = perf_counter() - t0
+            try:
+                return await system.call(node.path, **node.arguments(upstream))
+            finally:
+                timings[node.name] = (start, perf_counter() - t0)
+                if limit is not None:
+                    limit.release()
+
+        def _skip(name, cause):
+            for child in self.dependents[name]:
+                if child not in skipped:
+                    skipped.add(child)
+                    messages[child] = Message(
+                        message=f"skipped: upstream node {cause!r} did not succeed",
+                        status="failure",
+                        success=False,
+                    )
+                    _skip(child, cause)
+
+        tracer = system._tracer
+        span = tracer.start("graph") if tracer is not None else None
+        error = None
+        try:
+            tasks = {}
+            for name in self.order:
+                if not waiting[name]:
+                    tasks[asyncio.ensure_future(_one(nodes[name]))] = name
+
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks.pop(task)
+                    try:
+                        msg = task.result()
+                    except Exception as e:
+                        msg = Message(message=f"{type(e).__name__}: {e}", status="failure", success=False)
+
+                    messages[name] = msg
+                    upstream[name] = msg.data
+                    if self.propagate is not None and _status(msg) == self.propagate:
+                        _skip(name, name)
+
+                    for child in self.dependents[name]:
+                        waiting[child] -= 1
+                        if not waiting[child] and child not in skipped:
+                            tasks[asyncio.ensure_future(_one(nodes[child]))] = child
+        except BaseException as e:
+            error = e
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if span is not None:
+                tracer.finish(span, None, error)
+
+        return GraphRun(
+            {n: messages[n] for n in self.order if n in messages},
+            skipped,
+            timings,
+            perf_counter() - t0,
+            {name: node.deps for name, node in nodes.items()},
+        )
+
+    def run_sync(self):
+        return asyncio.run(self.run())
@@ -0,0 +1,317 @@
+import asyncio
+import inspect
+import threading
+from itertools import count
+from queue import Queue, Full, Empty
+from contextvars import copy_context
+from concurrent.futures import Future, ThreadPoolExecutor
+from system.mods.message import Message
+from system.mods.helper import _normalize_path, _run_awaitable
+
+_MATCH_CACHE_SIZE = 4096
+_delivering = threading.local()
+
+class _Node:
+    __slots__ = ("children", "subs", "tail")
+
+    def __init__(self):
+        self.children = {}
+        self.subs = []
+        self.tail = []
+
+def _build(subscriptions):
+    root = _Node()
+    for sub in subscriptions:
+        node = root
+        pattern = sub.pattern
+        if pattern and pattern[-1] == "**":
+            for seg in pattern[:-1]:
+                node = node.children.setdefault(seg, _Node())
+            node.tail.append(sub)
+            continue
+        for seg in pattern:
+            node = node.children.setdefault(seg, _Node())
+        node.subs.append(sub)
+    return root
+
+def _collect(node, path, i, out):
+    if node.tail:
+        out.extend(node.tail)
+    if i == len(path):
+        out.extend(node.subs)
+        return
+    child = node.children.get(path[i])
+    if child is not None:
+        _collect(child, path, i + 1, out)
+    child = node.children.get("*")
+    if child is not None and path[i] != "*":
+        _collect(child, path, i + 1, out)
+
+class Subscription:
+    """
+    One subscriber: a handler (or the path of a registered handler) fed from
+    its own bounded queue, drained by at most concurrency workers at a time.
+    """
+    def __init__(self, bus, pattern, handler, maxsize=1024, concurrency=1, overflow="block"):
+        if overflow not in ("block", "drop", "error"):
+            raise ValueError(f"overflow must be 'block', 'drop' or 'error', got {overflow!r}")
+        self.bus = bus
+        self.pattern = _normalize_path(pattern)
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.overflow = overflow
+        self.queue = Queue(maxsize)
+        self.delivered = 0
+        self.errors = 0
+        self.dropped = 0
+        self.seq = next(bus._seq)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self.queue.qsize()
+
+    def cancel(self):
+        self.bus.unsubscribe(self)
+
+    def __repr__(self):
+        return f"Subscription(pattern={'/' + '/'.join(self.pattern)!r}, handler={self.handler!r})"
+
+class EventBus:
+    """
+    Path-pattern pub/sub over a System:
+      - patterns are paths where '*' matches one segment and a trailing '**' any rest
+      - every subscription has its own bounded queue; overflow decides whether
+        publishers block, drop the event or get queue.Full
+      - deliveries run on a pool of at most concurrency threads, in a copy of
+        the publisher's context; publish_sync from a subscriber delivers inline
+    """
+    def __init__(self, system, concurrency=None):
+        self.system = system
+        self.concurrency = concurrency or 8
+        self._subs = ()
+        self._root = _Node()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._strict = threading.Lock()
+        self._seq = count()
+        self._executor = None
+
+    def subscribe(self, pattern, handler, maxsize=1024, concurrency=1, overflow="block"):
+        sub = Subscription(self, pattern, handler, maxsize, concurrency, overflow)
+        with self._lock:
+            self._subs = self._subs + (sub,)
+            self._root = _build(self._subs)
+            self._cache = {}
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+            self._root = _build(self._subs)
+            self._cache = {}
+
+    def match(self, path):
+        path = _normalize_path(path)
+        # Cache before root: (un)subscribe publishes the root first, so a
+        # fresh cache is never filled from a stale tree.
+        cache = self._cache
+        subs = cache.get(path)
+        if subs is None:
+            out = []
+            _collect(self._root, path, 0, out)
+            subs = tuple(sorted(set(out), key=lambda sub: sub.seq))
+            if len(cache) >= _MATCH_CACHE_SIZE:
+                cache.pop(next(iter(cache)), None)
+            cache[path] = subs
+        return subs
+
+    # Delivery
+
+    def _pool(self):
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                executor = self._executor
+                if executor is None:
+                    executor = self._executor = ThreadPoolExecutor(
+                        max_workers=self.concurrency,
+                        thread_name_prefix=f"{getattr(self.system, 'name', 'system')}-events",
+                    )
+        return executor
+
+    def _enqueue(self, sub, path, payload, future, block=True):
+        item = (copy_context(), path, payload, future)
+        try:
+            if sub.overflow == "block" and block:
+                sub.queue.put(item)
+            else:
+                sub.queue.put_nowait(item)
+        except Full:
+            if sub.overflow == "error":
+                raise
+            if sub.overflow == "block":
+                return False
+            sub.dropped += 1
+            future.set_result(None)
+            return None
+
+        with sub._lock:
+            if sub._active < sub.concurrency:
+                sub._active += 1
+                self._pool().submit(self._drain, sub)
+        return True
+
+    def _drain(self, sub):
+        _delivering.active = True
+        try:
+            self._drain_queue(sub)
+        finally:
+            _delivering.active = False
+
+    def _drain_queue(self, sub):
+        while True:
+            try:
+                ctx, path, payload, future = sub.queue.get_nowait()
+            except Empty:
+                with sub._lock:
+                    if sub.queue.empty():
+                        sub._active -= 1
+                        return
+                continue
+            ctx.run(self._deliver, sub, path, payload, future)
+
+    def _deliver(self, sub, path, payload, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            if isinstance(sub.handler, (str, tuple)):
+                result = self.system.call_sync(sub.handler, **payload)
+            else:
+                result = sub.handler(**payload)
+                if inspect.isawaitable(result):
+                    result = _run_awaitable(result, getattr(sub.handler, "__name__", "subscriber"))
+                if not isinstance(result, Message):
+                    raise TypeError(
+                        f"Subscriber {sub!r} returned {type(result)!r}, expected a subtype of Message"
+                    )
+        except BaseException as e:
+            sub.errors += 1
+            future.set_exception(e)
+            return
+        sub.delivered += 1
+        future.set_result(result)
+
+    def _fanout(self, path, payload, block=True):
+        """Queue the event for every matching subscriber: [(subscription, future, queued)]"""
+        subs = self.match(path)
+        futures = [Future() for _ in subs]
+        queued = [None] * len(subs)
+        strict = [i for i, sub in enumerate(subs) if sub.overflow == "error"]
+        if strict:
+            # All or nothing: no subscriber gets the event if one of them is full.
+            # Queues only shrink while the lock is held, so the puts cannot fail.
+            with self._strict:
+                for i in strict:
+                    if subs[i].queue.full():
+                        raise Full(f"subscriber queue is full: {subs[i]!r}")
+                for i in strict:
+                    queued[i] = self._enqueue(subs[i], path, payload, futures[i], block)
+        for i, sub in enumerate(subs):
+            if sub.overflow != "error":
+                queued[i] = self._enqueue(sub, path, payload, futures[i], block)
+        return list(zip(subs, futures, queued))
+
+    def _inline(self, path, payload):
+        """Deliver in the calling thread, for publishers that are themselves deliveries"""
+        deliveries = []
+        for sub in self.match(path):
+            future = Future()
+            self._deliver(sub, path, payload, future)
+            deliveries.append((sub, future, True))
+        return deliveries
+
+    # Publishing
+
+    def emit(self, path, **payload):
+        """Fire and forget: queue the event for every subscriber and return how many accepted it"""
+        return sum(1 for _, _, queued in self._fanout(path, payload) if queued)
+
+    def publish_sync(self, path, **payload):
+        # A subscriber waiting on the pool it runs on could wait forever.
+        if getattr(_delivering, "active", False):
+            deliveries = self._inline(path, payload)
+        else:
+            deliveries = self._fanout(path, payload)
+        return _aggregate(path, [(sub, _outcome(future)) for sub, future, _ in deliveries])
+
+    async def publish(self, path, **payload):
+        results = []
+        async for sub, outcome in self.stream(path, ordered=True, **payload):
+            results.append((sub, outcome))
+        return _aggregate(path, results)
+
+    async def stream(self, path, ordered=False, **payload):
+        """Yield (subscription, Message | exception | None) per subscriber, as deliveries finish"""
+        loop = asyncio.get_running_loop()
+        if getattr(_delivering, "active", False):
+            deliveries = self._inline(path, payload)
+        else:
+            deliveries = self._fanout(path, payload, block=False)
+
+        # Subscribers whose queues were full are waited on off the loop, so the loop never blocks.
+        for sub, future, queued in deliveries:
+            if queued is False:
+                await loop.run_in_executor(None, self._enqueue, sub, path, payload, future)
+
+        async def _one(sub, future):
+            try:
+                return sub, await asyncio.wrap_future(future)
+            except BaseException as e:
+                return sub, e
+
+        tasks = [_one(sub, future) for sub, future, _ in deliveries]
+        if ordered:
+            for task in tasks:
+                yield await task
+        else:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+
+    def close(self, wait=True):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+def _outcome(future):
+    try:
+        return future.result()
+    except BaseException as e:
+        return e
+
+def _aggregate(path, results):
+    rows = []
+    failed = 0
+    for sub, outcome in results:
+        row = {"pattern": "/" + "/".join(sub.pattern)}
+        if outcome is None:
+            row["status"] = "dropped"
+        elif isinstance(outcome, BaseException):
+            row["status"] = "error"
+            row["error"] = repr(outcome)
+        else:
+            row["status"] = "success" if outcome.success else "failure"
+            row["code"] = outcome.code
+            row["data"] = outcome.data
+        if row["status"] != "success":
+            failed += 1
+        rows.append(row)
+
+    ok = failed == 0
+    return Message(
+        message=None if ok else f"{failed} of {len(rows)} subscribers did not succeed",
+        data={"path": path if isinstance(path, str) else "/" + "/".join(path), "subscribers": rows},
+        success=ok,
+        status="success" if ok else "failure",
+    )
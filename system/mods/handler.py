@@ -1,9 +1,15 @@
+import inspect
+from sys import intern
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from functools import wraps
-from typed import typed, name, Typed, Lazy, model, Tuple, Str, Any, Dict, Maybe, Int
+from typed import typed, name, Typed, Lazy, Any, Str, Dict, Maybe, Int
 from typed.meta import TYPED
 from typed.types import Callable
 from system.mods.message import Status, Data, Message, Propagate, propagate as _propagate, message as _message, _convert_message
-from system.mods.helper import _normalize_path, _InfoProxy
+from system.mods.tracing import child_span as _child_span, finish_span as _finish_span
+from system.mods.helper import _normalize_path, _InfoProxy, _tables, _locked, _batch_state, _note, _set_local, _on_publish, _index_path, _registry_changed, _run_awaitable
 
 class HANDLER(TYPED):
     def __instancecheck__(cls, instance):
@@ -58,6 +64,30 @@ class HANDLER(TYPED):
 class Handler(Typed, metaclass=HANDLER):
     pass
 
+def _arguments_check(func):
+    """A typed twin of func that checks its arguments and returns nothing"""
+    def twin(*args, **kwargs):
+        return None
+    twin.__name__ = func.__name__
+    twin.__signature__ = inspect.signature(func).replace(return_annotation=Any)
+    twin.__annotations__ = {**func.__annotations__, "return": Any}
+    return typed(twin)
+
+class _AsyncLazy(Lazy):
+    """
+    A coroutine handler: arguments are checked when it is called, and the
+    awaited result by the core, so cod stays the declared Message type
+    instead of being checked against the coroutine object.
+    """
+    def __call__(self, *args, **kwargs):
+        self.check_arguments(*args, **kwargs)
+        return self.func(*args, **kwargs)
+
+class _AsyncTyped(Typed):
+    __call__ = _AsyncLazy.__call__
+
+_ASYNC = {Lazy: _AsyncLazy, Typed: _AsyncTyped}
+
 class handler:
     propagate = _propagate
 
@@ -69,7 +99,15 @@ class handler:
         **kwargs:  Dict(Str),
     ) -> Maybe(Message):
         h = handler
-        res = h(**kwargs)
+        span = _child_span(getattr(h, "__name__", "handler"), func=h)
+        try:
+            res = h(**kwargs)
+            if inspect.isawaitable(res):
+                res = _run_awaitable(res, getattr(h, "__name__", "handler"))
+        except BaseException as e:
+            _finish_span(span, error=e)
+            raise
+        _finish_span(span, res)
 
         if propagate == "failure":
             _propagate.failure(res)
@@ -85,10 +123,33 @@ class handler:
         handler: Handler,
         callback:  Maybe(Callable) = None,
         propagate: Status="failure",
+        page_size: Maybe(Int) = None,
         **kwargs:  Dict(Str),
     ) -> Maybe(Data):
+        """
+        The data of the handler result, or what callback returns for it.
+        With page_size, a paginated handler is read page by page and callback
+        receives the items of each page as it arrives; see iter_data to
+        iterate over them instead.
+        """
+        if page_size is not None:
+            _check_pages(handler, page_size)
+            if callback is None:
+                raise TypeError("handler.data with page_size needs a callback; use handler.iter_data to iterate the pages")
+            for page in _pages(handler, propagate, dict(kwargs, page_size=page_size)):
+                callback(page)
+            return None
+
         h = handler
-        res = h(**kwargs)
+        span = _child_span(getattr(h, "__name__", "handler"), func=h)
+        try:
+            res = h(**kwargs)
+            if inspect.isawaitable(res):
+                res = _run_awaitable(res, getattr(h, "__name__", "handler"))
+        except BaseException as e:
+            _finish_span(span, error=e)
+            raise
+        _finish_span(span, res)
         if propagate == "failure":
             _propagate.failure(res)
         if propagate == "success":
@@ -98,6 +159,54 @@ class handler:
             return callback(res.data)
         return res.data
 
+    def iter_data(handler, page_size=None, propagate="failure", prefetch=True, **kwargs):
+        """
+        Yield the items of the handler data lazily:
+          - a paginated handler is called page by page (page_size items, 100 by
+            default), and while one page is consumed the next one is fetched in
+            the background (prefetch)
+          - any other handler is called once and its data iterated; it takes no page_size
+        List items are yielded as they are; Dict pages yield (key, value) pairs.
+        """
+        if getattr(handler, "is_paginated", False):
+            page_size = 100 if page_size is None else page_size
+            _check_pages(handler, page_size)
+            return _items(_pages(handler, propagate, dict(kwargs, page_size=page_size), prefetch))
+        if page_size is not None:
+            _check_pages(handler, page_size)
+        data = _whole(handler, propagate, kwargs)
+        return iter(data.items() if isinstance(data, dict) else data or ())
+
+    @staticmethod
+    def page(items, next=None, message=None, code=None):
+        """The result of one page of a paginated handler: next is the cursor of the following page, or None"""
+        return Message(
+            message=message,
+            data={"items": items, "next": next},
+            status="success",
+            success=True,
+            code=code
+        )
+
+    async def acall(handler, callback=None, propagate="failure", **kwargs):
+        """Awaitable handler.call: async handlers are awaited, so nested calls can be gathered"""
+        res = await _acall(handler, propagate, kwargs)
+        if callback:
+            res = callback(res)
+            if inspect.isawaitable(res):
+                res = await res
+        return res
+
+    async def adata(handler, callback=None, propagate="failure", **kwargs):
+        """Awaitable handler.data"""
+        res = await _acall(handler, propagate, kwargs)
+        if callback:
+            res = callback(res.data)
+            if inspect.isawaitable(res):
+                res = await res
+            return res
+        return res.data
+
     @typed
     def success(
         message: Maybe(Str) = None,
@@ -131,27 +240,60 @@ class handler:
     def __new__(cls, f=None, **kwargs):
         Error = kwargs.pop("enclose", None)
         error_message = kwargs.pop("message", None)
+        paginated = kwargs.pop("paginated", False)
 
         def _decorate(func):
-            @wraps(func)
-            def core(*args, **kw):
-                try:
+            is_async = inspect.iscoroutinefunction(func)
+            if paginated and "cursor" not in inspect.signature(func).parameters:
+                raise TypeError(f"Paginated handler '{func.__name__}' must take a cursor parameter")
+
+            if is_async:
+                # The codomain is checked on the awaited value, not on the coroutine.
+                @wraps(func)
+                async def core(*args, **kw):
+                    codomain = getattr(typed_f, "cod", Message)
                     try:
-                        return func(*args, **kw)
-                    except Propagate as exc:
-                        msg = exc.msg
-                        codomain = getattr(typed_f, "cod", Message)
-                        msg = _convert_message(msg, codomain)
-                        return msg
-                except BaseException as e:
-                    if Error is not None and not isinstance(e, Propagate):
-                        msg = error_message if error_message is not None else str(e)
-                        raise Error(msg) from e
-                    raise
+                        try:
+                            result = await func(*args, **kw)
+                        except Propagate as exc:
+                            return _convert_message(exc.msg, codomain)
+                    except BaseException as e:
+                        if Error is not None and not isinstance(e, Propagate):
+                            msg = error_message if error_message is not None else str(e)
+                            raise Error(msg) from e
+                        raise
+                    if not isinstance(result, codomain):
+                        raise TypeError(
+                            f"Handler '{func.__name__}' returned {type(result)!r}, "
+                            f"expected an instance of '{name(codomain)}'"
+                        )
+                    return result
+            else:
+                @wraps(func)
+                def core(*args, **kw):
+                    try:
+                        try:
+                            return func(*args, **kw)
+                        except Propagate as exc:
+                            msg = exc.msg
+                            codomain = getattr(typed_f, "cod", Message)
+                            msg = _convert_message(msg, codomain)
+                            return msg
+                    except BaseException as e:
+                        if Error is not None and not isinstance(e, Propagate):
+                            msg = error_message if error_message is not None else str(e)
+                            raise Error(msg) from e
+                        raise
 
             core.__annotations__ = getattr(func, "__annotations__", {}).copy()
 
             typed_f = typed(core, **kwargs)
+            if is_async:
+                async_cls = _ASYNC.get(type(typed_f))
+                if async_cls is None:
+                    raise TypeError(f"Handler '{func.__name__}': coroutine handlers do not support {kwargs!r}")
+                typed_f.__class__ = async_cls
+                typed_f.check_arguments = _arguments_check(core)
 
             if not hasattr(typed_f, "cod") or not (typed_f.cod <= Message):
                 raise TypeError(
@@ -163,6 +305,8 @@ class handler:
 
             typed_f.is_propagator = True
             typed_f.is_handler = True
+            typed_f.is_async = is_async
+            typed_f.is_paginated = paginated
             return typed_f
 
         if f is not None and callable(f):
@@ -170,18 +314,120 @@ class handler:
 
         _decorate.call = cls.call
         _decorate.data = cls.data
+        _decorate.acall = cls.acall
+        _decorate.adata = cls.adata
+        _decorate.iter_data = cls.iter_data
+        _decorate.page = cls.page
         _decorate.success = cls.success
         _decorate.failure = cls.failure
         _decorate.propagate = cls.propagate
         return _decorate
 
-@model
+async def _acall(h, propagate, kwargs):
+    if not isinstance(h, Handler):
+        raise TypeError(f"handler must be a Handler, got {type(h)!r}")
+    if propagate not in ("success", "failure"):
+        raise TypeError(f"propagate must be 'success' or 'failure', got {propagate!r}")
+
+    span = _child_span(getattr(h, "__name__", "handler"), func=h)
+    try:
+        res = h(**kwargs)
+        if inspect.isawaitable(res):
+            res = await res
+    except BaseException as e:
+        _finish_span(span, error=e)
+        raise
+    _finish_span(span, res)
+
+    if propagate == "failure":
+        _propagate.failure(res)
+    if propagate == "success":
+        _propagate.success(res)
+    return res
+
+def _pages(h, propagate, kwargs, prefetch=True):
+    """
+    Items of each page of a paginated handler. The handler takes a cursor
+    (None for the first page) and returns handler.page(items, next).
+    """
+    kwargs = dict(kwargs, cursor=kwargs.get("cursor"))
+    fetch = lambda cursor: handler.call(h, propagate=propagate, **dict(kwargs, cursor=cursor)).data
+    if not prefetch:
+        cursor = kwargs["cursor"]
+        while True:
+            data = fetch(cursor)
+            yield data["items"]
+            cursor = data.get("next")
+            if cursor is None:
+                return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+    try:
+        data = fetch(kwargs["cursor"])
+        while True:
+            cursor = data.get("next")
+            pending = None if cursor is None else executor.submit(copy_context().run, fetch, cursor)
+            yield data["items"]
+            if pending is None:
+                return
+            data = pending.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _check_pages(h, page_size):
+    if not getattr(h, "is_paginated", False):
+        raise TypeError(
+            f"Handler '{getattr(h, '__name__', 'handler')}' is not paginated; "
+            "declare it with paginated=True to read it by page_size"
+        )
+    if page_size < 1:
+        raise ValueError(f"page_size must be positive, got {page_size!r}")
+
+def _whole(h, propagate, kwargs):
+    return handler.data(h, None, propagate, **kwargs)
+
+def _items(pages):
+    for page in pages:
+        if isinstance(page, dict):
+            yield from page.items()
+        else:
+            yield from page
+
+_META_CACHE = {}
+_META_CACHE_SIZE = 4096
+
+def _freeze_meta(meta):
+    """Return a read-only meta mapping, shared between handlers with equal meta"""
+    if isinstance(meta, MappingProxyType):
+        return meta
+    meta = dict(meta or {})
+    try:
+        # Typed key: 1, 1.0 and True are equal but must not share a mapping.
+        key = tuple((k, type(v), v) for k, v in sorted(meta.items()))
+        frozen = _META_CACHE.get(key)
+    except TypeError:
+        return MappingProxyType(meta)
+
+    if frozen is None:
+        frozen = MappingProxyType(meta)
+        if len(_META_CACHE) < _META_CACHE_SIZE:
+            _META_CACHE[key] = frozen
+    return frozen
+
 class HandlerInfo:
-    path: Tuple(Str)
-    name: Str
-    func: Handler
-    owner: Any
-    meta: Dict
+    __slots__ = ("path", "name", "func", "owner", "meta")
+
+    def __init__(self, path, name, func, owner, meta=None):
+        if not isinstance(func, Handler):
+            raise TypeError(f"HandlerInfo.func must be a Handler, got {type(func)!r}")
+        self.path = tuple(map(intern, path))
+        self.name = name
+        self.func = func
+        self.owner = owner
+        self.meta = _freeze_meta(meta)
+
+    def __repr__(self):
+        return f"HandlerInfo(path={self.path!r}, name={self.name!r}, func={self.func!r}, meta={dict(self.meta)!r})"
 
 
 def register_handler(system, path, name, func, owner, meta=None):
@@ -194,18 +440,35 @@ def register_handler(system, path, name, func, owner, meta=None):
         name=name,
         func=func,
         owner=owner,
-        meta=dict(meta or {}),
+        meta=meta,
     )
-    system._handlers[path] = info
+    path = info.path
+    # Outside a batch the live table is written in place under the writer lock,
+    # so registering n handlers one by one stays linear.
+    with _locked(system):
+        handlers, _ = _tables(system)
+        if _batch_state(system) is None and path not in handlers:
+            index = getattr(system, "__dict__", {}).get("_prefix_index")
+            if index is not None:
+                _index_path(index, path)
+        handlers[path] = info
+        _note(system, path)
+        _registry_changed(system)
+        if getattr(system, "_middleware", None):
+            # Compiled here rather than on the first call, so dispatch never pays for it.
+            system._compile(info)
 
     if path and len(path) == 1:
         head = path[0]
 
-        if hasattr(system, "get"):
-            setattr(system.get, head, func)
+        def _bind():
+            if hasattr(system, "get"):
+                setattr(system.get, head, func)
+
+            if hasattr(system, "info"):
+                setattr(system.info, head, _InfoProxy(system, (head,)))
 
-        if hasattr(system, "info"):
-            setattr(system.info, head, _InfoProxy(system, (head,)))
+        _on_publish(system, _bind)
 
     return info
 
@@ -222,9 +485,9 @@ def handler_method(self, path: str, name=None, **meta):
                 name=h_name,
                 func=h,
                 owner=self,
-                meta=dict(meta),
+                meta=meta,
             )
-            self._local_handlers[rel_path] = entry
+            _set_local(self, rel_path, entry)
 
             if not hasattr(self, h_name):
                 setattr(self, h_name, h)
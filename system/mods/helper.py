@@ -1,5 +1,35 @@
 import inspect
 import asyncio
+from contextvars import ContextVar
+from contextlib import nullcontext
+from system.mods.tree import walk
+
+_LOOKUP_CACHE_SIZE = 4096
+
+# True while System.call runs the synchronous part of a dispatch on the event
+# loop, so middleware that must wait can return an awaitable instead of blocking.
+_awaiting = ContextVar("system_awaiting", default=False)
+
+def _loop_running():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+async def _awaited(result):
+    return await result
+
+def _run_awaitable(result, what="handler"):
+    """Drive an awaitable to completion from synchronous code"""
+    if _loop_running():
+        if inspect.iscoroutine(result):
+            result.close()
+        raise RuntimeError(
+            f"{what} returned an awaitable inside a running event loop; "
+            "use the async API (await system.call(...), handler.acall(...)) instead"
+        )
+    return asyncio.run(_awaited(result))
 
 def _normalize_path(path):
     if path is None:
@@ -17,6 +47,234 @@ def _normalize_path(path):
         out.extend(s.split("/"))
     return tuple(out)
 
+def _tables(system):
+    staged = getattr(system, "_staged", None)
+    if staged is not None:
+        return staged
+    return system._handlers, getattr(system, "_components_by_prefix", None)
+
+def _writing(owner):
+    """
+    Registry write scope: for a System, a batch published in place (cost
+    proportional to the change, not the registry), or nothing for
+    component-like owners
+    """
+    if "_registry_lock" in getattr(owner, "__dict__", {}):
+        return owner._batch(snapshot=False)
+    return nullcontext()
+
+def _locked(owner):
+    """The writer lock of a System, or nothing for component-like owners"""
+    lock = getattr(owner, "__dict__", {}).get("_registry_lock")
+    return lock if lock is not None else nullcontext()
+
+_MISSING = object()
+_DELETED = object()
+
+class _Staged:
+    """
+    The writes of a batch to one registry table, over the live table: reads
+    see the writes, the live table is left untouched until publish
+    """
+    __slots__ = ("base", "changes")
+
+    def __init__(self, base):
+        self.base = base
+        self.changes = {}
+
+    def get(self, key, default=None):
+        value = self.changes.get(key, _MISSING)
+        if value is _MISSING:
+            return self.base.get(key, default)
+        return default if value is _DELETED else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value):
+        self.changes[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.changes[key] = _DELETED
+
+    def diff(self):
+        """(keys added, keys removed, {key: value} to set, keys to delete) against the live table"""
+        added, removed, sets, deletes = [], [], {}, []
+        for key, value in self.changes.items():
+            present = key in self.base
+            if value is _DELETED:
+                if present:
+                    removed.append(key)
+                    deletes.append(key)
+            else:
+                if not present:
+                    added.append(key)
+                sets[key] = value
+        return added, removed, sets, deletes
+
+def _batch_state(scope):
+    """The open batch of scope, as (journal, staged children, deferred, changed paths), or None"""
+    return getattr(scope, "__dict__", {}).get("_open")
+
+def _assign(scope, obj, name, value):
+    """Set obj.name; inside an open batch of scope the old value is journaled and restored if the batch fails"""
+    state = _batch_state(scope)
+    if state is not None:
+        state[0].append((obj, name, obj.__dict__.get(name, _MISSING)))
+    setattr(obj, name, value)
+
+def _children(scope, obj):
+    """obj._components as staged by an open batch of scope"""
+    state = _batch_state(scope)
+    if state is not None:
+        staged = state[1].get(id(obj))
+        if staged is not None:
+            return staged[1]
+    return obj._components
+
+def _set_children(scope, obj, components):
+    """Replace obj._components, on publish when scope has an open batch"""
+    state = _batch_state(scope)
+    if state is not None:
+        state[1][id(obj)] = (obj, components)
+    else:
+        obj._components = components
+
+def _on_publish(scope, fn):
+    """Run fn when the open batch of scope publishes, or now without one"""
+    state = _batch_state(scope)
+    if state is not None:
+        state[2].append(fn)
+    else:
+        fn()
+
+def _rollback(journal):
+    touched = {}
+    for obj, name, value in reversed(journal):
+        if value is _MISSING:
+            obj.__dict__.pop(name, None)
+        else:
+            setattr(obj, name, value)
+        touched[id(obj)] = obj
+    for obj in touched.values():
+        if "_local_handlers" in obj.__dict__:
+            _registry_changed(obj)
+
+_LOG_SIZE = 4096
+
+def _log(system, paths):
+    """Append changed registry paths to the change log read by walk() and export_tree()"""
+    changes = system.__dict__.get("_changes")
+    if changes is None or not paths:
+        return
+    start, log = changes
+    if len(log) >= _LOG_SIZE:
+        # Readers further behind than the new start rebuild from the tables.
+        system._changes = (start + len(log), list(paths))
+    else:
+        log.extend(paths)
+
+def _note(system, path):
+    """Record a changed registry path: staged with the open batch, or logged now"""
+    state = _batch_state(system)
+    if state is not None:
+        state[3].append(path)
+    else:
+        _log(system, (path,))
+
+def _set_local(owner, rel_path, entry):
+    # Inside a batch the dict is replaced, so a failed batch can restore the old one.
+    system = getattr(owner, "system", None)
+    if system is None or _batch_state(system) is None:
+        owner._local_handlers[rel_path] = entry
+    else:
+        _assign(system, owner, "_local_handlers", {**owner._local_handlers, rel_path: entry})
+    _registry_changed(owner)
+
+def _registry_changed(system):
+    system._generation = getattr(system, "_generation", 0) + 1
+    if "_lookup_cache" in system.__dict__:
+        system._lookup_cache = {}
+
+    proxies = system.__dict__.get("_proxies")
+    if proxies:
+        system._proxies = {}
+        for path, proxy in proxies.items():
+            if len(path) == 1 and system.__dict__.get(path[0]) is proxy:
+                del system.__dict__[path[0]]
+
+def _resolve(owner, path):
+    if hasattr(owner, "_handlers") and hasattr(owner, "_components_by_prefix"):
+        return owner._handlers.get(path), owner._components_by_prefix.get(path)
+    return owner._local_handlers.get(path), None
+
+def _lookup(owner, path):
+    """Resolve a raw path to (HandlerInfo, component), skipping normalization on repeats"""
+    cache = owner._lookup_cache
+    try:
+        return cache[path]
+    except KeyError:
+        pass
+    except TypeError:
+        return _resolve(owner, _normalize_path(path))
+
+    entry = _resolve(owner, _normalize_path(path))
+    if entry[0] is None and entry[1] is None:
+        return entry
+
+    if len(cache) >= _LOOKUP_CACHE_SIZE:
+        try:
+            del cache[next(iter(cache))]
+        except (KeyError, StopIteration, RuntimeError):
+            pass
+    cache[path] = entry
+    return entry
+
+def _prefixes(system):
+    """Every prefix of a handler path, mapped to how many handler paths start with it"""
+    index = system._prefix_index
+    if index is None:
+        generation = system._generation
+        index = {}
+        for path in system._handlers.copy():
+            _index_path(index, path)
+        if system._generation == generation:
+            system._prefix_index = index
+    return index
+
+def _index_path(index, path):
+    for i in range(1, len(path) + 1):
+        prefix = path[:i]
+        index[prefix] = index.get(prefix, 0) + 1
+
+def _unindex_path(index, path):
+    for i in range(1, len(path) + 1):
+        prefix = path[:i]
+        n = index.get(prefix, 0) - 1
+        if n > 0:
+            index[prefix] = n
+        else:
+            index.pop(prefix, None)
+
+def _proxy(system, path):
+    proxy = system._proxies.get(path)
+    if proxy is None:
+        if path not in _prefixes(system):
+            raise AttributeError(
+                f"No handler path starting with {path!r} in system '{system.name}'"
+            )
+        proxy = _PathProxy(system, path)
+        system._proxies[path] = proxy
+    return proxy
+
 def _is_direct_child(prefix, path):
     prefix = tuple(prefix)
     path = tuple(path)
@@ -73,26 +331,25 @@ def _get_entity(owner, path):
 
 
 def _list_entities(owner, prefix, kind=None):
+    """
+    The direct children of prefix. A System reads them from its sorted path
+    index (see walk), so they come in path order, handlers before components;
+    a component lists its own in registration order.
+    """
     prefix = tuple(prefix)
     kind = (kind or "both").lower()
     results = []
 
     if hasattr(owner, "_handlers") and hasattr(owner, "_components_by_prefix"):
         if kind in ("handler", "both"):
-            for info in owner._handlers.values():
-                if _is_direct_child(prefix, info.path):
-                    results.append(info)
-
+            results.extend(walk(owner, prefix, "handler", 1))
         if kind in ("component", "both"):
-            for cp, comp in owner._components_by_prefix.items():
-                if _is_direct_child(prefix, cp):
-                    results.append(comp)
-
+            results.extend(walk(owner, prefix, "component", 1))
         return results
 
     if hasattr(owner, "_local_handlers") and hasattr(owner, "_components"):
         if kind in ("handler", "both"):
-            for rel_path, info in owner._local_handlers.items():
+            for rel_path, info in owner._local_handlers.copy().items():
                 if _is_direct_child(prefix, rel_path):
                     results.append(info)
 
@@ -106,6 +363,15 @@ def _list_entities(owner, prefix, kind=None):
     raise TypeError("owner must be a System or Component-like object.")
 
 
+def _breakers(system, path):
+    """State of the circuit breakers covering any handler under path"""
+    n = len(path)
+    return {
+        breaker.name: breaker.to_dict()
+        for prefix, breaker in getattr(system, "_breakers", ())
+        if prefix[:n] == path or path[:len(prefix)] == prefix
+    }
+
 def _info_entity(owner, path):
     path = tuple(path)
 
@@ -115,14 +381,36 @@ def _info_entity(owner, path):
             return info
 
         comp = owner._components_by_prefix.get(path)
+        metrics = getattr(owner, "_metrics", None)
         if comp is not None:
-            return {
+            entry = {
                 "type": "component",
                 "name": getattr(comp, "name", ""),
                 "prefix": getattr(comp, "prefix", ()),
                 "desc": getattr(comp, "desc", ""),
                 "component": comp,
             }
+            if metrics is not None:
+                entry["metrics"] = metrics(path)
+            breakers = _breakers(owner, path)
+            if breakers:
+                entry["breakers"] = breakers
+            return entry
+
+        if not path:
+            entry = {
+                "type": "system",
+                "name": getattr(owner, "name", ""),
+                "desc": getattr(owner, "desc", ""),
+                "handlers": len(owner._handlers),
+                "components": len(owner._components_by_prefix),
+            }
+            if metrics is not None:
+                entry["metrics"] = metrics()
+            breakers = _breakers(owner, path)
+            if breakers:
+                entry["breakers"] = breakers
+            return entry
 
         raise KeyError(
             f"No handler or component at path {path!r} in system '{getattr(owner, 'name', 'system')}'"
@@ -167,31 +455,33 @@ class _PathProxy:
     def __init__(self, system, path):
         self._system = system
         self._path = path
+        self._info = None
+        self._generation = None
 
     def __getattr__(self, item: str):
         if item.startswith("_"):
             raise AttributeError(item)
-        new_path = self._path + (item,)
 
-        if not any(h.path[:len(new_path)] == new_path for h in self._system._handlers.values()):
-            raise AttributeError(
-                f"No handler path starting with {new_path!r} in system '{self._system.name}'"
-            )
-
-        return _PathProxy(self._system, new_path)
+        child = _proxy(self._system, self._path + (item,))
+        self.__dict__[item] = child
+        return child
 
     def __call__(self, *args, **kwargs):
-        coro_or_msg = self._system.call(self._path, *args, **kwargs)
-
-        if inspect.isawaitable(coro_or_msg):
-            try:
-                asyncio.get_running_loop()
-            except RuntimeError:
-                return asyncio.run(coro_or_msg)
-            else:
-                return coro_or_msg
-
-        return coro_or_msg
+        system = self._system
+        if _loop_running():
+            return system.call(self._path, *args, **kwargs)
+
+        # Read the generation first: a registry change racing with the lookup
+        # then leaves a stale generation behind, never a stale entry.
+        generation = system._generation
+        if self._generation != generation:
+            self._info = system._handlers.get(self._path)
+            self._generation = generation
+
+        info = self._info
+        if info is None:
+            raise KeyError(f"No handler registered at path {self._path!r}")
+        return system._call_sync(info, self._path, args, kwargs)
 
 class _ListProxy:
     def __init__(self, owner, base_path=()):
@@ -0,0 +1,251 @@
+import time
+import asyncio
+import marshal
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from system.mods.message import Message
+from system.mods.lazy import LazyBytes, LazyList
+from system.mods.helper import _awaiting
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key     TEXT PRIMARY KEY,
+    expires REAL NOT NULL,
+    value   BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+def _encode(msg):
+    data = msg.data
+    if isinstance(data, (LazyBytes, LazyList)):
+        data = data.materialize()
+    return marshal.dumps((msg.status, msg.success, msg.code, msg.message, data))
+
+def _decode(blob, model=Message):
+    status, success, code, message, data = marshal.loads(blob)
+    return model(status=status, success=success, code=code, message=message, data=data)
+
+class IdempotencyStore:
+    """
+    Results of calls that carried an idempotency key:
+      - kept in a bounded in-memory LRU for ttl seconds
+      - with file, also in SQLite as compact marshal-encoded rows, so they
+        survive restarts and are shared between processes on the same host
+      - begin() makes the first caller the owner of a key; later callers get
+        the stored Message, or the Future of the call still running
+    """
+    def __init__(self, ttl=86400.0, maxsize=10000, file=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.file = file
+        self.hits = 0
+        self.waits = 0
+        self.misses = 0
+        self.unstored = 0
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conns = {}
+        self._conns_lock = threading.Lock()
+        self._closed = False
+        if file is not None:
+            self._db().executescript(_SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            if self._closed:
+                raise RuntimeError("idempotency store is closed")
+            # Not bound to the thread, so close() can close it from another one.
+            db = sqlite3.connect(self.file, timeout=30, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+            with self._conns_lock:
+                # Connections of threads that have exited are closed here.
+                for thread in [t for t in self._conns if not t.is_alive()]:
+                    self._conns.pop(thread).close()
+                self._conns[threading.current_thread()] = db
+        return db
+
+    def close(self):
+        """Close every SQLite connection; results kept in memory stay readable"""
+        with self._conns_lock:
+            self._closed = True
+            conns, self._conns = self._conns, {}
+        for db in conns.values():
+            db.close()
+
+    def get(self, key, model=Message):
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires, msg = entry
+            if expires > now:
+                self._memory.move_to_end(key)
+                return msg
+            del self._memory[key]
+
+        if self.file is not None:
+            row = self._db().execute(
+                "SELECT expires, value FROM results WHERE key = ?", (key,),
+            ).fetchone()
+            if row is not None and row[0] > now:
+                msg = _decode(row[1], model)
+                self._remember(key, row[0], msg)
+                return msg
+        return None
+
+    def _remember(self, key, expires, msg):
+        self._memory[key] = (expires, msg)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def put(self, key, msg):
+        expires = time.time() + self.ttl
+        self._remember(key, expires, msg)
+        if self.file is not None:
+            self._db().execute(
+                "INSERT OR REPLACE INTO results (key, expires, value) VALUES (?, ?, ?)",
+                (key, expires, _encode(msg)),
+            )
+
+    def begin(self, key, model=Message):
+        """(stored Message, None) | (None, Future of the running call) | (None, None) if the caller owns the key"""
+        with self._lock:
+            msg = self.get(key, model)
+            if msg is not None:
+                self.hits += 1
+                return msg, None
+            future = self._inflight.get(key)
+            if future is not None:
+                self.waits += 1
+                return None, future
+            self.misses += 1
+            self._inflight[key] = Future()
+            return None, None
+
+    def finish(self, key, result=None, error=None):
+        """Store the owner's result and hand it (or its error) to the callers waiting on key"""
+        future = None
+        try:
+            with self._lock:
+                future = self._inflight.pop(key)
+                if error is None:
+                    try:
+                        self.put(key, result)
+                    except Exception:
+                        # Not storable (marshal cannot encode the data, the file is locked):
+                        # the call still succeeded, its result is just not cached.
+                        self._memory.pop(key, None)
+                        self.unstored += 1
+        finally:
+            if future is not None:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def purge(self):
+        """Drop expired results; returns how many were removed from memory"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires, _) in self._memory.items() if expires <= now]
+            for key in expired:
+                del self._memory[key]
+            if self.file is not None:
+                self._db().execute("DELETE FROM results WHERE expires <= ?", (now,))
+        return len(expired)
+
+    def stats(self):
+        return {
+            "entries": len(self._memory),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "waits": self.waits,
+            "misses": self.misses,
+            "unstored": self.unstored,
+        }
+
+class Idempotency:
+    """
+    Around middleware: calls carrying the key argument run once per (path, key);
+    the argument itself is not passed to the handler. Failure Messages are stored
+    like successes; calls that raise are not, and a waiting duplicate then runs itself.
+    """
+    def __init__(self, store, param="idempotency_key"):
+        self.store = store
+        self.param = param
+
+    def around(self, info, call, args, kwargs):
+        key = kwargs.get(self.param)
+        if key is None:
+            return call(*args, **kwargs)
+        kwargs = {k: v for k, v in kwargs.items() if k != self.param}
+        key = "/" + "/".join(info.path) + "\0" + str(key)
+        model = getattr(info.func, "cod", Message)
+        if getattr(info.func, "is_async", False):
+            return self._async(key, model, call, args, kwargs)
+
+        store = self.store
+        while True:
+            msg, future = store.begin(key, model)
+            if msg is not None:
+                return msg
+            if future is None:
+                break
+            if _awaiting.get():
+                # Reached from await system.call: wait without blocking the loop.
+                return self._await(key, model, future, call, args, kwargs)
+            try:
+                return future.result()
+            except Exception:
+                continue
+        return self._run(key, call, args, kwargs)
+
+    async def _await(self, key, model, future, call, args, kwargs):
+        store = self.store
+        while True:
+            try:
+                return await asyncio.wrap_future(future)
+            except Exception:
+                pass
+            msg, future = store.begin(key, model)
+            if msg is not None:
+                return msg
+            if future is None:
+                return self._run(key, call, args, kwargs)
+
+    def _run(self, key, call, args, kwargs):
+        store = self.store
+        try:
+            result = call(*args, **kwargs)
+        except BaseException as e:
+            store.finish(key, error=e)
+            raise
+        store.finish(key, result)
+        return result
+
+    async def _async(self, key, model, call, args, kwargs):
+        store = self.store
+        while True:
+            msg, future = store.begin(key, model)
+            if msg is not None:
+                return msg
+            if future is None:
+                break
+            try:
+                return await asyncio.wrap_future(future)
+            except Exception:
+                continue
+
+        try:
+            result = await call(*args, **kwargs)
+        except BaseException as e:
+            store.finish(key, error=e)
+            raise
+        store.finish(key, result)
+        return result
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from system.mods.helper import _normalize_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    path         TEXT    NOT NULL,
+    kwargs       TEXT    NOT NULL,
+    state        TEXT    NOT NULL DEFAULT 'ready',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    available_at REAL    NOT NULL,
+    created_at   REAL    NOT NULL,
+    last_error   TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at);
+"""
+
+def _failed(msg):
+    success = msg.success
+    if success is None and msg.status is not None:
+        success = msg.status == "success"
+    return success is False
+
+class JobQueue:
+    """
+    Durable queue of deferred handler calls in a local SQLite file:
+      - enqueue() writes the call (path + JSON kwargs) and returns its id
+      - workers claim up to batch jobs at a time; a claimed job stays invisible
+        for visibility seconds, so jobs of a crashed worker are delivered again
+      - a job that raises or returns a failure Message is retried with
+        exponential backoff, and after max_attempts it is dead-lettered
+    Jobs are removed once their handler succeeds. Without a file (or with
+    ':memory:') the queue lives in a private temporary database that close()
+    removes, so it does not outlive the process.
+    """
+    def __init__(self, system, file=None, concurrency=4, batch=16, visibility=30.0,
+                 max_attempts=5, backoff=1.0, poll=0.5):
+        self.system = system
+        self._tmp = None
+        if file is None or file == ":memory:":
+            # Workers need their own connections, which a :memory: database cannot share.
+            self._tmp = tempfile.TemporaryDirectory(prefix=f"{getattr(system, 'name', 'system')}-jobs-")
+            file = os.path.join(self._tmp.name, "jobs.sqlite3")
+        self.file = file
+        self.concurrency = concurrency
+        self.batch = batch
+        self.visibility = visibility
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll = poll
+        self.processed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = {}
+        self._closed = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            if self._closed:
+                raise RuntimeError("job queue is closed")
+            # Not bound to the thread, so close() can close it from another one.
+            db = sqlite3.connect(self.file, timeout=30, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            if not getattr(self._local, "worker", False):
+                with self._lock:
+                    # Connections of threads that have exited are closed here.
+                    for thread in [t for t in self._conns if not t.is_alive()]:
+                        self._conns.pop(thread).close()
+                    self._conns[threading.current_thread()] = db
+        return db
+
+    def _db(self):
+        return _Transaction(self._conn())
+
+    # Producing
+
+    def enqueue(self, path, *, _delay=0.0, **kwargs):
+        """Enqueue path(**kwargs), runnable after _delay seconds; returns the job id"""
+        return self.enqueue_many([(path, kwargs)], _delay)[0]
+
+    def enqueue_many(self, calls, delay=0.0):
+        """Enqueue [(path, kwargs), ...] in one transaction; returns the job ids"""
+        now = time.time()
+        rows = [
+            ("/" + "/".join(_normalize_path(path)), json.dumps(kwargs or {}), now + delay, now)
+            for path, kwargs in calls
+        ]
+        ids = []
+        with self._db() as db:
+            for row in rows:
+                cur = db.execute(
+                    "INSERT INTO jobs (path, kwargs, available_at, created_at) VALUES (?, ?, ?, ?)", row,
+                )
+                ids.append(cur.lastrowid)
+        self._wake.set()
+        return ids
+
+    # Consuming
+
+    def claim(self, limit=None):
+        """Claim up to limit ready jobs: [(id, path, kwargs, attempts)]"""
+        now = time.time()
+        with self._db() as db:
+            rows = db.execute(
+                "SELECT id, path, kwargs, attempts FROM jobs "
+                "WHERE state = 'ready' AND available_at <= ? ORDER BY id LIMIT ?",
+                (now, limit or self.batch),
+            ).fetchall()
+            if rows:
+                db.executemany(
+                    "UPDATE jobs SET attempts = attempts + 1, available_at = ? WHERE id = ?",
+                    [(now + self.visibility, row[0]) for row in rows],
+                )
+        return [(id_, path, json.loads(kwargs), attempts + 1) for id_, path, kwargs, attempts in rows]
+
+    def _settle(self, done, retry, dead):
+        now = time.time()
+        with self._db() as db:
+            if done:
+                db.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in done])
+            if retry:
+                db.executemany(
+                    "UPDATE jobs SET available_at = ?, last_error = ? WHERE id = ?",
+                    [(now + self.backoff * 2 ** (attempts - 1), error, i) for i, attempts, error in retry],
+                )
+            if dead:
+                db.executemany(
+                    "UPDATE jobs SET state = 'dead', last_error = ? WHERE id = ?",
+                    [(error, i) for i, error in dead],
+                )
+        self.processed += len(done)
+        self.retried += len(retry)
+        self.dead_lettered += len(dead)
+
+    def process(self, jobs):
+        done, retry, dead = [], [], []
+        for id_, path, kwargs, attempts in jobs:
+            try:
+                msg = self.system.call_sync(path, **kwargs)
+                error = json.dumps({"message": msg.message, "code": msg.code, "data": msg.data}, default=str) \
+                    if _failed(msg) else None
+            except Exception as e:
+                error = repr(e)
+
+            if error is None:
+                done.append(id_)
+            elif attempts >= self.max_attempts:
+                dead.append((id_, error))
+            else:
+                retry.append((id_, attempts, error))
+        self._settle(done, retry, dead)
+        return len(jobs)
+
+    def drain(self):
+        """Process jobs on the calling thread until none are ready; returns how many ran"""
+        total = 0
+        while True:
+            jobs = self.claim()
+            if not jobs:
+                return total
+            total += self.process(jobs)
+
+    def _work(self):
+        # A worker owns its connection and closes it when it exits.
+        self._local.worker = True
+        try:
+            while not self._stop.is_set():
+                jobs = self.claim()
+                if jobs:
+                    self.process(jobs)
+                    continue
+                self._wake.wait(self.poll)
+                self._wake.clear()
+        finally:
+            db = getattr(self._local, "db", None)
+            if db is not None:
+                db.close()
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return self
+            if self._closed:
+                raise RuntimeError("job queue is closed")
+            self._stop.clear()
+            self._workers = [
+                threading.Thread(target=self._work, name=f"jobs-{i}", daemon=True)
+                for i in range(self.concurrency)
+            ]
+            for worker in self._workers:
+                worker.start()
+        return self
+
+    def stop(self, wait=True):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        self._stop.set()
+        self._wake.set()
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def close(self, wait=True):
+        """Stop the workers and close every connection; a temporary database is removed"""
+        with self._lock:
+            self._closed = True
+        self.stop(wait)
+        with self._lock:
+            conns, self._conns = self._conns, {}
+        for db in conns.values():
+            db.close()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    # Inspection
+
+    def stats(self):
+        with self._db() as db:
+            counts = dict(db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            delayed = db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'ready' AND available_at > ?", (time.time(),),
+            ).fetchone()[0]
+        return {
+            "ready": counts.get("ready", 0) - delayed,
+            "delayed": delayed,
+            "dead": counts.get("dead", 0),
+            "processed": self.processed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "workers": len(self._workers),
+        }
+
+    def dead(self, limit=100):
+        with self._db() as db:
+            rows = db.execute(
+                "SELECT id, path, kwargs, attempts, last_error FROM jobs WHERE state = 'dead' ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"id": i, "path": p, "kwargs": json.loads(k), "attempts": a, "error": e}
+            for i, p, k, a, e in rows
+        ]
+
+    def requeue(self, *ids):
+        """Move dead-lettered jobs back to the queue with a fresh attempt count"""
+        with self._db() as db:
+            db.executemany(
+                "UPDATE jobs SET state = 'ready', attempts = 0, available_at = ? WHERE id = ? AND state = 'dead'",
+                [(time.time(), i) for i in ids],
+            )
+        self._wake.set()
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT around a block, on a connection in autocommit mode"""
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
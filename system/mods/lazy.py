@@ -0,0 +1,274 @@
+import os
+import mmap
+import threading
+
+def _plain(value):
+    return value.materialize() if isinstance(value, (LazyBytes, LazyList)) else value
+
+def _delegate(cls, base, names):
+    """Give cls every method in names, applied to the materialized value"""
+    for name in names:
+        def _method(name=name):
+            method = getattr(base, name)
+            def wrapper(self, *args, **kwargs):
+                return method(self.materialize(), *map(_plain, args), **kwargs)
+            wrapper.__name__ = name
+            wrapper.__doc__ = method.__doc__
+            return wrapper
+        setattr(cls, name, _method())
+
+class LazyBytes:
+    """
+    A bytes payload that is not read until a consumer needs it:
+      - source is a file (mapped with mmap on first access) or a loader callable
+      - len(), slicing, iteration and stream() read only what they touch
+      - every other bytes method, operator and comparison works on the full
+        content, read on first use; bytes(x) / x.materialize() return it
+    It is not a bytes instance, so it holds no hidden empty buffer: APIs that
+    need a real buffer (file.write, b"".join, hashing) raise TypeError on it
+    before Python 3.12, and map the file through __buffer__ from 3.12 on.
+    """
+    __slots__ = ("_path", "_offset", "_length", "_loader", "_view", "_lock")
+
+    def __init__(self, path=None, offset=0, length=None, loader=None):
+        if (path is None) == (loader is None):
+            raise TypeError("LazyBytes needs exactly one of path or loader")
+        self._path = os.fspath(path) if path is not None else None
+        self._offset = offset
+        self._length = length
+        self._loader = loader
+        self._view = None
+        self._lock = threading.Lock()
+
+    def _source(self):
+        view = self._view
+        if view is None:
+            with self._lock:
+                view = self._view
+                if view is None:
+                    if self._loader is not None:
+                        view = memoryview(self._loader())
+                    else:
+                        with open(self._path, "rb") as f:
+                            size = os.fstat(f.fileno()).st_size
+                            if size == 0:
+                                view = memoryview(b"")
+                            else:
+                                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                    stop = len(view) if self._length is None else min(self._offset + self._length, len(view))
+                    view = self._view = view[self._offset:stop]
+        return view
+
+    @property
+    def loaded(self):
+        return self._view is not None
+
+    def __len__(self):
+        if self._loader is None and self._view is None:
+            size = os.path.getsize(self._path) - self._offset
+            return max(size if self._length is None else min(self._length, size), 0)
+        return len(self._source())
+
+    def __getitem__(self, index):
+        view = self._source()
+        if isinstance(index, slice):
+            return bytes(view[index])
+        return view[index]
+
+    def __iter__(self):
+        return iter(self._source())
+
+    def __contains__(self, item):
+        if isinstance(item, int):
+            return item in self._source()
+        return _plain(item) in self.materialize()
+
+    def __bytes__(self):
+        return self.materialize()
+
+    def __buffer__(self, flags):
+        return self._source()
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        if isinstance(other, (bytes, bytearray, memoryview, LazyBytes)):
+            return self._source() == (other._source() if isinstance(other, LazyBytes) else other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __hash__(self):
+        return hash(self.materialize())
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __radd__(self, other):
+        return _plain(other) + self.materialize()
+
+    def __repr__(self):
+        source = repr(self._path) if self._path is not None else getattr(self._loader, "__name__", "loader")
+        return f"LazyBytes({source}, loaded={self.loaded})"
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (bytes, (self.materialize(),))
+
+    def materialize(self):
+        return self._source().tobytes()
+
+    def stream(self, chunk_size=1 << 20):
+        """Yield the content in chunks of at most chunk_size bytes"""
+        view = self._source()
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+
+    def release(self):
+        """Drop the mapping or loaded buffer; it is re-read on next access"""
+        with self._lock:
+            view, self._view = self._view, None
+        if view is not None:
+            obj = view.obj
+            view.release()
+            if isinstance(obj, mmap.mmap):
+                try:
+                    obj.close()
+                except BufferError:
+                    pass
+
+_delegate(LazyBytes, bytes, [
+    name for name in dir(bytes)
+    if not name.startswith("_") and name not in ("fromhex", "maketrans")
+] + ["__add__", "__mul__", "__rmul__", "__mod__", "__lt__", "__le__", "__gt__", "__ge__"])
+
+class LazyList:
+    """
+    A list payload produced on first use:
+      - loader() returns the items, which are read into a plain list on first
+        access; from then on every list method and operator works on it
+      - with fetch(start, stop) and length, len(), indexing, slicing and
+        stream() read only the requested range and never fill the list
+    It is not a list instance: consumers that only accept real lists
+    (json.dumps, C extensions) must be given x.materialize() or list(x).
+    """
+    __slots__ = ("_loader", "_fetch", "_length", "_items", "_lock")
+
+    def __init__(self, loader=None, length=None, fetch=None):
+        if loader is None and fetch is None:
+            raise TypeError("LazyList needs a loader or a fetch(start, stop)")
+        if fetch is not None and length is None:
+            raise TypeError("LazyList with fetch needs its length")
+        self._loader = loader
+        self._fetch = fetch
+        self._length = length
+        self._items = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._items is not None
+
+    def materialize(self):
+        """The items as a plain list, read on first call and kept"""
+        items = self._items
+        if items is None:
+            with self._lock:
+                items = self._items
+                if items is None:
+                    loaded = self._loader() if self._loader is not None else self._fetch(0, self._length)
+                    items = self._items = list(loaded)
+        return items
+
+    def __len__(self):
+        if self._items is None and self._fetch is not None:
+            return self._length
+        return len(self.materialize())
+
+    def __getitem__(self, index):
+        if self._items is None and self._fetch is not None:
+            if isinstance(index, slice):
+                start, stop, step = index.indices(self._length)
+                if step == 1:
+                    return list(self._fetch(start, max(start, stop)))
+                return list(self._fetch(0, self._length))[index]
+            i = index + self._length if index < 0 else index
+            if not 0 <= i < self._length:
+                raise IndexError("list index out of range")
+            return list(self._fetch(i, i + 1))[0]
+        return self.materialize()[index]
+
+    def __iter__(self):
+        if self._items is None and self._fetch is not None:
+            return self.stream()
+        return iter(self.materialize())
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iadd__(self, other):
+        self.materialize().extend(_plain(other))
+        return self
+
+    def __imul__(self, n):
+        self.materialize()[:] = self.materialize() * n
+        return self
+
+    def __radd__(self, other):
+        return _plain(other) + self.materialize()
+
+    def __eq__(self, other):
+        # Identity first, and only lists compare by content: validating a Message
+        # compares its data with non-list values, which must not read the items.
+        if other is self:
+            return True
+        if isinstance(other, (list, LazyList)):
+            return self.materialize() == _plain(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        if self._items is None:
+            return f"LazyList(length={self._length!r}, loaded=False)"
+        return repr(self._items)
+
+    def __reduce__(self):
+        return (list, (list(self.materialize()),))
+
+    def stream(self, page_size=1000):
+        """Yield items page by page; with fetch only one page is held at a time"""
+        if self._items is not None or self._fetch is None:
+            yield from self.materialize()
+            return
+        for start in range(0, self._length, page_size):
+            yield from self._fetch(start, min(start + page_size, self._length))
+
+    __hash__ = None
+
+_delegate(LazyList, list, [name for name in dir(list) if not name.startswith("_")] + [
+    "__contains__", "__lt__", "__le__", "__gt__", "__ge__", "__reversed__", "__add__", "__mul__", "__rmul__", "__setitem__", "__delitem__",
+])
+
+class lazy:
+    """Constructors for lazy Data payloads"""
+    @staticmethod
+    def file(path, offset=0, length=None):
+        return LazyBytes(path=path, offset=offset, length=length)
+
+    @staticmethod
+    def bytes(loader):
+        return LazyBytes(loader=loader)
+
+    @staticmethod
+    def list(loader=None, length=None, fetch=None):
+        return LazyList(loader, length, fetch)
@@ -13,11 +13,17 @@ from typed import (
     Set,
     Typed,
     Lazy,
-    Any
+    Any,
+    Filter
 )
 from typed.types import Callable
+from system.mods.lazy import LazyBytes, LazyList
 
-Data = Union(Dict, List, Set, Str, Int, Bytes)
+def _is_lazy(obj: Any) -> Bool:
+    return isinstance(obj, (LazyBytes, LazyList))
+
+LazyData = Filter(Any, _is_lazy)
+Data = Union(Dict, List, Set, Str, Int, Bytes, LazyData)
 Status = Enum(Str, "success", "failure")
 
 @typed
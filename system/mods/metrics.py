@@ -0,0 +1,293 @@
+import os
+import threading
+from bisect import bisect_left
+from system.mods.message import Message
+
+# Latency bucket upper bounds, in seconds: 1us doubling up to ~67s.
+_BOUNDS = tuple(1e-6 * 2 ** i for i in range(27))
+
+class _Stats:
+    __slots__ = ("kind", "started", "finished", "success", "failure", "errors", "codes", "buckets", "total")
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = 0
+        self.finished = 0
+        self.success = 0
+        self.failure = 0
+        self.errors = 0
+        self.codes = {}
+        self.buckets = [0] * (len(_BOUNDS) + 1)
+        self.total = 0.0
+
+def _kind(info):
+    kind = info.meta.get("kind")
+    if kind is None:
+        kind = getattr(info.func, "action_kind", None)
+    return kind or info.name
+
+def _path_str(path):
+    return "/" + "/".join(path)
+
+def _percentile(buckets, count, q):
+    if not count:
+        return None
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+        if not n:
+            continue
+        if seen + n >= rank:
+            lower = _BOUNDS[i - 1] if i > 0 else 0.0
+            upper = _BOUNDS[i] if i < len(_BOUNDS) else _BOUNDS[-1]
+            return lower + (upper - lower) * ((rank - seen) / n)
+        seen += n
+    return _BOUNDS[-1]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metrics:
+    """
+    Per-handler dispatch metrics:
+      - counters are kept in per-thread shards, so recording never locks
+      - shards of finished threads are folded into one retired shard
+      - snapshots merge the shards into per-path and per-kind views
+    """
+    def __init__(self, name="system"):
+        self.name = name
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = {}
+        with self._lock:
+            self._fold()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def _fold(self):
+        """Fold the shards of finished threads into the retired shard; called under the lock"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+                continue
+            for path, stats in shard.items():
+                into = self._retired.get(path)
+                if into is None:
+                    self._retired[path] = stats
+                    continue
+                into.started += stats.started
+                into.finished += stats.finished
+                into.success += stats.success
+                into.failure += stats.failure
+                into.errors += stats.errors
+                into.total += stats.total
+                for code, n in stats.codes.items():
+                    into.codes[code] = into.codes.get(code, 0) + n
+                for i, n in enumerate(stats.buckets):
+                    into.buckets[i] += n
+        self._shards = live
+
+    def enter(self, info):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+
+        stats = shard.get(info.path)
+        if stats is None:
+            stats = shard[info.path] = _Stats(_kind(info))
+        stats.started += 1
+        return stats
+
+    @staticmethod
+    def exit(stats, elapsed, result):
+        stats.finished += 1
+        stats.total += elapsed
+        stats.buckets[bisect_left(_BOUNDS, elapsed)] += 1
+
+        if not isinstance(result, Message):
+            stats.errors += 1
+            return
+
+        success = result.success
+        if success is None and result.status is not None:
+            success = result.status == "success"
+        if success is True:
+            stats.success += 1
+        elif success is False:
+            stats.failure += 1
+
+        code = result.code
+        if code is not None:
+            stats.codes[code] = stats.codes.get(code, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._retired = {}
+            for _, shard in self._shards:
+                shard.clear()
+
+    def _merged(self, prefix=()):
+        with self._lock:
+            self._fold()
+            shards = [shard for _, shard in self._shards]
+            shards.append(dict(self._retired))
+
+        merged = {}
+        for shard in shards:
+            for path, stats in list(shard.items()):
+                if prefix and path[:len(prefix)] != prefix:
+                    continue
+                entry = merged.get(path)
+                if entry is None:
+                    entry = merged[path] = {
+                        "kind": stats.kind,
+                        "calls": 0,
+                        "success": 0,
+                        "failure": 0,
+                        "errors": 0,
+                        "in_flight": 0,
+                        "codes": {},
+                        "buckets": [0] * (len(_BOUNDS) + 1),
+                        "total": 0.0,
+                    }
+                entry["calls"] += stats.finished
+                entry["in_flight"] += stats.started - stats.finished
+                entry["success"] += stats.success
+                entry["failure"] += stats.failure
+                entry["errors"] += stats.errors
+                entry["total"] += stats.total
+                for code, n in list(stats.codes.items()):
+                    entry["codes"][code] = entry["codes"].get(code, 0) + n
+                for i, n in enumerate(stats.buckets):
+                    entry["buckets"][i] += n
+        return merged
+
+    @staticmethod
+    def _summary(entry):
+        buckets = entry["buckets"]
+        count = sum(buckets)
+        return {
+            "kind": entry["kind"],
+            "calls": entry["calls"],
+            "success": entry["success"],
+            "failure": entry["failure"],
+            "errors": entry["errors"],
+            "in_flight": entry["in_flight"],
+            "codes": dict(entry["codes"]),
+            "latency": {
+                "count": count,
+                "sum": entry["total"],
+                "p50": _percentile(buckets, count, 0.50),
+                "p95": _percentile(buckets, count, 0.95),
+                "p99": _percentile(buckets, count, 0.99),
+            },
+        }
+
+    def __call__(self, prefix=None):
+        from system.mods.helper import _normalize_path
+        merged = self._merged(_normalize_path(prefix))
+
+        kinds = {}
+        for entry in merged.values():
+            agg = kinds.get(entry["kind"])
+            if agg is None:
+                agg = kinds[entry["kind"]] = {
+                    **entry,
+                    "codes": dict(entry["codes"]),
+                    "buckets": list(entry["buckets"]),
+                }
+                continue
+            for key in ("calls", "success", "failure", "errors", "in_flight", "total"):
+                agg[key] += entry[key]
+            for code, n in entry["codes"].items():
+                agg["codes"][code] = agg["codes"].get(code, 0) + n
+            for i, n in enumerate(entry["buckets"]):
+                agg["buckets"][i] += n
+
+        return {
+            "handlers": {_path_str(p): self._summary(e) for p, e in sorted(merged.items())},
+            "kinds": {k: self._summary(e) for k, e in kinds.items()},
+        }
+
+    def prometheus(self, prefix=None):
+        from system.mods.helper import _normalize_path
+        merged = self._merged(_normalize_path(prefix))
+        system = _escape(self.name)
+        lines = []
+
+        def _family(name, kind, help_):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        rows = [
+            (f'system="{system}",path="{_escape(_path_str(p))}",kind="{_escape(e["kind"])}"', e)
+            for p, e in sorted(merged.items())
+        ]
+
+        _family("system_handler_calls_total", "counter", "Completed handler calls.")
+        for labels, e in rows:
+            lines.append(f"system_handler_calls_total{{{labels}}} {e['calls']}")
+
+        _family("system_handler_outcomes_total", "counter", "Handler calls by outcome.")
+        for labels, e in rows:
+            for outcome, key in (("success", "success"), ("failure", "failure"), ("error", "errors")):
+                lines.append(f'system_handler_outcomes_total{{{labels},outcome="{outcome}"}} {e[key]}')
+
+        _family("system_handler_codes_total", "counter", "Handler calls by Message.code.")
+        for labels, e in rows:
+            for code, n in sorted(e["codes"].items()):
+                lines.append(f'system_handler_codes_total{{{labels},code="{code}"}} {n}')
+
+        _family("system_handler_in_flight", "gauge", "Handler calls currently running.")
+        for labels, e in rows:
+            lines.append(f"system_handler_in_flight{{{labels}}} {e['in_flight']}")
+
+        _family("system_handler_latency_seconds", "histogram", "Handler call latency.")
+        for labels, e in rows:
+            cumulative = 0
+            for bound, n in zip(_BOUNDS, e["buckets"]):
+                cumulative += n
+                lines.append(f'system_handler_latency_seconds_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+            cumulative += e["buckets"][-1]
+            lines.append(f'system_handler_latency_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"system_handler_latency_seconds_sum{{{labels}}} {e['total']:.9f}")
+            lines.append(f"system_handler_latency_seconds_count{{{labels}}} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, file, prefix=None):
+        """Atomically write the Prometheus text exposition to file"""
+        tmp = f"{file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(prefix))
+        os.replace(tmp, file)
+        return file
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Serve the Prometheus text exposition over HTTP from a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), _Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
@@ -0,0 +1,109 @@
+import inspect
+from copy import copy
+from system.mods.message import Message
+from system.mods.helper import _normalize_path
+from system.mods.metrics import _kind
+
+class Middleware:
+    """
+    Hooks run around every handler call under a prefix (and of a kind, if given):
+      - before(info, args, kwargs): may return a Message to short-circuit the call
+      - after(info, result): may return a replacement result
+      - around(info, call, args, kwargs): runs the call itself via call(*args, **kwargs)
+    Any hook may be left out. For async handlers, around receives the awaitable.
+    Every before hook runs ahead of the outermost around hook and every after hook
+    once the outermost one has returned, so around hooks (retry, breaker,
+    idempotency) neither see a before short-circuit nor repeat an after hook.
+    Chains are compiled when a handler is registered and when use() changes them.
+    """
+    def __init__(self, before=None, after=None, around=None, prefix=None, kind=None):
+        self.before = before
+        self.after = after
+        self.around = around
+        self.prefix = _normalize_path(prefix)
+        self.kind = kind
+
+    def __repr__(self):
+        hooks = [k for k in ("before", "after", "around") if getattr(self, k) is not None]
+        return f"Middleware(prefix={'/' + '/'.join(self.prefix)!r}, kind={self.kind!r}, hooks={hooks})"
+
+def _as_middleware(middleware, prefix, before, after, around, kind=None):
+    if isinstance(middleware, Middleware):
+        if prefix is None and kind is None:
+            return middleware
+        # The caller's instance may be in use elsewhere: scope a copy of it.
+        middleware = copy(middleware)
+        if prefix is not None:
+            middleware.prefix = _normalize_path(prefix)
+        if kind is not None:
+            middleware.kind = kind
+        return middleware
+    if middleware is None:
+        return Middleware(before, after, around, prefix, kind)
+    hooks = {
+        k: getattr(middleware, k, None)
+        for k in ("before", "after", "around")
+    }
+    if not any(hooks.values()):
+        if not callable(middleware):
+            raise TypeError("middleware must define before, after or around, or be a callable around hook")
+        hooks["around"] = middleware
+    return Middleware(prefix=prefix, kind=kind, **hooks)
+
+def _applies(middlewares, info):
+    """Middlewares whose prefix encloses the path (and kind matches), outermost prefix first, then in use() order"""
+    path = info.path
+    kind = _kind(info)
+    found = [
+        m for m in middlewares
+        if path[:len(m.prefix)] == m.prefix and (m.kind is None or m.kind == kind)
+    ]
+    found.sort(key=lambda m: len(m.prefix))
+    return found
+
+def compile_chain(info, middlewares):
+    """Fold the middlewares that apply to info.path into one callable"""
+    stack = _applies(middlewares, info)
+    if not stack:
+        return info.func
+
+    befores = tuple(m.before for m in stack if m.before is not None)
+    afters = tuple(m.after for m in reversed(stack) if m.after is not None)
+
+    call = info.func
+    for m in reversed(stack):
+        if m.around is not None:
+            call = _wrap(m.around, info, call)
+
+    if not befores and not afters:
+        return call
+
+    async def _finish(result):
+        result = await result
+        for after in afters:
+            replaced = after(info, result)
+            if replaced is not None:
+                result = replaced
+        return result
+
+    def chain(*args, **kwargs):
+        for before in befores:
+            early = before(info, args, kwargs)
+            if isinstance(early, Message):
+                return early
+        result = call(*args, **kwargs)
+        if afters:
+            if inspect.isawaitable(result):
+                return _finish(result)
+            for after in afters:
+                replaced = after(info, result)
+                if replaced is not None:
+                    result = replaced
+        return result
+
+    return chain
+
+def _wrap(around, info, inner):
+    def wrapped(*args, **kwargs):
+        return around(info, inner, args, kwargs)
+    return wrapped
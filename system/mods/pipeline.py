@@ -0,0 +1,86 @@
+from system.mods.message import Message, _convert_message
+from system.mods.helper import _normalize_path
+
+def _failed(msg):
+    success = msg.success
+    if success is None and msg.status is not None:
+        success = msg.status == "success"
+    return success is False
+
+class Pipeline:
+    """
+    A chain of handler paths compiled once:
+      - the first stage gets the call's kwargs, every next stage gets the previous
+        stage's data: splatted when it is a dict, else as data=..., or as the
+        keyword named in a (path, name) stage
+      - the first failure short-circuits the chain, converted to the last stage's codomain
+      - stages are re-resolved only when the registry generation changes
+    Every stage is still dispatched like a direct call, so it builds and validates
+    its own Message and goes through middleware, metrics and tracing; what the
+    chain saves is the path lookups and the handler.data/propagate round trip.
+    """
+    def __init__(self, system, *stages):
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.system = system
+        self.stages = tuple(
+            (_normalize_path(s[0]), s[1]) if isinstance(s, tuple) and len(s) == 2 and isinstance(s[1], str)
+            else (_normalize_path(s), None)
+            for s in stages
+        )
+        self._generation = None
+        self._compiled = None
+        self._codomain = Message
+
+    def _compile(self):
+        generation = self.system._generation
+        if self._generation == generation:
+            return self._compiled
+
+        compiled = []
+        for path, bind in self.stages:
+            info = self.system.get_handler_info(path)
+            if info is None:
+                raise KeyError(f"No handler registered at path {'/' + '/'.join(path)!r}")
+            compiled.append((info, path, bind))
+        self._codomain = getattr(compiled[-1][0].func, "cod", Message)
+        self._compiled = tuple(compiled)
+        self._generation = generation
+        return self._compiled
+
+    @staticmethod
+    def _kwargs(data, bind):
+        if bind is not None:
+            return {bind: data}
+        if isinstance(data, dict):
+            return data
+        return {"data": data}
+
+    def _short(self, msg):
+        codomain = self._codomain
+        return msg if isinstance(msg, codomain) else _convert_message(msg, codomain)
+
+    def __call__(self, **kwargs) -> Message:
+        compiled = self._compile()
+        call = self.system._call_sync
+        last = len(compiled) - 1
+        msg = None
+        for i, (info, path, bind) in enumerate(compiled):
+            msg = call(info, path, (), kwargs if i == 0 else self._kwargs(msg.data, bind))
+            if i != last and _failed(msg):
+                return self._short(msg)
+        return msg
+
+    async def acall(self, **kwargs) -> Message:
+        compiled = self._compile()
+        last = len(compiled) - 1
+        msg = None
+        call = self.system._call
+        for i, (info, path, bind) in enumerate(compiled):
+            msg = await call(info, path, (), kwargs if i == 0 else self._kwargs(msg.data, bind))
+            if i != last and _failed(msg):
+                return self._short(msg)
+        return msg
+
+    def __repr__(self):
+        return "Pipeline(" + ", ".join(repr("/" + "/".join(p)) for p, _ in self.stages) + ")"
@@ -0,0 +1,215 @@
+import os
+import sys
+import pstats
+import inspect
+import cProfile
+import threading
+from collections import Counter
+from time import monotonic
+from system.mods.helper import _normalize_path
+
+_local = threading.local()
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+def _filename(path, ext):
+    return ("_".join(path) or "root") + ext
+
+def _match(profiles, path):
+    """The session of the longest profiled prefix of path"""
+    for i in range(len(path), -1, -1):
+        session = profiles.get(path[:i])
+        if session is not None:
+            return session
+    return None
+
+class _Steps:
+    """Await an awaitable with the session entered only while it runs, one step at a time"""
+    __slots__ = ("session", "path", "awaitable")
+
+    def __init__(self, session, path, awaitable):
+        self.session = session
+        self.path = path
+        self.awaitable = awaitable
+
+    def __await__(self):
+        session, path = self.session, self.path
+        it = self.awaitable.__await__()
+        value = error = None
+        while True:
+            token = session.enter(path)
+            try:
+                if error is None:
+                    step = it.send(value)
+                else:
+                    step = it.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                session.exit(token)
+            try:
+                value, error = (yield step), None
+            except BaseException as e:
+                value, error = None, e
+
+class Profile:
+    """
+    On-demand profiling session for the handlers under one prefix:
+      - mode="cprofile" keeps one cProfile.Profile per handler path
+      - mode="sampling" samples the stacks of threads running those handlers
+      - the session detaches itself after duration seconds, or on stop()
+    Nested profiled calls on the same thread are attributed to the outermost handler.
+    Coroutine handlers are profiled step by step, only while their own task runs,
+    so concurrent tasks on one event loop are not mixed up.
+    """
+    def __init__(self, system, prefix, mode="cprofile", duration=None, interval=0.005):
+        if mode not in ("cprofile", "sampling"):
+            raise ValueError(f"mode must be 'cprofile' or 'sampling', got {mode!r}")
+
+        self.system = system
+        self.prefix = _normalize_path(prefix)
+        self.mode = mode
+        self.interval = interval
+        self.deadline = monotonic() + duration if duration else None
+        self.profiles = {}
+        self.stacks = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._timer = None
+        self._sampler = None
+
+        if duration:
+            self._timer = threading.Timer(duration, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+
+        if mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+    def enter(self, path):
+        if getattr(_local, "busy", False):
+            return None
+        _local.busy = True
+
+        if self.mode == "sampling":
+            self._active[threading.get_ident()] = path
+            return path
+
+        prof = self.profiles.get(path)
+        if prof is None:
+            with self._lock:
+                prof = self.profiles.setdefault(path, cProfile.Profile())
+        try:
+            prof.enable()
+        except ValueError:
+            _local.busy = False
+            return None
+        return prof
+
+    def exit(self, token):
+        if token is None:
+            return
+        if self.mode == "sampling":
+            self._active.pop(threading.get_ident(), None)
+        else:
+            token.disable()
+        _local.busy = False
+
+    def run(self, path, func, args, kwargs):
+        """Call func under the session; an awaitable result is returned as steps()"""
+        token = self.enter(path)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            self.exit(token)
+        if inspect.isawaitable(result):
+            return _Steps(self, path, result)
+        return result
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, path in active.items():
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                counter = self.stacks.get(path)
+                if counter is None:
+                    counter = self.stacks[path] = Counter()
+                counter[_collapse(frame)] += 1
+
+    def stop(self):
+        if self._stopped.is_set():
+            return self
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.cancel()
+
+        system = self.system
+        with system._registry_lock:
+            if system._profiles.get(self.prefix) is self:
+                profiles = dict(system._profiles)
+                del profiles[self.prefix]
+                system._profiles = profiles
+        return self
+
+    @property
+    def active(self):
+        return not self._stopped.is_set()
+
+    def stats(self, path=None):
+        """pstats.Stats for one handler path, or merged over the whole prefix"""
+        if self.mode != "cprofile":
+            raise ValueError("stats() is only available for mode='cprofile'")
+
+        if path is not None:
+            profiles = [self.profiles[_normalize_path(path)]]
+        else:
+            profiles = list(self.profiles.values())
+        if not profiles:
+            return None
+
+        stats = pstats.Stats(profiles[0])
+        for prof in profiles[1:]:
+            stats.add(prof)
+        return stats
+
+    def collapsed(self, path=None):
+        """Collapsed-stack lines ('frame;frame;frame count') for flame graph tools"""
+        if path is not None:
+            counters = [self.stacks.get(_normalize_path(path), Counter())]
+        else:
+            counters = list(self.stacks.values())
+        merged = Counter()
+        for counter in counters:
+            merged.update(counter)
+        return [f"{stack} {n}" for stack, n in merged.most_common()]
+
+    def dump(self, directory="."):
+        """Write one .pstats or .collapsed file per profiled handler; return the file paths"""
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        if self.mode == "cprofile":
+            for path, prof in list(self.profiles.items()):
+                file = os.path.join(directory, _filename(path, ".pstats"))
+                prof.dump_stats(file)
+                files.append(file)
+        else:
+            for path in list(self.stacks):
+                file = os.path.join(directory, _filename(path, ".collapsed"))
+                with open(file, "w", encoding="utf-8") as f:
+                    f.write("\n".join(self.collapsed(path)) + "\n")
+                files.append(file)
+        return files
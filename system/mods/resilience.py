@@ -0,0 +1,214 @@
+import time
+import random
+import asyncio
+import inspect
+import threading
+from collections import deque
+from system.mods.message import Message
+from system.mods.helper import _loop_running
+
+def _failed(msg):
+    success = msg.success
+    if success is None and msg.status is not None:
+        success = msg.status == "success"
+    return success is False
+
+async def _attempt(call, args, kwargs):
+    result = call(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+class Retry:
+    """
+    Retry policy, installed as an around middleware:
+      - up to attempts calls in total
+      - exponential backoff: backoff * factor**(n-1), capped at max_delay,
+        with up to +/- jitter of it added at random
+      - retried on exceptions of the given types, and on failure Messages
+        whose code is in codes
+    Sync handlers sleep between attempts, unless called on a running event loop;
+    there, and for async handlers, the retries are awaited with asyncio.sleep.
+    """
+    def __init__(self, attempts=3, backoff=0.05, factor=2.0, max_delay=5.0, jitter=0.5, codes=(), exceptions=(Exception,)):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.codes = frozenset(codes)
+        self.exceptions = tuple(exceptions)
+        self.retries = 0
+
+    def delay(self, attempt):
+        base = min(self.backoff * self.factor ** (attempt - 1), self.max_delay)
+        if self.jitter:
+            base += base * self.jitter * (2 * random.random() - 1)
+        return max(base, 0.0)
+
+    def _again(self, result):
+        return bool(self.codes) and _failed(result) and result.code in self.codes
+
+    def around(self, info, call, args, kwargs):
+        attempt = 1
+        while True:
+            try:
+                result = call(*args, **kwargs)
+            except self.exceptions:
+                if attempt >= self.attempts:
+                    raise
+            else:
+                if inspect.isawaitable(result):
+                    return self._async(call, args, kwargs, attempt, result)
+                if attempt >= self.attempts or not self._again(result):
+                    return result
+            self.retries += 1
+            if _loop_running():
+                # A sync handler awaited on an event loop: back off without blocking it.
+                return self._async(call, args, kwargs, attempt, None)
+            time.sleep(self.delay(attempt))
+            attempt += 1
+
+    async def _async(self, call, args, kwargs, attempt, pending):
+        # pending is the awaitable of the current attempt, or None once it has failed.
+        while True:
+            if pending is not None:
+                try:
+                    result = await pending
+                except self.exceptions:
+                    if attempt >= self.attempts:
+                        raise
+                else:
+                    if attempt >= self.attempts or not self._again(result):
+                        return result
+                self.retries += 1
+            await asyncio.sleep(self.delay(attempt))
+            attempt += 1
+            pending = _attempt(call, args, kwargs)
+
+    def to_dict(self):
+        return {
+            "attempts": self.attempts,
+            "backoff": self.backoff,
+            "factor": self.factor,
+            "max_delay": self.max_delay,
+            "jitter": self.jitter,
+            "codes": sorted(self.codes),
+            "retries": self.retries,
+        }
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by the handlers it is installed on:
+      - closed: calls pass; outcomes go into a rolling window of the last window calls
+      - open: once at least min_calls are in the window and the failure rate reaches
+        threshold, calls return a failure Message with code without running, for cooldown seconds
+      - half-open: then up to trials calls pass; a success closes it, a failure reopens it
+    Exceptions count as failures, and so do failure Messages (only those whose code is
+    in codes, if codes is given).
+    """
+    def __init__(self, name="breaker", threshold=0.5, window=20, min_calls=5, cooldown=30.0, trials=1, codes=None, code=503):
+        self.name = name
+        self.threshold = threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.trials = trials
+        self.codes = frozenset(codes) if codes is not None else None
+        self.code = code
+        self.state = "closed"
+        self.opened_at = None
+        self.rejected = 0
+        self._window = deque(maxlen=window)
+        self._probing = 0
+        self._lock = threading.Lock()
+
+    def _is_failure(self, result):
+        if not _failed(result):
+            return False
+        return self.codes is None or result.code in self.codes
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = "half-open"
+                self._probing = 0
+            if self._probing < self.trials:
+                self._probing += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            if self.state == "half-open":
+                if ok:
+                    self.state = "closed"
+                    self._window.clear()
+                else:
+                    self._open()
+                return
+            self._window.append(ok)
+            calls = len(self._window)
+            if calls >= self.min_calls and self._window.count(False) / calls >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self._probing = 0
+
+    def reset(self):
+        with self._lock:
+            self.state = "closed"
+            self.opened_at = None
+            self._window.clear()
+
+    def _rejection(self, info):
+        return Message(
+            message=f"circuit {self.name!r} is open: '/{'/'.join(info.path)}' not called",
+            status="failure",
+            success=False,
+            code=self.code,
+        )
+
+    def around(self, info, call, args, kwargs):
+        if not self.allow():
+            return self._rejection(info)
+        try:
+            result = call(*args, **kwargs)
+        except BaseException:
+            self.record(False)
+            raise
+        if inspect.isawaitable(result):
+            return self._async(result)
+        self.record(not self._is_failure(result))
+        return result
+
+    async def _async(self, pending):
+        try:
+            result = await pending
+        except BaseException:
+            self.record(False)
+            raise
+        self.record(not self._is_failure(result))
+        return result
+
+    def to_dict(self):
+        with self._lock:
+            calls = len(self._window)
+            failures = self._window.count(False)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_rate": failures / calls if calls else 0.0,
+            "calls": calls,
+            "rejected": self.rejected,
+            "retry_in": max(self.cooldown - (time.monotonic() - self.opened_at), 0.0) if self.state == "open" else None,
+        }
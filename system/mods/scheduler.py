@@ -0,0 +1,301 @@
+import time
+import math
+import random
+import asyncio
+import threading
+from datetime import datetime
+from system.mods.helper import _normalize_path
+
+class Timer:
+    __slots__ = (
+        "scheduler", "path", "kwargs", "every", "jitter", "overlap", "grid", "due",
+        "running", "pending", "cancelled", "runs", "skipped", "coalesced",
+        "missed", "errors", "last_lag", "max_lag",
+    )
+
+    def __init__(self, scheduler, path, kwargs, every, jitter, overlap, due):
+        self.scheduler = scheduler
+        self.path = path
+        self.kwargs = kwargs
+        self.every = every
+        self.jitter = jitter
+        self.overlap = overlap
+        self.grid = due
+        self.due = due
+        self.running = False
+        self.pending = False
+        self.cancelled = False
+        self.runs = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.missed = 0
+        self.errors = 0
+        self.last_lag = None
+        self.max_lag = 0.0
+
+    def cancel(self):
+        self.cancelled = True
+        self.scheduler._forget(self)
+
+    def to_dict(self):
+        return {
+            "path": "/" + "/".join(self.path),
+            "every": self.every,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "missed": self.missed,
+            "errors": self.errors,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "running": self.running,
+            "cancelled": self.cancelled,
+        }
+
+    def __repr__(self):
+        return f"Timer(path={'/' + '/'.join(self.path)!r}, every={self.every!r}, runs={self.runs})"
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel: level i has slots[i] buckets, each spanning the
+    whole of level i-1. Adding a timer is O(1); every tick empties one level-0
+    bucket, and on wrap-around one higher-level bucket cascades down.
+    Timers further out than the top level wait in its last reachable bucket.
+    """
+    def __init__(self, slots=(256, 64, 64, 64)):
+        self.slots = tuple(slots)
+        self.spans = []
+        span = 1
+        for n in self.slots:
+            self.spans.append(span)
+            span *= n
+        self.horizon = span
+        self.levels = [[[] for _ in range(n)] for n in self.slots]
+        self.now = 0
+        self.size = 0
+
+    def add(self, timer, tick):
+        """Add a timer due on an absolute tick; ticks already past fire on the next advance"""
+        self._place(timer, max(tick, self.now + 1))
+        self.size += 1
+
+    def _place(self, timer, tick):
+        delta = tick - self.now
+        for level, (n, span) in enumerate(zip(self.slots, self.spans)):
+            if delta < span * n:
+                self.levels[level][(tick // span) % n].append((tick, timer))
+                return
+        # Beyond the horizon: park in the furthest top-level bucket and re-place on cascade.
+        top = len(self.slots) - 1
+        far = self.now + self.horizon - self.spans[top]
+        self.levels[top][(far // self.spans[top]) % self.slots[top]].append((tick, timer))
+
+    def _cascade(self, level):
+        n, span = self.slots[level], self.spans[level]
+        bucket = self.levels[level][(self.now // span) % n]
+        if not bucket:
+            return
+        self.levels[level][(self.now // span) % n] = []
+        for tick, timer in bucket:
+            self._place(timer, tick)
+
+    def advance(self):
+        """Move one tick forward and return the timers due on it"""
+        self.now += 1
+        for level in range(len(self.slots) - 1, 0, -1):
+            if self.now % self.spans[level] == 0:
+                self._cascade(level)
+        slot = self.now % self.slots[0]
+        due = self.levels[0][slot]
+        if not due:
+            return ()
+        self.levels[0][slot] = []
+        self.size -= len(due)
+        return due
+
+class Scheduler:
+    """
+    Periodic and delayed handler calls driven by one TimerWheel:
+      - runs as a task on the loop that first schedules, or on its own
+        daemon thread loop when scheduling from synchronous code
+      - periodic timers are re-armed on their original grid, so they do not drift
+      - overlap decides what happens when a run is due while the previous one is
+        still running: 'skip' drops it, 'coalesce' runs once more right after,
+        'allow' starts it anyway
+      - a run that starts more than two ticks late counts as a missed deadline
+      - after stop(), or once its loop is closed, the next schedule() starts it
+        again; the clock resumes where it stopped, so timers still armed keep
+        their place and time spent stopped is not counted
+    """
+    def __init__(self, system, tick=0.01, slots=(256, 64, 64, 64)):
+        self.system = system
+        self.tick = tick
+        self.wheel = TimerWheel(slots)
+        self.timers = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._t0 = None
+
+    def _ensure_running(self):
+        if self._loop is not None and not self._loop.is_closed():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            self._bind(loop)
+            return
+
+        ready = threading.Event()
+        def _thread():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._bind(loop)
+            ready.set()
+            try:
+                loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.close()
+
+        self._thread = threading.Thread(target=_thread, name="scheduler", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def _bind(self, loop):
+        # Continue from the wheel's tick rather than from zero: the wheel and
+        # the timers armed on it are kept across restarts.
+        self._loop = loop
+        self._t0 = loop.time() - self.wheel.now * self.tick
+        self._task = loop.create_task(self._run())
+
+    def _forget(self, timer):
+        with self._lock:
+            self.timers.discard(timer)
+
+    def _clock(self):
+        return self._loop.time() - self._t0
+
+    def _arm(self, timer, due):
+        timer.due = due
+        with self._lock:
+            self.wheel.add(timer, math.ceil(due / self.tick))
+
+    def schedule(self, path, every=None, at=None, delay=None, jitter=0.0, overlap="skip", **kwargs):
+        if overlap not in ("skip", "coalesce", "allow"):
+            raise ValueError(f"overlap must be 'skip', 'coalesce' or 'allow', got {overlap!r}")
+        if every is None and at is None and delay is None:
+            raise ValueError("schedule needs every=, at= or delay=")
+        if every is not None and every <= 0:
+            raise ValueError("every must be positive")
+
+        self._ensure_running()
+        now = self._clock()
+        if at is not None:
+            if isinstance(at, datetime):
+                at = at.timestamp()
+            first = now + max(at - time.time(), 0.0)
+        elif delay is not None:
+            first = now + delay
+        else:
+            first = now + every
+
+        timer = Timer(self, _normalize_path(path), kwargs, every, jitter, overlap, first)
+        with self._lock:
+            self.timers.add(timer)
+        self._arm(timer, first + random.uniform(0, jitter) if jitter else first)
+        return timer
+
+    async def _run(self):
+        loop = self._loop
+        while True:
+            target = int(self._clock() / self.tick)
+            while self.wheel.now < target:
+                with self._lock:
+                    due = self.wheel.advance()
+                for _, timer in due:
+                    self._fire(timer)
+            next_tick = self._t0 + (self.wheel.now + 1) * self.tick
+            await asyncio.sleep(max(next_tick - loop.time(), 0.0))
+
+    def _fire(self, timer):
+        if timer.cancelled:
+            return
+        now = self._clock()
+        lag = now - timer.due
+        timer.last_lag = lag
+        if lag > timer.max_lag:
+            timer.max_lag = lag
+        if lag > 2 * self.tick:
+            timer.missed += 1
+
+        if timer.running and timer.overlap != "allow":
+            if timer.overlap == "coalesce":
+                if timer.pending:
+                    timer.coalesced += 1
+                timer.pending = True
+            else:
+                timer.skipped += 1
+        else:
+            self._loop.create_task(self._call(timer))
+
+        if timer.every is None:
+            self._forget(timer)
+        else:
+            grid = timer.grid + timer.every
+            if grid <= now:
+                periods = int((now - timer.grid) // timer.every)
+                timer.missed += max(periods - 1, 0)
+                grid = timer.grid + (periods + 1) * timer.every
+            timer.grid = grid
+            self._arm(timer, grid + random.uniform(0, timer.jitter) if timer.jitter else grid)
+
+    async def _call(self, timer):
+        timer.running = True
+        try:
+            while True:
+                timer.runs += 1
+                try:
+                    await self.system.call(timer.path, **timer.kwargs)
+                except Exception:
+                    timer.errors += 1
+                if not timer.pending or timer.cancelled:
+                    break
+                timer.pending = False
+        finally:
+            timer.running = False
+
+    def stats(self):
+        with self._lock:
+            timers = list(self.timers)
+        return {
+            "timers": len(timers),
+            "queued": self.wheel.size,
+            "runs": sum(t.runs for t in timers),
+            "missed": sum(t.missed for t in timers),
+            "skipped": sum(t.skipped for t in timers),
+            "coalesced": sum(t.coalesced for t in timers),
+            "errors": sum(t.errors for t in timers),
+            "max_lag": max((t.max_lag for t in timers), default=0.0),
+            "by_path": [t.to_dict() for t in timers],
+        }
+
+    def stop(self):
+        loop, task = self._loop, self._task
+        if loop is None:
+            return
+        if self._thread is not None:
+            loop.call_soon_threadsafe(task.cancel)
+            self._thread.join()
+        else:
+            task.cancel()
+        self._loop = self._task = self._thread = None
@@ -0,0 +1,436 @@
+import pickle
+import asyncio
+import threading
+import multiprocessing
+from itertools import count
+from collections import Counter
+from importlib import import_module
+from concurrent.futures import Future, ThreadPoolExecutor
+from system.mods.message import Message, _plain_message
+from system.mods.batch import MessageBatch
+from system.mods.helper import _normalize_path, _info_entity, _list_entities
+from system.mods.system_ import _default_workers
+
+def _path_str(path):
+    return "/" + "/".join(path)
+
+def _load(factory):
+    """Build a System from a 'module:attr' (or dotted 'module.attr') string or a picklable callable"""
+    from system.mods.system_ import System
+    if isinstance(factory, str):
+        if ":" in factory:
+            module, _, attr = factory.partition(":")
+        else:
+            module, _, attr = factory.rpartition(".")
+        obj = import_module(module)
+        for part in attr.split("."):
+            obj = getattr(obj, part)
+    else:
+        obj = factory
+    return obj if isinstance(obj, System) else obj()
+
+def _plain(entity):
+    if isinstance(entity, dict):
+        out = {k: v for k, v in entity.items() if k != "component"}
+        if isinstance(out.get("prefix"), tuple):
+            out["prefix"] = _path_str(out["prefix"])
+        return out
+    if hasattr(entity, "func"):
+        return {
+            "type": "handler",
+            "path": _path_str(entity.path),
+            "name": entity.name,
+            "kind": entity.meta.get("kind"),
+            "desc": entity.meta.get("desc"),
+        }
+    return {
+        "type": "component",
+        "name": getattr(entity, "name", ""),
+        "prefix": _path_str(getattr(entity, "prefix", ())),
+        "desc": getattr(entity, "desc", ""),
+    }
+
+def _portable(error):
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(repr(error))
+
+class _Replica:
+    """Worker side: the full System with everything outside the shard parked"""
+    def __init__(self, factory):
+        self.system = _load(factory)
+        self.parked = {}
+
+    def top(self):
+        found = {}
+        for comp in self.system._components:
+            found[tuple(comp.prefix)] = comp
+        found.update(self.parked)
+        return found
+
+    def owned(self, path):
+        for comp in self.system._components:
+            if path[:len(comp.prefix)] == tuple(comp.prefix):
+                return True
+        return False
+
+    def prefixes(self):
+        sizes = {}
+        for prefix, comp in self.top().items():
+            sizes[_path_str(prefix)] = sum(1 for _ in _walk_handlers(comp))
+        return sizes
+
+    def keep(self, prefixes):
+        keep = {_normalize_path(p) for p in prefixes}
+        with self.system.batch():
+            for comp in list(self.system._components):
+                key = tuple(comp.prefix)
+                if key not in keep:
+                    self.system.exclude(comp)
+                    self.parked[key] = comp
+            for key in list(self.parked):
+                if key in keep:
+                    self.include(_path_str(key))
+
+    def include(self, prefix):
+        key = _normalize_path(prefix)
+        comp = self.parked.pop(key, None)
+        if comp is not None:
+            comp.prefix = key
+            self.system.include(comp, None)
+
+    def exclude(self, prefix):
+        key = _normalize_path(prefix)
+        comp = self.system._components_by_prefix.get(key)
+        if comp is not None and comp in self.system._components:
+            self.system.exclude(comp)
+            self.parked[key] = comp
+
+    def call(self, path, args, kwargs):
+        return _plain_message(self.system.call_sync(path, *args, **kwargs))
+
+    def call_many(self, calls):
+        return [_plain_message(m) for m in self.system.call_many_sync(*calls)]
+
+    def list(self, path, kind):
+        return [_plain(e) for e in _list_entities(self.system, _normalize_path(path), kind=kind)]
+
+    def info(self, path):
+        path = _normalize_path(path)
+        entry = _info_entity(self.system, path)
+        if entry is None:
+            return None
+        entry = _plain(entry)
+        if not path and entry.get("type") == "system":
+            entry.pop("metrics", None)
+            entry["shared"] = sum(1 for p in self.system._handlers.copy() if not self.owned(p))
+        return entry
+
+def _walk_handlers(comp):
+    yield from comp._local_handlers.copy()
+    for child in comp._components:
+        yield from _walk_handlers(child)
+
+def _serve(factory, conn):
+    replica = _Replica(factory)
+    lock = threading.Lock()
+
+    def _reply(rid, ok, value):
+        with lock:
+            conn.send((rid, ok, value))
+
+    def _run(rid, op, payload):
+        try:
+            _reply(rid, True, getattr(replica, op)(*payload))
+        except BaseException as e:
+            _reply(rid, False, _portable(e))
+
+    # Requests get their own pool: a call_many fans out on the system pool and
+    # waits for it, so sharing that pool would deadlock once every thread waits.
+    pool = ThreadPoolExecutor(max_workers=_default_workers(), thread_name_prefix="shard-request")
+    while True:
+        try:
+            rid, op, payload = conn.recv()
+        except (EOFError, OSError):
+            break
+        if op == "stop":
+            _reply(rid, True, None)
+            break
+        if op in ("call", "call_many"):
+            pool.submit(_run, rid, op, payload)
+        else:
+            _run(rid, op, payload)
+
+    pool.shutdown(wait=True)
+    replica.system.shutdown()
+    conn.close()
+
+class _Worker:
+    """Router side of one shard: a pipe, a reader thread and the pending futures"""
+    def __init__(self, index, factory, context):
+        self.index = index
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve, args=(factory, child), name=f"shard-{index}", daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+        self._ids = count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            try:
+                rid, ok, value = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(rid, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        error = RuntimeError(f"shard worker {self.index} exited")
+        for rid in list(self._pending):
+            future = self._pending.pop(rid, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+
+    def request(self, op, *payload):
+        future = Future()
+        with self._lock:
+            rid = next(self._ids)
+            self._pending[rid] = future
+            try:
+                self.conn.send((rid, op, payload))
+            except BaseException:
+                self._pending.pop(rid, None)
+                raise
+        return future
+
+    def close(self, timeout=5):
+        if self.process.is_alive():
+            try:
+                self.request("stop").result(timeout)
+            except Exception:
+                pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+def balanced(sizes, workers):
+    """Greedy assignment: heaviest prefix first, onto the lightest shard"""
+    loads = [0] * workers
+    assignment = {}
+    for prefix, size in sorted(sizes.items(), key=lambda kv: (-kv[1], kv[0])):
+        shard = loads.index(min(loads))
+        assignment[prefix] = shard
+        loads[shard] += max(size, 1)
+    return assignment
+
+class ShardedSystem:
+    """
+    A System split across worker processes by top-level component prefix:
+      - every worker builds the system from factory ('module:attr' or a
+        picklable callable) and keeps only the prefixes assigned to it
+      - call/call_many are forwarded to the owning worker over a pipe;
+        system-level handlers exist on every worker and are spread round-robin
+      - list/info return plain dicts merged across workers
+      - assign is a {prefix: shard} mapping or a callable (prefix, workers) -> shard;
+        by default prefixes are balanced by handler count
+    Arguments, keyword arguments and Message fields must be picklable.
+    Results come back as plain Message instances.
+    """
+    def __init__(self, factory, workers=None, assign=None, context="spawn"):
+        self.factory = factory
+        self.size = workers or multiprocessing.cpu_count()
+        ctx = multiprocessing.get_context(context)
+        self._workers = [_Worker(i, factory, ctx) for i in range(self.size)]
+        self._lock = threading.Lock()
+        self._rr = count()
+        self._load = Counter()
+        self._routes = {}
+
+        self._sizes = self._workers[0].request("prefixes").result()
+        self._apply(self._assignment(assign, self._sizes))
+
+    def _assignment(self, assign, sizes):
+        if assign is None:
+            return balanced(sizes, self.size)
+        if callable(assign):
+            return {p: assign(p, self.size) for p in sizes}
+
+        assignment = balanced({p: s for p, s in sizes.items() if p not in assign}, self.size)
+        for prefix, shard in assign.items():
+            assignment[_path_str(_normalize_path(prefix))] = shard
+        return assignment
+
+    def _apply(self, assignment):
+        for prefix, shard in assignment.items():
+            if not 0 <= shard < self.size:
+                raise ValueError(f"shard {shard} for {prefix!r} is out of range 0..{self.size - 1}")
+
+        by_shard = [[] for _ in range(self.size)]
+        for prefix, shard in assignment.items():
+            by_shard[shard].append(prefix)
+        for future in [w.request("keep", by_shard[w.index]) for w in self._workers]:
+            future.result()
+        self._routes = {_normalize_path(p): s for p, s in assignment.items()}
+
+    @property
+    def assignment(self):
+        return {_path_str(p): s for p, s in sorted(self._routes.items())}
+
+    def _owner(self, path):
+        routes = self._routes
+        for n in range(len(path), 0, -1):
+            shard = routes.get(path[:n])
+            if shard is not None:
+                return shard, path[:n]
+        return None, None
+
+    def _route(self, path):
+        path = _normalize_path(path)
+        shard, prefix = self._owner(path)
+        if shard is None:
+            return self._workers[next(self._rr) % self.size]
+        self._load[prefix] += 1
+        return self._workers[shard]
+
+    # Dispatch
+
+    def _submit(self, path, args, kwargs):
+        return self._route(path).request("call", path, tuple(args), dict(kwargs))
+
+    def _grouped(self, calls):
+        groups = {}
+        for i, (path, args, kwargs) in enumerate(calls):
+            worker = self._route(path)
+            groups.setdefault(worker.index, []).append((i, (path, tuple(args or ()), dict(kwargs or {}))))
+        return [
+            (items, self._workers[index].request("call_many", [c for _, c in items]))
+            for index, items in groups.items()
+        ]
+
+    @staticmethod
+    def _collect(size, parts):
+        results = [None] * size
+        for items, plain in parts:
+            for (i, _), msg in zip(items, plain):
+                results[i] = Message(**msg)
+        return results
+
+    async def call(self, path, *args, **kwargs) -> Message:
+        return Message(**await asyncio.wrap_future(self._submit(path, args, kwargs)))
+
+    def call_sync(self, path, *args, **kwargs) -> Message:
+        return Message(**self._submit(path, args, kwargs).result())
+
+    async def call_many(self, *calls, batch=False):
+        groups = self._grouped(calls)
+        plain = await asyncio.gather(*(asyncio.wrap_future(f) for _, f in groups))
+        results = self._collect(len(calls), [(items, p) for (items, _), p in zip(groups, plain)])
+        return MessageBatch(results) if batch else results
+
+    def call_many_sync(self, *calls, batch=False):
+        groups = self._grouped(calls)
+        results = self._collect(len(calls), [(items, f.result()) for items, f in groups])
+        return MessageBatch(results) if batch else results
+
+    # Merged views
+
+    def _everywhere(self, op, *payload):
+        return [f.result() for f in [w.request(op, *payload) for w in self._workers]]
+
+    def list(self, path=None, kind=None):
+        key = _normalize_path(path)
+        shard, _ = self._owner(key)
+        if shard is not None:
+            return self._workers[shard].request("list", key, kind).result()
+
+        seen = {}
+        for entries in self._everywhere("list", key, kind):
+            for entry in entries:
+                seen.setdefault((entry["type"], entry.get("path") or entry.get("prefix")), entry)
+        return list(seen.values())
+
+    def info(self, path=None):
+        key = _normalize_path(path)
+        shard, _ = self._owner(key)
+        if shard is not None:
+            return self._workers[shard].request("info", key).result()
+        if key:
+            return self._workers[next(self._rr) % self.size].request("info", key).result()
+
+        infos = self._everywhere("info", key)
+        shared = infos[0].get("shared", 0)
+        merged = {k: v for k, v in infos[0].items() if k != "shared"}
+        merged["handlers"] = shared + sum(i["handlers"] - i.get("shared", 0) for i in infos)
+        merged["components"] = sum(i["components"] for i in infos)
+        merged["shards"] = self.shards()
+        return merged
+
+    def shards(self):
+        owned = [[] for _ in range(self.size)]
+        for prefix, shard in sorted(self._routes.items()):
+            owned[shard].append(_path_str(prefix))
+        return [
+            {"shard": w.index, "pid": w.process.pid, "alive": w.process.is_alive(), "prefixes": owned[w.index]}
+            for w in self._workers
+        ]
+
+    # Rebalancing
+
+    def move(self, prefix, shard):
+        """Move one top-level prefix to another shard; it is mounted there before it leaves the old one"""
+        key = _normalize_path(prefix)
+        with self._lock:
+            old = self._routes.get(key)
+            if old is None:
+                raise KeyError(f"No top-level component at prefix {prefix!r}")
+            if not 0 <= shard < self.size:
+                raise ValueError(f"shard {shard} is out of range 0..{self.size - 1}")
+            if old == shard:
+                return
+            self._workers[shard].request("include", _path_str(key)).result()
+            self._routes = {**self._routes, key: shard}
+            self._workers[old].request("exclude", _path_str(key)).result()
+
+    def rebalance(self, assign=None):
+        """
+        Reassign prefixes: to the given mapping/callable, or balanced by the
+        calls routed since the last rebalance (handler count when idle).
+        """
+        with self._lock:
+            if assign is None:
+                load = dict(self._load)
+                self._load.clear()
+                if load:
+                    sizes = {_path_str(p): load.get(p, 0) for p in self._routes}
+                else:
+                    sizes = {_path_str(p): self._sizes.get(_path_str(p), 0) for p in self._routes}
+                target = balanced(sizes, self.size)
+            else:
+                target = self._assignment(assign, self._sizes)
+        for prefix, shard in target.items():
+            self.move(prefix, shard)
+        return self.assignment
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,68 @@
+import os
 import inspect
 import asyncio
-from system.mods.helper import _PathProxy, _InfoProxy, _ListProxy, _normalize_path, _get_entity
+import threading
+from collections import deque
+from contextvars import copy_context
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import perf_counter
+from system.mods.helper import (
+    _PathProxy,
+    _InfoProxy,
+    _ListProxy,
+    _normalize_path,
+    _get_entity,
+    _lookup,
+    _proxy,
+    _registry_changed,
+    _rollback,
+    _index_path,
+    _unindex_path,
+    _Staged,
+    _log,
+    _assign,
+    _tables,
+    _awaiting,
+    _run_awaitable
+)
 from system.mods.message import Message
 from system.mods.handler import Handler, register_handler
-from system.mods.component import include_method
+from system.mods.component import include_method, exclude_method
+from system.mods.metrics import Metrics
+from system.mods.tracing import Tracer, child_span, finish_span
+from system.mods.profiling import Profile, _match
+from system.mods.events import EventBus
+from system.mods.batch import MessageBatch
+from system.mods.tree import walk as _walk, export_tree as _export_tree
+from system.mods.pipeline import Pipeline
+from system.mods.dag import Graph
+from system.mods.middleware import _as_middleware, compile_chain
+from system.mods.resilience import Retry, CircuitBreaker
+from system.mods.jobs import JobQueue
+from system.mods.scheduler import Scheduler
+from system.mods.idempotency import IdempotencyStore, Idempotency
+
+def _on_loop(func, args, kwargs):
+    """Run the synchronous part of an async dispatch, marked for the middleware"""
+    token = _awaiting.set(True)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _awaiting.reset(token)
+
+def _checked(result, path):
+    if not isinstance(result, Message):
+        raise TypeError(
+            f"Handler at path {path!r} returned {type(result)!r}, "
+            "expected a subtype of Message"
+        )
+    return result
+
+_worker = threading.local()
+
+def _default_workers():
+    return min(32, (os.cpu_count() or 1) + 4)
 
 class SYSTEM(type):
     def __new__(mcls, name, bases, namespace, **kwargs):
@@ -35,14 +94,47 @@ class SYSTEM(type):
         cls.__static_components__ = static_components
         return cls
 
+def _apply(table, sets, deletes):
+    table = dict(table)
+    _apply_in_place(table, sets, deletes)
+    return table
+
+def _apply_in_place(table, sets, deletes):
+    table.update(sets)
+    for key in deletes:
+        table.pop(key, None)
+
 class System:
-    def __init__(self, name="system", desc="", attach=None, allow=None):
+    def __init__(self, name="system", desc="", attach=None, allow=None, metrics=False):
         self.name = name
         self.desc = desc
         self._components = []
         self._handlers = {}
         self._components_by_prefix = {}
-        
+        self._registry_lock = threading.RLock()
+        self._staged = None
+        self._open = None
+        self._changes = (0, [])
+        self._generation = 0
+        self._lookup_cache = {}
+        self._proxies = {}
+        self._prefix_index = None
+        self._walk_index = None
+        self._tree = None
+        # Opt-in: per-call counters and latency histograms cost every dispatch.
+        self.metrics = Metrics(name) if metrics else None
+        self._metrics = self.metrics
+        self._tracer = None
+        self._profiles = {}
+        self._executor = None
+        self._bus = None
+        self._middleware = ()
+        self._chains = {}
+        self._breakers = ()
+        self._stores = ()
+        self._jobs = None
+        self._scheduler = None
+
         # Local attachments and allowances
         self._local_handlers = {}
         self._allowed_components = set()
@@ -68,27 +160,28 @@ class System:
         self.list = _ListProxy(self)
         self.info = _InfoProxy(self)
 
-        for h_name, h in getattr(self.__class__, "__static_handlers__", {}).items():
-            path = (h_name,)
-            register_handler(
-                self,
-                path=path,
-                name=h_name,
-                func=h,
-                owner=self,
-                meta={},
-            )
+        with self.batch():
+            for h_name, h in getattr(self.__class__, "__static_handlers__", {}).items():
+                path = (h_name,)
+                register_handler(
+                    self,
+                    path=path,
+                    name=h_name,
+                    func=h,
+                    owner=self,
+                    meta={},
+                )
 
-            if not hasattr(self, h_name):
-                setattr(self, h_name, h)
+                if not hasattr(self, h_name):
+                    setattr(self, h_name, h)
 
-        for cname, comp_cls in getattr(self.__class__, "__static_components__", {}).items():
-            comp = comp_cls()
+            for cname, comp_cls in getattr(self.__class__, "__static_components__", {}).items():
+                comp = comp_cls()
 
-            if getattr(comp, "name", "") in ("", "component"):
-                comp.name = cname
+                if getattr(comp, "name", "") in ("", "component"):
+                    comp.name = cname
 
-            self.include(comp)
+                self.include(comp)
 
     def _attach_local(self, *, name: str, handler, kind=None, desc=None, validators=()):
         """Local version of attach for this instance only"""
@@ -121,24 +214,24 @@ class System:
         
         # If called with positional args and keyword args, it means we want to call the handler
         if args and len(args) == 1 and kwargs:
-            path = args[0]
-            normalized_path = _normalize_path(path)
             # Get the handler and call it with the provided kwargs
-            handler_func = _get_entity(self, normalized_path)
+            handler_func = self[args[0]]
             return handler_func(**kwargs)
         
         # If called with only positional args, behave like get
         if args:
-            path = args[0]
-            normalized_path = _normalize_path(path)
-            return _get_entity(self, normalized_path)
+            return self[args[0]]
         
         raise TypeError("System must be called with either a path or handler parameter")
 
     def __getitem__(self, path):
         """Enable system['/some/path'] syntax"""
-        normalized_path = _normalize_path(path)
-        return _get_entity(self, normalized_path)
+        info, comp = _lookup(self, path)
+        if info is not None:
+            return info.func
+        if comp is not None:
+            return comp
+        return _get_entity(self, _normalize_path(path))
 
     def __getattr__(self, item: str) -> _PathProxy:
         if item.startswith("_"):
@@ -152,13 +245,9 @@ class System:
         # if item in ("get", "list", "info"):
         #     raise AttributeError(item)
 
-        prefix = (item,)
-        if not any(h.path[:1] == prefix for h in self._handlers.values()):
-            raise AttributeError(
-                f"No handler path starting with {prefix!r} in system '{self.name}'"
-            )
-
-        return _PathProxy(self, prefix)
+        proxy = _proxy(self, (item,))
+        self.__dict__[item] = proxy
+        return proxy
 
     def include(self, component, prefix):
         # Check both global and local allowances
@@ -176,6 +265,105 @@ class System:
             )
         return include_method(self, component, prefix)
 
+    def exclude(self, component):
+        """Remove a component subtree, keeping the rest of the registry intact"""
+        with self._registry_lock:
+            exclude_method(self, component)
+        return component
+
+    def replace(self, prefix, component):
+        """Mount component at prefix, atomically swapping whatever was there"""
+        key = _normalize_path(prefix)
+        if getattr(component, "system", None) is not None:
+            raise ValueError("Component is already included somewhere; detach it first")
+        with self._registry_lock:
+            old = self._components_by_prefix.get(key)
+            # A failure anywhere below rolls the whole swap back; on success the
+            # new entries are written before the stale ones are removed.
+            with self._batch(snapshot=False):
+                if old is not None:
+                    parent = exclude_method(self, old)
+                else:
+                    _, components_by_prefix = _tables(self)
+                    parent = next(
+                        (components_by_prefix[key[:i]] for i in range(len(key) - 1, 0, -1)
+                         if key[:i] in components_by_prefix),
+                        self,
+                    )
+                if parent is self:
+                    _assign(self, component, "prefix", key)
+                    self.include(component, None)
+                else:
+                    _assign(self, component, "prefix", key[len(parent.prefix):])
+                    parent.include(component)
+        return old
+
+    def batch(self):
+        """
+        Group registry writes. They are staged next to the live tables and
+        published in one step, as new tables, so readers never observe a
+        partially applied batch; a batch that raises publishes nothing.
+        """
+        return self._batch(snapshot=True)
+
+    @contextmanager
+    def _batch(self, snapshot):
+        """
+        Stage registry writes and publish them on success. With snapshot the
+        tables are copied and swapped (batch()); without it the changes are
+        written into the live tables, additions and overwrites before removals,
+        so a path present before and after is never missing (include, exclude,
+        replace). Nested scopes join the outermost one.
+        """
+        with self._registry_lock:
+            if self._staged is not None:
+                yield self
+                return
+
+            self._staged = (_Staged(self._handlers), _Staged(self._components_by_prefix))
+            # Attribute writes are journaled for rollback; component lists,
+            # name bindings and the changed paths wait for the publish below.
+            journal, children, deferred, changed = self._open = ([], {}, [], [])
+            try:
+                yield self
+                handlers, components_by_prefix = self._staged
+            except BaseException:
+                _rollback(journal)
+                raise
+            finally:
+                self._staged = None
+                self._open = None
+
+            added, removed, handler_sets, handler_deletes = handlers.diff()
+            _, _, component_sets, component_deletes = components_by_prefix.diff()
+            index = self._prefix_index
+            if snapshot:
+                if index is not None:
+                    index = dict(index)
+                    for path in added:
+                        _index_path(index, path)
+                    for path in removed:
+                        _unindex_path(index, path)
+                    self._prefix_index = index
+                self._handlers = _apply(self._handlers, handler_sets, handler_deletes)
+                self._components_by_prefix = _apply(self._components_by_prefix, component_sets, component_deletes)
+            else:
+                if index is not None:
+                    for path in added:
+                        _index_path(index, path)
+                _apply_in_place(self._components_by_prefix, component_sets, ())
+                _apply_in_place(self._handlers, handler_sets, handler_deletes)
+                _apply_in_place(self._components_by_prefix, {}, component_deletes)
+                if index is not None:
+                    for path in removed:
+                        _unindex_path(index, path)
+            for obj, components in children.values():
+                obj._components = components
+            _registry_changed(self)
+            _log(self, changed)
+            for fn in deferred:
+                fn()
+
     @classmethod
     def attach(
         cls,
@@ -212,32 +400,423 @@ class System:
 
     def get_handler_info(self, path):
         """Helper method to get handler info by path"""
-        normalized_path = _normalize_path(path)
-        return self._handlers.get(normalized_path)
+        return _lookup(self, path)[0]
+
+    def trace(self, exporter=None, rate=1.0):
+        """Start tracing dispatch into exporter, sampling a rate of root calls"""
+        self._tracer = Tracer(exporter, rate)
+        return self._tracer
+
+    def untrace(self):
+        tracer, self._tracer = self._tracer, None
+        return tracer
+
+    def use(self, middleware=None, prefix=None, *, kind=None, before=None, after=None, around=None):
+        """
+        Add middleware for the handlers under prefix (all handlers by default),
+        optionally only those of one kind.
+        middleware is a Middleware, an object with before/after/around methods,
+        or a callable around hook; hooks may also be passed by keyword.
+        """
+        mw = _as_middleware(middleware, prefix, before, after, around, kind)
+        with self._registry_lock:
+            self._middleware = self._middleware + (mw,)
+            self._recompile()
+        return mw
+
+    def unuse(self, middleware):
+        with self._registry_lock:
+            self._middleware = tuple(m for m in self._middleware if m is not middleware)
+            self._recompile()
+
+    def retry(self, prefix=None, kind=None, **policy):
+        """Retry the handlers under prefix (or of kind) with the given Retry policy"""
+        retry = Retry(**policy)
+        self.use(around=retry.around, prefix=prefix, kind=kind)
+        return retry
+
+    def breaker(self, prefix=None, kind=None, **options):
+        """Put the handlers under prefix (or of kind) behind one shared CircuitBreaker"""
+        key = _normalize_path(prefix)
+        options.setdefault("name", kind or "/" + "/".join(key))
+        breaker = CircuitBreaker(**options)
+        with self._registry_lock:
+            self.use(around=breaker.around, prefix=prefix, kind=kind)
+            self._breakers = self._breakers + ((key, breaker),)
+        return breaker
+
+    def idempotent(self, prefix=None, kind=None, ttl=86400.0, maxsize=10000, file=None, param="idempotency_key"):
+        """
+        Run calls under prefix (or of kind) that carry param at most once per key;
+        repeats get the stored Message. Returns the IdempotencyStore.
+        """
+        store = IdempotencyStore(ttl, maxsize, file)
+        with self._registry_lock:
+            self.use(around=Idempotency(store, param).around, prefix=prefix, kind=kind)
+            self._stores = self._stores + (store,)
+        return store
+
+    def _recompile(self):
+        """Compile the middleware chain of every registered handler, when the middleware changes"""
+        middleware = self._middleware
+        self._chains = {
+            path: (info, compile_chain(info, middleware))
+            for path, info in self._handlers.copy().items()
+        } if middleware else {}
+
+    def _compile(self, info):
+        chain = (info, compile_chain(info, self._middleware))
+        self._chains[info.path] = chain
+        return chain[1]
+
+    def _target(self, info):
+        """The handler wrapped in its middleware chain, compiled when it was registered"""
+        chain = self._chains.get(info.path)
+        if chain is None or chain[0] is not info:
+            # Registered inside a batch that later rolled back, or raced with use().
+            return self._compile(info)
+        return chain[1]
+
+    @property
+    def events(self):
+        bus = self._bus
+        if bus is None:
+            with self._registry_lock:
+                bus = self._bus
+                if bus is None:
+                    bus = self._bus = EventBus(self)
+        return bus
+
+    def subscribe(self, pattern, handler, maxsize=1024, concurrency=1, overflow="block"):
+        """
+        Subscribe a handler, or the path of a registered one, to events whose
+        path matches pattern ('*' for one segment, trailing '**' for any rest).
+        """
+        return self.events.subscribe(pattern, handler, maxsize, concurrency, overflow)
+
+    def unsubscribe(self, subscription):
+        self.events.unsubscribe(subscription)
+
+    async def publish(self, path, **payload) -> Message:
+        """Deliver an event to every matching subscriber and aggregate their results"""
+        return await self.events.publish(path, **payload)
+
+    def publish_sync(self, path, **payload) -> Message:
+        return self.events.publish_sync(path, **payload)
+
+    def emit(self, path, **payload):
+        """Fire-and-forget publish; returns how many subscribers queued the event"""
+        return self.events.emit(path, **payload)
+
+    def profile(self, prefix, mode="cprofile", duration=None, interval=0.005):
+        """Profile the handlers under prefix until duration elapses or the session is stopped"""
+        session = Profile(self, prefix, mode=mode, duration=duration, interval=interval)
+        with self._registry_lock:
+            old = self._profiles.get(session.prefix)
+            self._profiles = {**self._profiles, session.prefix: session}
+        if old is not None:
+            old.stop()
+        return session
+
+    def _begin(self, info):
+        metrics = self._metrics
+        tracer = self._tracer
+        profiles = self._profiles
+        span = tracer.start("call", "/" + "/".join(info.path)) if tracer is not None else None
+        if span is not None and type(span) is not tuple:
+            # Nested handler.call()s resolve their paths from the dispatched record.
+            span.info = info
+        return (
+            metrics,
+            metrics.enter(info) if metrics is not None else None,
+            tracer,
+            span,
+            _match(profiles, info.path) if profiles else None,
+            perf_counter(),
+        )
 
-    async def call(self, path, *args, **kwargs) -> Message:
+    @staticmethod
+    def _end(state, result, error=None):
+        metrics, stats, tracer, span, session, start = state
+        elapsed = perf_counter() - start
+        if stats is not None:
+            metrics.exit(stats, elapsed, result)
+        if span is not None:
+            tracer.finish(span, result, error)
+
+    def _info(self, path):
         info = self.get_handler_info(path)
         if info is None:
             raise KeyError(f"No handler registered at path {path!r}")
+        return info
+
+    def _enter(self, info, args, kwargs, on_loop):
+        """
+        The synchronous part of a dispatch, shared by call and call_sync: runs
+        the middleware chain under the profiling session and opens the metrics
+        and tracing state. Returns (result, state); state is None when nothing
+        observes the call, else it must be closed with _end once result is final.
+        """
+        func = self._target(info) if self._middleware else info.func
+        if on_loop and func is not info.func:
+            func, args, kwargs = _on_loop, (func, args, kwargs), {}
+        if self._metrics is None and self._tracer is None and not self._profiles:
+            return func(*args, **kwargs), None
+
+        state = self._begin(info)
+        session = state[4]
+        try:
+            if session is None:
+                result = func(*args, **kwargs)
+            else:
+                result = session.run(info.path, func, args, kwargs)
+        except BaseException as e:
+            self._end(state, None, e)
+            raise
+        return result, state
 
-        result = info.func(*args, **kwargs)
-
-        if inspect.isawaitable(result):
-            result = await result
-
-        if not isinstance(result, Message):
-            raise TypeError(
-                f"Handler at path {path!r} returned {type(result)!r}, "
-                "expected a subtype of Message"
+    async def call(self, path, *args, **kwargs) -> Message:
+        return await self._call(self._info(path), path, args, kwargs)
+
+    async def _call(self, info, path, args, kwargs):
+        result, state = self._enter(info, args, kwargs, True)
+        if state is None:
+            if inspect.isawaitable(result):
+                result = await result
+            return _checked(result, path)
+
+        error = None
+        try:
+            if inspect.isawaitable(result):
+                result = await result
+            return _checked(result, path)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._end(state, result, error)
+
+    def _call_sync(self, info, path, args, kwargs):
+        if self._middleware and _awaiting.get():
+            # A blocking call made from inside a handler that System.call runs on the loop.
+            token = _awaiting.set(False)
+            try:
+                return self._call_sync(info, path, args, kwargs)
+            finally:
+                _awaiting.reset(token)
+
+        result, state = self._enter(info, args, kwargs, False)
+        if state is None:
+            if inspect.isawaitable(result):
+                result = _run_awaitable(result)
+            return _checked(result, path)
+
+        error = None
+        try:
+            if inspect.isawaitable(result):
+                result = _run_awaitable(result)
+            return _checked(result, path)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._end(state, result, error)
+
+    async def call_many(self, *calls, batch=False):
+        """Run calls concurrently; with batch=True the results come as a columnar MessageBatch"""
+        async def _one(i, p, args, kwargs):
+            span = child_span(f"call_many[{i}]", p if isinstance(p, str) else "/" + "/".join(p))
+            result = error = None
+            try:
+                result = await self.call(p, *(args or ()), **(kwargs or {}))
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                finish_span(span, result, error)
+
+        tracer = self._tracer
+        span = tracer.start("call_many") if tracer is not None else None
+        results = error = None
+        try:
+            coros = [
+                _one(i, path, args, kwargs)
+                for i, (path, args, kwargs) in enumerate(calls)
+            ]
+            results = await asyncio.gather(*coros, return_exceptions=False)
+            return MessageBatch(results) if batch else results
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if span is not None:
+                tracer.finish(span, results, error)
+
+    def walk(self, prefix=None, kind=None, depth=None):
+        """Stream every handler (HandlerInfo) and component under prefix; see tree.walk"""
+        return _walk(self, _normalize_path(prefix), kind, depth)
+
+    def export_tree(self):
+        """Cached, serializable snapshot of the registry; see tree.export_tree"""
+        return _export_tree(self)
+
+    def pipeline(self, *stages):
+        """Compile a chain of handler paths; see Pipeline"""
+        return Pipeline(self, *stages)
+
+    def graph(self, nodes, propagate="failure", concurrency=None):
+        """Compile a DAG of dependent handler calls; see Graph"""
+        return Graph(self, nodes, propagate, concurrency)
+
+    async def run_graph(self, nodes, propagate="failure", concurrency=None):
+        return await Graph(self, nodes, propagate, concurrency).run()
+
+    def call_sync(self, path, *args, **kwargs) -> Message:
+        return self._call_sync(self._info(path), path, args, kwargs)
+
+    def call_many_sync(self, *calls, ordered=True, concurrency=None, batch=False):
+        """
+        Synchronous call_many: dispatch on the system's thread pool, at most
+        concurrency calls at a time, returning results in call order or, with
+        ordered=False, in completion order. With batch=True results are collected
+        into a MessageBatch as they complete.
+        """
+        jobs = [(path, args or (), kwargs or {}) for (path, args, kwargs) in calls]
+        tracer = self._tracer
+        span = tracer.start("call_many") if tracer is not None else None
+        results = error = None
+        try:
+            results = self._run_sync(jobs, ordered, concurrency)
+            results = MessageBatch(results) if batch else list(results)
+            return results
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if span is not None:
+                tracer.finish(span, results, error)
+
+    def map(self, path, iterable, ordered=True, concurrency=None):
+        """Lazily call the handler at path once per kwargs dict in iterable"""
+        return self._run_sync(((path, (), kwargs) for kwargs in iterable), ordered, concurrency)
+
+    def jobs(self, file=None, **options):
+        """Open (or replace) the job queue behind enqueue(): durable in file, temporary without one; see JobQueue"""
+        with self._registry_lock:
+            old, self._jobs = self._jobs, JobQueue(self, file, **options)
+        if old is not None:
+            old.close()
+        return self._jobs
+
+    def enqueue(self, path, *, _delay=0.0, **kwargs):
+        """
+        Queue a call to run later on the job workers, starting them if needed;
+        kwargs must be JSON-serializable. The queue is the one opened by jobs():
+        durable with jobs(file=...), temporary and lost on shutdown with jobs().
+        """
+        queue = self._jobs
+        if queue is None:
+            raise RuntimeError(
+                "enqueue needs a job queue: open a durable one with system.jobs(file=...), "
+                "or a temporary in-process one with system.jobs()"
             )
-        return result
-
-    async def call_many(self, *calls):
-        async def _one(p, args, kwargs):
-            return await self.call(p, *(args or ()), **(kwargs or {}))
-
-        coros = [
-            _one(path, args, kwargs)
-            for (path, args, kwargs) in calls
-        ]
-        return await asyncio.gather(*coros, return_exceptions=False)
+        job = queue.enqueue(path, _delay=_delay, **kwargs)
+        queue.start()
+        return job
+
+    @property
+    def scheduler(self):
+        scheduler = self._scheduler
+        if scheduler is None:
+            with self._registry_lock:
+                scheduler = self._scheduler
+                if scheduler is None:
+                    scheduler = self._scheduler = Scheduler(self)
+        return scheduler
+
+    def schedule(self, path, every=None, at=None, delay=None, jitter=0.0, overlap="skip", **kwargs):
+        """
+        Call the handler at path every seconds, once at a time (epoch seconds or
+        datetime), or once after delay; returns a Timer with cancel().
+        """
+        return self.scheduler.schedule(path, every, at, delay, jitter, overlap, **kwargs)
+
+    def shutdown(self, wait=True):
+        if self._scheduler is not None:
+            self._scheduler.stop()
+        if self._jobs is not None:
+            self._jobs.close(wait=wait)
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if self._bus is not None:
+            self._bus.close(wait=wait)
+        for store in self._stores:
+            store.close()
+
+    def _pool(self):
+        executor = self._executor
+        if executor is None:
+            with self._registry_lock:
+                executor = self._executor
+                if executor is None:
+                    executor = self._executor = ThreadPoolExecutor(
+                        max_workers=_default_workers(),
+                        thread_name_prefix=f"{self.name}-call",
+                    )
+        return executor
+
+    def _branch(self, i, path, args, kwargs):
+        _worker.active = True
+        span = child_span(f"call_many[{i}]", path if isinstance(path, str) else "/" + "/".join(path))
+        result = error = None
+        try:
+            result = self.call_sync(path, *args, **kwargs)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            finish_span(span, result, error)
+            _worker.active = False
+
+    def _run_sync(self, jobs, ordered, concurrency):
+        limit = concurrency or _default_workers()
+
+        # Inside a pool worker, fanning out again could starve the pool: run inline.
+        if limit <= 1 or getattr(_worker, "active", False):
+            for path, args, kwargs in jobs:
+                yield self.call_sync(path, *args, **kwargs)
+            return
+
+        pool = self._pool()
+        pending = deque() if ordered else set()
+        try:
+            for i, (path, args, kwargs) in enumerate(jobs):
+                if len(pending) >= limit:
+                    if ordered:
+                        yield pending.popleft().result()
+                    else:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            pending.discard(future)
+                            yield future.result()
+
+                future = pool.submit(copy_context().run, self._branch, i, path, args, kwargs)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+
+            while pending:
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
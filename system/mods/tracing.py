@@ -0,0 +1,169 @@
+import os
+import json
+import random
+import threading
+from collections import deque
+from contextvars import ContextVar
+from time import perf_counter, time
+from system.mods.message import Message
+
+_current = ContextVar("system_span", default=None)
+
+class _Dropped:
+    """Marks a trace whose root was not sampled, so nested calls stay silent"""
+    __slots__ = ()
+
+_DROPPED = _Dropped()
+
+class Span:
+    __slots__ = (
+        "tracer", "trace_id", "span_id", "parent_id", "name", "path",
+        "start", "duration", "outcome", "code", "error", "info", "_t0", "_token",
+    )
+
+    def __init__(self, tracer, name, path, parent):
+        self.tracer = tracer
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.path = path
+        self.start = time()
+        self.duration = None
+        self.outcome = None
+        self.code = None
+        self.error = None
+        self.info = None
+        self._t0 = perf_counter()
+        self._token = None
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "path": self.path,
+            "start": self.start,
+            "duration": self.duration,
+            "outcome": self.outcome,
+            "code": self.code,
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return f"Span(name={self.name!r}, path={self.path!r}, duration={self.duration!r}, outcome={self.outcome!r})"
+
+class InMemoryExporter:
+    def __init__(self, maxlen=10000):
+        self.spans = deque(maxlen=maxlen)
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+class JsonLinesExporter:
+    def __init__(self, file):
+        self.file = file
+        self._lock = threading.Lock()
+        self._fh = open(file, "a", encoding="utf-8")
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+class Tracer:
+    """
+    Span tracer for handler dispatch:
+      - the active span lives in a contextvar, so tasks and copied contexts nest correctly
+      - rate is the fraction of root spans that are sampled; children follow their root
+      - exporter is any object with export(span), or a plain callable
+    """
+    def __init__(self, exporter=None, rate=1.0):
+        if exporter is None or exporter == "memory":
+            exporter = InMemoryExporter()
+        self.exporter = exporter
+        self.rate = float(rate)
+        self._export = exporter.export if hasattr(exporter, "export") else exporter
+
+    def start(self, name, path=None):
+        parent = _current.get()
+        if parent is _DROPPED:
+            return None
+
+        if parent is None and self.rate < 1.0 and random.random() >= self.rate:
+            return _DROPPED, _current.set(_DROPPED)
+
+        span = Span(self, name, path, parent)
+        span._token = _current.set(span)
+        return span
+
+    def finish(self, span, result=None, error=None):
+        if span is None:
+            return
+        if type(span) is tuple:
+            _current.reset(span[1])
+            return
+
+        span.duration = perf_counter() - span._t0
+        _current.reset(span._token)
+        span._token = None
+
+        if error is not None:
+            span.outcome = "error"
+            span.error = repr(error)
+        elif isinstance(result, Message):
+            success = result.success
+            if success is None and result.status is not None:
+                success = result.status == "success"
+            span.outcome = "success" if success else ("failure" if success is False else None)
+            span.code = result.code
+        else:
+            span.outcome = "success"
+
+        self._export(span)
+
+def current_span():
+    span = _current.get()
+    return None if span is _DROPPED else span
+
+def _mounted(info, func):
+    """The entry of func among the handlers of the component that dispatched info"""
+    owner = getattr(info, "owner", None)
+    for entry in (getattr(owner, "_local_handlers", None) or {}).values():
+        if getattr(entry, "func", None) is func and getattr(entry, "owner", None) is owner:
+            return entry
+    return None
+
+def child_span(name, path=None, func=None):
+    """
+    Open a span under the active trace, if there is one.
+    Without a path, func is looked up next to the handler of the nearest
+    dispatched span, so a handler mounted in several places is reported
+    where its caller reached it.
+    """
+    parent = _current.get()
+    if parent is None or parent is _DROPPED:
+        return None
+    entry = None
+    if path is None and func is not None and parent.info is not None:
+        entry = _mounted(parent.info, func)
+        if entry is not None:
+            prefix = getattr(entry.owner, "prefix", None) or []
+            path = "/" + "/".join(list(prefix) + list(entry.path))
+    span = parent.tracer.start(name, path)
+    if span is not None:
+        span.info = entry if entry is not None else parent.info
+    return span
+
+def finish_span(span, result=None, error=None):
+    if span is not None:
+        span.tracer.finish(span, result, error)
@@ -0,0 +1,222 @@
+from bisect import bisect_left
+
+def _changed(system, since):
+    """
+    (log position, paths changed since the position since) from the registry
+    change log, or (position, None) when since is unknown or no longer logged.
+    The position is read first, so every change before it is already visible
+    in the tables; changes after it may be seen twice, and are applied by
+    re-reading the tables, which is idempotent.
+    """
+    start, log = system._changes
+    end = start + len(log)
+    if since is None or since < start:
+        return end, None
+    return end, set(log[since - start:end - start])
+
+class _Index:
+    """Sorted paths of every handler and component, as of one change log position"""
+    __slots__ = ("position", "paths")
+
+    def __init__(self, position, paths):
+        self.position = position
+        self.paths = paths
+
+def _index(system):
+    index = system._walk_index
+    since = None if index is None else index.position
+    position, changed = _changed(system, since)
+    if index is not None and position == since:
+        return index
+
+    handlers, components = system._handlers, system._components_by_prefix
+    if changed is None or len(changed) > len(index.paths) // 8:
+        paths = sorted(handlers.copy().keys() | components.copy().keys())
+    else:
+        # Patch a copy of the previous order: walks in progress keep theirs.
+        paths = list(index.paths)
+        for path in changed:
+            present = path in handlers or path in components
+            i = bisect_left(paths, path)
+            found = i < len(paths) and paths[i] == path
+            if present and not found:
+                paths.insert(i, path)
+            elif found and not present:
+                del paths[i]
+
+    index = _Index(position, paths)
+    system._walk_index = index
+    return index
+
+def walk(system, prefix=(), kind=None, depth=None):
+    """
+    Yield the HandlerInfo and component entries under prefix in path order,
+    down to depth levels below it (all levels by default), from one range
+    scan of the sorted path index. A handler and a component at the same
+    path are yielded handler first.
+    """
+    kind = (kind or "both").lower()
+    if kind not in ("handler", "component", "both"):
+        raise ValueError(f"kind must be 'handler', 'component' or 'both', got {kind!r}")
+    prefix = tuple(prefix)
+    paths = _index(system).paths
+    handlers, components = system._handlers, system._components_by_prefix
+    n = len(prefix)
+    limit = None if depth is None else n + depth
+    want_handlers = kind != "component"
+    want_components = kind != "handler"
+
+    for i in range(bisect_left(paths, prefix), len(paths)):
+        path = paths[i]
+        if path[:n] != prefix:
+            return
+        if len(path) == n or (limit is not None and len(path) > limit):
+            continue
+        if want_handlers:
+            info = handlers.get(path)
+            if info is not None:
+                yield info
+        if want_components:
+            comp = components.get(path)
+            if comp is not None:
+                yield comp
+
+def _route(path):
+    return "/" + "/".join(path)
+
+def _handler_node(info, children, comp=None):
+    node = {
+        "type": "handler",
+        "name": info.name,
+        "path": _route(info.path),
+        "async": getattr(info.func, "is_async", False),
+        "meta": dict(info.meta),
+        "children": children,
+    }
+    if comp is not None:
+        node["component"] = {"name": getattr(comp, "name", ""), "desc": getattr(comp, "desc", "")}
+    return node
+
+def _component_node(path, comp, children):
+    return {
+        "type": "component",
+        "name": getattr(comp, "name", ""),
+        "path": _route(path),
+        "desc": getattr(comp, "desc", ""),
+        "children": children,
+    }
+
+class _Tree:
+    """
+    Persistent nested-dict snapshot of the registry. An update copies only the
+    nodes on the way to what changed, so a snapshot handed out earlier is never
+    modified and unchanged subtrees are shared between snapshots.
+    """
+    __slots__ = ("position", "root", "_fresh")
+
+    def __init__(self):
+        self.position = None
+        self.root = {"type": "system", "children": {}}
+        self._fresh = set()
+
+    def _own(self, node):
+        if id(node) in self._fresh:
+            return node
+        node = {**node, "children": dict(node["children"])}
+        self._fresh.add(id(node))
+        return node
+
+    def _new(self, node):
+        self._fresh.add(id(node))
+        return node
+
+    def _descend(self, path, create):
+        """The owned nodes from the root down to the parent of path"""
+        node = self.root = self._own(self.root)
+        stack = [node]
+        for seg in path[:-1]:
+            child = node["children"].get(seg)
+            if child is None:
+                if not create:
+                    return None
+                child = self._new({"type": "path", "children": {}})
+            else:
+                child = self._own(child)
+            node["children"][seg] = child
+            node = child
+            stack.append(node)
+        return stack
+
+    def _set(self, path, make):
+        parent = self._descend(path, create=True)[-1]
+        old = parent["children"].get(path[-1])
+        children = dict(old["children"]) if old is not None else {}
+        parent["children"][path[-1]] = self._new(make(children))
+
+    def _drop(self, path):
+        stack = self._descend(path, create=False)
+        if stack is None:
+            return
+        parent = stack[-1]
+        old = parent["children"].get(path[-1])
+        if old is None:
+            return
+        if old["children"]:
+            parent["children"][path[-1]] = self._new({"type": "path", "children": dict(old["children"])})
+        else:
+            del parent["children"][path[-1]]
+            # Prune intermediate nodes left without children.
+            for depth in range(len(stack) - 1, 0, -1):
+                node = stack[depth]
+                if node["type"] != "path" or node["children"]:
+                    break
+                del stack[depth - 1]["children"][path[depth - 1]]
+
+    def refresh(self, system):
+        position, changed = _changed(system, self.position)
+        if position == self.position:
+            return self.root
+        self._fresh = set()
+
+        handlers, components = system._handlers, system._components_by_prefix
+        if changed is None:
+            self.root = self._new({"type": "system", "children": {}})
+            changed = handlers.keys() | components.keys()
+        for path in changed:
+            if not path:
+                continue
+            info, comp = handlers.get(path), components.get(path)
+            if info is not None:
+                self._set(path, lambda ch, info=info, c=comp: _handler_node(info, ch, c))
+            elif comp is not None:
+                self._set(path, lambda ch, p=path, c=comp: _component_node(p, c, ch))
+            else:
+                self._drop(path)
+
+        root = self.root = self._own(self.root)
+        root["name"] = getattr(system, "name", "")
+        root["desc"] = getattr(system, "desc", "")
+        root["handlers"] = len(handlers)
+        root["components"] = len(components)
+        self.position = position
+        self._fresh = set()
+        return root
+
+def export_tree(system):
+    """
+    Snapshot of the whole registry as nested dicts of plain values:
+    {"type": "system", ..., "children": {segment: node}} where a node is a
+    handler, a component or an intermediate "path", each with its own
+    children. A handler and a component at the same path share one node:
+    the handler's, with the component under "component". It is rebuilt
+    incrementally from the registry changes since the previous export, and
+    must be treated as read-only.
+    """
+    tree = system._tree
+    if tree is None:
+        with system._registry_lock:
+            tree = system._tree
+            if tree is None:
+                tree = system._tree = _Tree()
+    with system._registry_lock:
+        return tree.refresh(system)
@@ -0,0 +1,22 @@
+import pytest
+from system import new
+
+@pytest.fixture
+def act():
+    return new.handler(name="act")
+
+@pytest.fixture
+def Api(act):
+    Api = new.component("Api")
+    Api.attach(name="act", handler=act)
+    return Api
+
+@pytest.fixture
+def Root(Api):
+    Root = new.system("Root")
+    Root.allow(Api)
+    return Root
+
+@pytest.fixture
+def system(Root):
+    return Root()
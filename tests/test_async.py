@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+from system.mods.handler import Handler
+
+@pytest.fixture
+def api(act, Api, system):
+    api = Api(name="api", prefix="/api")
+
+    async def double(x: Int) -> Message:
+        await asyncio.sleep(0)
+        return act.success(data=2 * x)
+    api.act("/double")(double)
+
+    async def wrong(x: Int) -> Message:
+        return x
+    api.act("/wrong")(wrong)
+    system.include(api, None)
+    return api
+
+def test_async_handler_keeps_its_codomain(api):
+    h = api["/double"]
+    assert h.is_async
+    assert h.cod is Message
+    assert isinstance(h, Handler)
+
+@pytest.mark.usefixtures("api")
+def test_async_handler_from_sync_and_async_callers(act, system):
+    assert system.call_sync("/api/double", x=2).data == 4
+    assert asyncio.run(system.call("/api/double", x=3)).data == 6
+
+    async def fan():
+        return await asyncio.gather(*(act.acall(system["/api/double"], x=i) for i in range(3)))
+    assert [msg.data for msg in asyncio.run(fan())] == [0, 2, 4]
+
+def test_async_handler_checks_arguments_on_call(api):
+    with pytest.raises(TypeError):
+        api["/double"](x="nope")
+
+@pytest.mark.usefixtures("api")
+def test_async_handler_checks_the_awaited_result(system):
+    with pytest.raises(TypeError):
+        system.call_sync("/api/wrong", x=1)
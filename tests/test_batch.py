@@ -0,0 +1,82 @@
+import pytest
+from typed import Int
+from system import Message
+from system.mods.helper import _prefixes
+
+@pytest.fixture
+def handler(act):
+    def make(tag):
+        def run(x: Int) -> Message:
+            return act.success(message=tag, data=x)
+        run.__name__ = tag
+        return run
+    return make
+
+@pytest.fixture
+def api(Api, system, handler):
+    api = Api(name="api", prefix="/api")
+    api.act("/a")(handler("a"))
+    system.include(api, None)
+    return api
+
+def test_direct_registration_writes_in_place(system, api, handler):
+    handlers, components = system._handlers, system._components_by_prefix
+    for i in range(50):
+        api.act(f"/h{i}")(handler(f"h{i}"))
+    assert system._handlers is handlers
+    assert system._components_by_prefix is components
+    assert len(handlers) == 51
+    assert system.call_sync("/api/h7", x=1).message == "h7"
+
+def test_batch_publishes_new_tables_at_the_end(system, api, handler):
+    handlers = system._handlers
+    with system.batch():
+        api.act("/b")(handler("b"))
+        assert ("api", "b") not in system._handlers
+        assert system.get_handler_info("/api/b") is None
+    assert system._handlers is not handlers
+    assert ("api", "b") not in handlers
+    assert system.call_sync("/api/b", x=1).message == "b"
+
+def test_batch_stages_prefix_index(system, api, handler):
+    index = _prefixes(system)
+    with system.batch():
+        api.act("/new/deep")(handler("deep"))
+        assert ("api", "new") not in system._prefix_index
+        with pytest.raises(AttributeError):
+            system.api.new
+    assert ("api", "new") in system._prefix_index
+    assert ("api", "new") not in index
+    assert system.api.new.deep(x=2).message == "deep"
+
+def test_failed_batch_publishes_nothing(system, api, handler):
+    handlers, index = system._handlers, dict(_prefixes(system))
+    with pytest.raises(RuntimeError):
+        with system.batch():
+            api.act("/c")(handler("c"))
+            raise RuntimeError("abort")
+    assert system._handlers is handlers
+    assert system._prefix_index == index
+    assert ("c",) not in api._local_handlers
+    assert system.get_handler_info("/api/c") is None
+
+def test_removals_patch_the_prefix_index(Api, system, api, handler):
+    other = Api(name="other", prefix="/api/other")
+    other.act("/x")(handler("x"))
+    system.include(other, None)
+    index = _prefixes(system)
+    assert index[("api",)] == 2
+    other.detach()
+    assert system._prefix_index is index
+    assert index == {("api",): 1, ("api", "a"): 1}
+    api.detach()
+    assert system._prefix_index is index and not index
+    with pytest.raises(AttributeError):
+        system.api
+
+def test_batch_overwrites_keep_the_prefix_count(system, api, handler):
+    index = dict(_prefixes(system))
+    with system.batch():
+        api.act("/a")(handler("a2"))
+    assert system._prefix_index == index
+    assert system.call_sync("/api/a", x=1).message == "a2"
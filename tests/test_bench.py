@@ -0,0 +1,40 @@
+import pytest
+from argparse import Namespace
+from typed import Int
+from system import Message
+from system.mods import bench
+from system.mods.bench import _targets
+
+@pytest.fixture
+def system(act, Api, system):
+    api = Api(name="api", prefix="/api")
+    def ping() -> Message:
+        return act.success()
+    def echo(x: Int) -> Message:
+        return act.success(data=x)
+    def page(x: Int = 0) -> Message:
+        return act.success(data=x)
+    api.act("/ping")(ping)
+    api.act("/echo")(echo)
+    api.act("/page")(page)
+    system.include(api, None)
+    return system
+
+def _args(**kwargs):
+    return Namespace(**dict(dict(system="app:system", path=None, kwargs=None), **kwargs))
+
+def test_default_targets_need_no_arguments(system):
+    paths = [path for path, _ in _targets(system, _args())]
+    assert sorted(paths) == [("api", "page"), ("api", "ping")]
+
+def test_default_targets_take_the_given_kwargs(system):
+    targets = _targets(system, _args(kwargs='{"x": 2}'))
+    assert sorted(targets) == [(("api", "echo"), {"x": 2}), (("api", "page"), {"x": 2})]
+
+def test_explicit_paths(system):
+    assert _targets(system, _args(path=["/api/echo"], kwargs='{"x": 1}')) == [("/api/echo", {"x": 1})]
+
+def test_no_target_is_an_error(system, monkeypatch):
+    monkeypatch.setattr(bench, "_load", lambda spec: system)
+    with pytest.raises(SystemExit):
+        bench.main(["--system", "app:system", "--kwargs", '{"y": 1}', "--requests", "1", "--warmup", "0"])
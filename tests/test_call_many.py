@@ -0,0 +1,57 @@
+import time
+import threading
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def threads():
+    return set()
+
+@pytest.fixture
+def system(act, Api, system, threads):
+    api = Api(name="api", prefix="/api")
+
+    def slow(x: Int) -> Message:
+        threads.add(threading.current_thread())
+        time.sleep(0.002 * (5 - x % 5))
+        return act.success(data=x)
+    api.act("/slow")(slow)
+
+    def boom(x: Int) -> Message:
+        raise ValueError(f"boom {x}")
+    api.act("/boom")(boom)
+
+    def fan(x: Int) -> Message:
+        inner = system.call_many_sync(*(("/api/slow", (), {"x": i}) for i in range(x)))
+        return act.success(data=[threading.current_thread() in threads, [m.data for m in inner]])
+    api.act("/fan")(fan)
+    system.include(api, None)
+    return system
+
+def test_results_keep_call_order(system):
+    results = system.call_many_sync(*(("/api/slow", (), {"x": i}) for i in range(20)), concurrency=4)
+    assert [m.data for m in results] == list(range(20))
+    assert sorted(m.data for m in system.map("/api/slow", ({"x": i} for i in range(20)), ordered=False)) == list(range(20))
+
+def test_pool_is_reused_across_calls(system, threads):
+    system.call_many_sync(*(("/api/slow", (), {"x": i}) for i in range(10)))
+    pool = system._executor
+    list(system.map("/api/slow", ({"x": i} for i in range(10))))
+    assert system._executor is pool
+    assert len(threads) <= pool._max_workers
+    system.shutdown()
+
+def test_nested_fan_out_runs_inline_in_the_worker(system):
+    outer = system.call_many_sync(("/api/fan", (), {"x": 3}), ("/api/fan", (), {"x": 2}))
+    for msg, size in zip(outer, (3, 2)):
+        # The fan handler's own thread ran its inner calls.
+        in_worker, data = msg.data
+        assert in_worker and data == list(range(size))
+
+def test_first_error_propagates(system):
+    with pytest.raises(ValueError, match="boom 1"):
+        system.call_many_sync(("/api/slow", (), {"x": 0}), ("/api/boom", (), {"x": 1}))
+    results = system.map("/api/boom", [{"x": 2}])
+    with pytest.raises(ValueError, match="boom 2"):
+        next(results)
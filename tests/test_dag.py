@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def order():
+    return []
+
+@pytest.fixture
+def system(act, Api, system, order):
+    api = Api(name="api", prefix="/api")
+
+    async def value(x: Int) -> Message:
+        order.append(("value", x))
+        await asyncio.sleep(0.01 * x)
+        return act.success(data=x)
+    api.act("/value")(value)
+
+    def add(a: Int, b: Int) -> Message:
+        order.append(("add", a, b))
+        return act.success(data=a + b)
+    api.act("/add")(add)
+
+    def fail(x: Int) -> Message:
+        order.append(("fail", x))
+        return act.failure(code=500)
+    api.act("/fail")(fail)
+    system.include(api, None)
+    return system
+
+def test_nodes_run_after_their_dependencies(system, order):
+    run = asyncio.run(system.run_graph({
+        "a": ("/api/value", {"x": 1}),
+        "b": ("/api/value", {"x": 2}),
+        "sum": ("/api/add", lambda a, b: {"a": a, "b": b}),
+        "again": ("/api/add", lambda sum: {"a": sum, "b": sum}),
+    }))
+    assert run.ok
+    assert run["sum"].data == 3 and run["again"].data == 6
+    assert order.index(("add", 1, 2)) > max(order.index(("value", 1)), order.index(("value", 2)))
+    assert order[-1] == ("add", 3, 3)
+
+def test_cycles_and_unknown_dependencies_are_rejected(system):
+    with pytest.raises(ValueError, match="Cycle"):
+        system.graph({
+            "a": ("/api/add", lambda b: {"a": b, "b": 0}),
+            "b": ("/api/add", lambda a: {"a": a, "b": 0}),
+        })
+    with pytest.raises(KeyError):
+        system.graph({"a": ("/api/add", lambda missing: {})})
+
+def test_a_failure_skips_everything_downstream(system, order):
+    run = system.graph({
+        "a": ("/api/fail", {"x": 1}),
+        "b": ("/api/add", lambda a: {"a": 1, "b": 1}),
+        "c": ("/api/add", lambda b: {"a": 1, "b": 1}),
+        "d": ("/api/value", {"x": 1}),
+    }).run_sync()
+    assert not run.ok
+    assert run.skipped == {"b", "c"}
+    assert "'a'" in run["c"].message and run["c"].success is False
+    assert run["d"].data == 1
+    assert not any(step[0] == "add" for step in order)
+
+def test_critical_path_follows_the_slowest_chain(system):
+    run = system.graph({
+        "fast": ("/api/value", {"x": 1}),
+        "slow": ("/api/value", {"x": 5}),
+        "sum": ("/api/add", lambda fast, slow: {"a": fast, "b": slow}),
+    }).run_sync()
+    assert run.critical_path == ["slow", "sum"]
+    assert run.critical >= run.timings["slow"][1] - run.timings["slow"][0]
+    report = run.to_dict()
+    assert report["critical_path"] == ["slow", "sum"]
+    assert set(report["nodes"]) == {"fast", "slow", "sum"}
@@ -0,0 +1,62 @@
+import time
+import threading
+from queue import Full
+import pytest
+from system import Message
+from system.mods.events import EventBus
+
+def _ok(tag):
+    def sub(**payload):
+        return Message(message=tag, data=payload, success=True, status="success")
+    return sub
+
+def test_match_orders_by_subscription(system):
+    bus = EventBus(system)
+    a = bus.subscribe("/orders/*", _ok("a"))
+    b = bus.subscribe("/orders/**", _ok("b"))
+    c = bus.subscribe("/orders/new", _ok("c"))
+    assert bus.match("/orders/new") == (a, b, c)
+    bus.unsubscribe(b)
+    assert bus.match("/orders/new") == (a, c)
+    d = bus.subscribe("/**", _ok("d"))
+    assert bus.match("/orders/new") == (a, c, d)
+    bus.close()
+
+def test_publish_sync_from_a_subscriber_delivers_inline(system):
+    bus = EventBus(system, concurrency=1)
+    bus.subscribe("/inner", _ok("inner"))
+
+    def outer(**payload):
+        reply = bus.publish_sync("/inner", n=1)
+        return Message(data=reply.data, success=reply.success, status=reply.status)
+    bus.subscribe("/outer", outer)
+
+    done = []
+    thread = threading.Thread(target=lambda: done.append(bus.publish_sync("/outer")), daemon=True)
+    thread.start()
+    thread.join(10)
+    assert done and done[0].success
+    assert done[0].data["subscribers"][0]["data"]["subscribers"][0]["data"] == {"n": 1}
+    bus.close()
+
+def test_overflow_error_enqueues_nothing(system):
+    bus = EventBus(system)
+    gate = threading.Event()
+
+    def blocked(**payload):
+        gate.wait(10)
+        return Message(success=True, status="success")
+
+    relaxed = bus.subscribe("/x", blocked, maxsize=10)
+    strict = bus.subscribe("/x", blocked, maxsize=1, overflow="error")
+    bus.emit("/x")
+    while strict.pending or relaxed.pending:
+        time.sleep(0.001)
+    bus.emit("/x")
+    before = relaxed.pending
+    with pytest.raises(Full):
+        bus.emit("/x")
+    assert relaxed.pending == before
+    assert strict.pending == 1
+    gate.set()
+    bus.close()
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import sqlite3
+import threading
+import pytest
+from types import SimpleNamespace
+from typed import Int
+from system import Message
+from system.mods.idempotency import IdempotencyStore
+
+@pytest.fixture
+def calls():
+    return []
+
+@pytest.fixture
+def started():
+    return threading.Event()
+
+@pytest.fixture
+def release():
+    return threading.Event()
+
+@pytest.fixture
+def system(act, Api, system, calls, started, release):
+    api = Api(name="api", prefix="/api")
+    def pay(amount: Int) -> Message:
+        calls.append(amount)
+        started.set()
+        release.wait(5)
+        return act.success(data=amount)
+    api.act("/pay")(pay)
+    system.include(api, None)
+    return system
+
+def test_waiters_get_a_result_that_cannot_be_stored(tmp_path):
+    store = IdempotencyStore(file=str(tmp_path / "results.sqlite3"))
+    assert store.begin("k") == (None, None)
+    _, future = store.begin("k")
+    result = SimpleNamespace(status="success", success=True, code=None, message=None, data=object())
+    store.finish("k", result)
+    assert future.result(timeout=1) is result
+    assert store.get("k") is None
+    assert store.stats()["unstored"] == 1
+    assert store.stats()["inflight"] == 0
+    assert store.begin("k") == (None, None)
+
+def test_waiters_get_the_owner_error():
+    store = IdempotencyStore()
+    store.begin("k")
+    _, future = store.begin("k")
+    store.finish("k", error=RuntimeError("boom"))
+    assert isinstance(future.exception(timeout=1), RuntimeError)
+    assert store.get("k") is None
+
+def test_duplicate_waits_for_the_running_call(system, calls, started, release, tmp_path):
+    store = system.idempotent("/api", file=str(tmp_path / "results.sqlite3"))
+
+    results = []
+    def call():
+        results.append(system.call_sync("/api/pay", amount=3, idempotency_key="a"))
+    first = threading.Thread(target=call)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=call)
+    second.start()
+    while store.stats()["waits"] == 0:
+        time.sleep(0.01)
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert not first.is_alive() and not second.is_alive()
+    assert calls == [3]
+    assert [msg.data for msg in results] == [3, 3]
+    assert system.call_sync("/api/pay", amount=3, idempotency_key="a").data == 3
+    assert calls == [3]
+
+def test_async_duplicate_of_a_sync_call_does_not_block_the_loop(system, calls, started, release):
+    store = system.idempotent("/api")
+
+    owner = threading.Thread(target=system.call_sync, args=("/api/pay",), kwargs={"amount": 3, "idempotency_key": "a"})
+    owner.start()
+    started.wait(5)
+
+    async def main():
+        ticks = 0
+        duplicate = asyncio.ensure_future(system.call("/api/pay", amount=3, idempotency_key="a"))
+        while store.stats()["waits"] == 0:
+            await asyncio.sleep(0.01)
+        while ticks < 3:
+            ticks += 1
+            await asyncio.sleep(0.01)
+        # The loop kept running while the owner was still inside the handler.
+        running = owner.is_alive()
+        release.set()
+        return running, await duplicate
+
+    running, msg = asyncio.run(main())
+    owner.join(5)
+    assert running and msg.data == 3
+    assert calls == [3]
+
+def test_shutdown_closes_the_store_connections(system, tmp_path):
+    store = system.idempotent("/api", file=str(tmp_path / "results.sqlite3"))
+    thread = threading.Thread(target=store.get, args=("k",))
+    thread.start()
+    thread.join()
+    conns = list(store._conns.values())
+    assert len(conns) == 2
+    system.shutdown()
+    assert not store._conns
+    for db in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.execute("SELECT 1")
@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def calls():
+    return []
+
+@pytest.fixture
+def system(act, Api, system, calls):
+    api = Api(name="api", prefix="/api")
+    def sleep(delay: Int) -> Message:
+        calls.append(delay)
+        return act.success(data=delay)
+    api.act("/sleep")(sleep)
+    system.include(api, None)
+    return system
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_delay_kwarg_reaches_the_handler(system, calls):
+    queue = system.jobs()
+    queue.enqueue("/api/sleep", delay=7)
+    assert queue.stats()["ready"] == 1
+    assert queue.drain() == 1
+    assert calls == [7]
+    queue.enqueue("/api/sleep", _delay=60, delay=3)
+    assert queue.stats()["delayed"] == 1
+    system.shutdown()
+
+def test_default_queue_is_temporary(system):
+    cwd = set(os.listdir())
+    queue = system.jobs()
+    assert os.path.dirname(queue.file) != os.getcwd()
+    assert set(os.listdir()) == cwd
+    system.shutdown()
+    assert not os.path.exists(queue.file)
+
+def test_enqueue_needs_an_open_queue(system):
+    with pytest.raises(RuntimeError, match="jobs"):
+        system.enqueue("/api/sleep", delay=1)
+    assert system._jobs is None
+
+def test_enqueue_starts_the_workers(system, calls, tmp_path):
+    system.jobs(file=str(tmp_path / "jobs.sqlite3"))
+    system.enqueue("/api/sleep", delay=1)
+    _wait(lambda: calls == [1])
+    assert system._jobs.stats()["workers"] == system._jobs.concurrency
+    system.shutdown()
+
+def test_close_closes_every_connection(system, calls, tmp_path):
+    queue = system.jobs(file=str(tmp_path / "jobs.sqlite3"), concurrency=2)
+    threads = [threading.Thread(target=queue.enqueue, args=("/api/sleep",), kwargs={"delay": i}) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.start()
+    _wait(lambda: len(calls) == 3)
+    conns = list(queue._conns.values())
+    assert conns
+    system.shutdown()
+    assert not queue._conns
+    for db in conns:
+        with pytest.raises(Exception, match="closed"):
+            db.execute("SELECT 1")
+    with pytest.raises(Exception, match="closed"):
+        queue.enqueue("/api/sleep", delay=0)
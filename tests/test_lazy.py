@@ -0,0 +1,97 @@
+import sys
+import copy
+import json
+import pickle
+import hashlib
+import pytest
+from system import Message, lazy, LazyBytes, LazyList
+
+CONTENT = b"header,rows\n" + b"x" * 1000
+
+@pytest.fixture
+def payload(tmp_path):
+    path = tmp_path / "payload.bin"
+    path.write_bytes(CONTENT)
+    return lazy.file(path)
+
+def test_bytes_methods_see_the_content(payload):
+    assert len(payload) == len(CONTENT) and not payload.loaded
+    assert payload.startswith(b"header")
+    assert payload.find(b"rows") == CONTENT.find(b"rows")
+    assert payload.split(b"\n")[0] == b"header,rows"
+    assert payload.hex() == CONTENT.hex()
+    assert payload.decode().endswith("x")
+    assert payload + b"!" == CONTENT + b"!"
+    assert b"!" + payload == b"!" + CONTENT
+    assert payload * 2 == CONTENT * 2
+    assert payload == CONTENT and payload == lazy.bytes(lambda: CONTENT)
+    assert payload[:6] == b"header" and payload[0] == CONTENT[0]
+    assert b"rows" in payload
+    assert hash(payload) == hash(CONTENT)
+    assert bytes(payload) == CONTENT
+
+def test_buffer_consumers_never_see_empty_data(payload, tmp_path):
+    if sys.version_info >= (3, 12):
+        assert hashlib.sha256(payload).digest() == hashlib.sha256(CONTENT).digest()
+        assert b"".join([payload]) == CONTENT
+    else:
+        with pytest.raises(TypeError):
+            hashlib.sha256(payload)
+        with pytest.raises(TypeError):
+            b"".join([payload])
+        with pytest.raises(TypeError):
+            with open(tmp_path / "out.bin", "wb") as f:
+                f.write(payload)
+    assert b"".join(payload.stream(100)) == CONTENT
+
+def test_copies(payload):
+    assert copy.copy(payload) is payload and not payload.loaded
+    assert pickle.loads(pickle.dumps(payload)) == CONTENT
+
+def test_list_methods_see_the_items():
+    items = lazy.list(lambda: [3, 1, 2])
+    assert not items.loaded
+    assert items.count(1) == 1 and items.index(2) == 2
+    assert items + [4] == [3, 1, 2, 4] and [0] + items == [0, 3, 1, 2]
+    assert sorted(items) == [1, 2, 3] and list(reversed(items)) == [2, 1, 3]
+    assert json.dumps(items.materialize()) == "[3, 1, 2]"
+    with pytest.raises(TypeError):
+        json.dumps(items)
+    assert copy.copy(items) == [3, 1, 2] and type(copy.copy(items)) is list
+    items.append(4)
+    items += [5]
+    assert isinstance(items, LazyList) and items == [3, 1, 2, 4, 5]
+
+def test_fetch_reads_ranges_only():
+    reads = []
+    def fetch(start, stop):
+        reads.append((start, stop))
+        return list(range(start, stop))
+    items = lazy.list(length=10, fetch=fetch)
+    assert len(items) == 10 and items[3] == 3 and items[-1] == 9 and items[2:4] == [2, 3]
+    assert not items.loaded and (0, 10) not in reads
+    assert 5 in items and items.loaded
+
+def test_message_passes_lazy_data_through(act, Api, system, payload):
+    api = Api(name="api", prefix="/api")
+    def read() -> Message:
+        return act.success(data=payload)
+    api.act("/read")(read)
+    system.include(api, None)
+    msg = system.call_sync("/api/read")
+    assert isinstance(msg.data, LazyBytes) and not payload.loaded
+    assert msg.data == CONTENT
+    with pytest.raises(Exception):
+        Message(data=1.5)
+
+def test_message_leaves_lazy_lists_unread(act):
+    reads = []
+    def fetch(start, stop):
+        reads.append((start, stop))
+        return list(range(start, stop))
+    items = lazy.list(fetch=fetch, length=10 ** 9)
+    msg = act.success(data=items)
+    assert msg.data is items and not items.loaded and reads == []
+    loaded = lazy.list(lambda: [1, 2])
+    assert Message(data=loaded).data is loaded and not loaded.loaded
+    assert loaded == [1, 2] and loaded != (1, 2) and loaded == lazy.list(lambda: [1, 2])
@@ -0,0 +1,49 @@
+import pytest
+from typed import Int
+from system import Message
+from system.mods.helper import _LOOKUP_CACHE_SIZE
+
+@pytest.fixture
+def component(act, Api):
+    def make(name, prefix, n=1):
+        api = Api(name=name, prefix=prefix)
+        for i in range(n):
+            def get(x: Int) -> Message:
+                return act.success(data=x)
+            api.act(f"/h{i}")(get)
+        return api
+    return make
+
+def test_cache_evicts_oldest_entry_first(system, component):
+    system.include(component("api", "/api", _LOOKUP_CACHE_SIZE + 1), None)
+    for i in range(_LOOKUP_CACHE_SIZE):
+        system.get_handler_info(f"/api/h{i}")
+    cache = system._lookup_cache
+    assert len(cache) == _LOOKUP_CACHE_SIZE
+    system.get_handler_info(f"/api/h{_LOOKUP_CACHE_SIZE}")
+    assert len(cache) == _LOOKUP_CACHE_SIZE
+    assert "/api/h0" not in cache and "/api/h1" in cache
+    assert f"/api/h{_LOOKUP_CACHE_SIZE}" in cache
+
+def test_include_exclude_and_replace_drop_the_cache(system, component):
+    api = component("api", "/api")
+    system.include(api, None)
+    assert system.get_handler_info("/api/h0").owner is api
+
+    system.include(component("other", "/other"), None)
+    assert "/api/h0" not in system._lookup_cache
+    assert system.get_handler_info("/api/h0").owner is api
+
+    new_api = component("api", "")
+    system.replace("/api", new_api)
+    assert system.get_handler_info("/api/h0").owner is new_api
+
+    system.exclude(new_api)
+    assert system.get_handler_info("/api/h0") is None
+
+def test_misses_are_not_cached(system, component):
+    assert system.get_handler_info("/late/h0") is None
+    assert "/late/h0" not in system._lookup_cache
+    late = component("late", "/late")
+    system.include(late, None)
+    assert system.get_handler_info("/late/h0").owner is late
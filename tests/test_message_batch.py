@@ -0,0 +1,68 @@
+import pytest
+from system import Message
+from system.mods import batch as batch_mod
+from system.mods.batch import MessageBatch
+
+@pytest.fixture(params=["array", "numpy"])
+def columns(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(batch_mod, "_np", None)
+    return request.param
+
+def _batch():
+    return MessageBatch([
+        Message(data=0, success=True, status="success", code=200),
+        Message(data=1, success=False, status="failure", code=500),
+        Message(data=2, status="failure"),
+        Message(data=3, success=True, code=200),
+        Message(data=4, message="late", success=False, code=504),
+    ])
+
+def test_columns(columns):
+    batch = _batch()
+    assert len(batch) == 5
+    assert list(batch.ok) == [1, 0, 0, 1, 0]
+    assert list(batch.success) == [1, 0, -1, 1, 0]
+    assert list(batch.status) == [1, 2, 2, 0, 0]
+    assert list(batch.code)[2] == MessageBatch.NO_CODE
+    # Columns are copies: the batch can grow while they are in use.
+    ok = batch.ok
+    batch.append(Message(data=5, success=True))
+    assert len(ok) == 5 and len(batch.ok) == 6
+
+def test_filters(columns):
+    batch = _batch()
+    assert [m.data for m in batch.failures()] == [1, 2, 4]
+    assert [m.data for m in batch.successes()] == [0, 3]
+    assert [m.data for m in batch.by_code(200)] == [0, 3]
+    assert [m.data for m in batch.by_code(500, None)] == [1, 2]
+    assert len(batch.by_code(404)) == 0
+    assert batch.counts() == {200: 2, 500: 1, 504: 1, None: 1}
+    assert batch.summary() == {"total": 5, "succeeded": 2, "failed": 3, "codes": batch.counts()}
+
+def test_messages_round_trip(columns):
+    batch = _batch()
+    msg = batch[4]
+    assert isinstance(msg, Message)
+    assert (msg.message, msg.data, msg.success, msg.status, msg.code) == ("late", 4, False, None, 504)
+    assert batch[-3].code is None and batch[-3].success is None
+    assert [m.data for m in batch] == [0, 1, 2, 3, 4]
+    with pytest.raises(IndexError):
+        batch[5]
+
+def test_slices_and_take(columns):
+    batch = _batch()
+    part = batch[1:4]
+    assert isinstance(part, MessageBatch)
+    assert [m.data for m in part] == [1, 2, 3] and list(part.ok) == [0, 0, 1]
+    assert [m.data for m in batch[::-2]] == [4, 2, 0]
+    assert [m.code for m in batch.take([3, 0])] == [200, 200]
+    assert len(batch[5:]) == 0 and batch[5:].counts() == {}
+
+def test_empty(columns):
+    batch = MessageBatch()
+    assert len(batch) == 0 and list(batch.ok) == []
+    assert len(batch.failures()) == 0
+    assert batch.summary() == {"total": 0, "succeeded": 0, "failed": 0, "codes": {}}
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from typed import Int
+from system import Message
+from system.mods.metrics import Metrics
+
+@pytest.fixture
+def api(act, Api):
+    api = Api(name="api", prefix="/api")
+    def get(x: Int) -> Message:
+        return act.success(data=x)
+    api.act("/get")(get)
+    return api
+
+@pytest.fixture
+def system(Root, api):
+    system = Root(metrics=True)
+    system.include(api, None)
+    return system
+
+def test_metrics_count_calls(system):
+    for i in range(3):
+        system.call_sync("/api/get", x=i)
+    assert system.metrics()["handlers"]["/api/get"]["calls"] == 3
+
+def test_metrics_are_off_by_default(Root, api):
+    system = Root()
+    assert system.metrics is None
+    system.include(api, None)
+    assert system.call_sync("/api/get", x=1).data == 1
+    assert "metrics" not in system.info("/api")
+
+def test_dead_thread_shards_are_folded(system):
+    threads = [
+        threading.Thread(target=system.call_sync, args=("/api/get",), kwargs={"x": i})
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert system.metrics()["handlers"]["/api/get"]["calls"] == 20
+    assert all(thread.is_alive() for thread, _ in system.metrics._shards)
+    assert system.metrics()["handlers"]["/api/get"]["calls"] == 20
+
+def test_reset_clears_retired(system):
+    metrics = Metrics()
+    system.metrics = system._metrics = metrics
+    thread = threading.Thread(target=system.call_sync, args=("/api/get",), kwargs={"x": 1})
+    thread.start()
+    thread.join()
+    assert metrics()["handlers"]["/api/get"]["calls"] == 1
+    metrics.reset()
+    assert metrics()["handlers"] == {}
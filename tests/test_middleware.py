@@ -0,0 +1,61 @@
+import pytest
+from typed import Int
+from system import Message
+from system.mods.middleware import Middleware
+
+@pytest.fixture
+def system(act, Api, system):
+    for name in ("a", "b"):
+        comp = Api(name=name, prefix=f"/{name}")
+        def get(x: Int) -> Message:
+            return act.success(data=x)
+        comp.act("/get")(get)
+        system.include(comp, None)
+    return system
+
+def test_shared_middleware_is_scoped_per_use(system):
+    seen = []
+    mw = Middleware(before=lambda info, args, kwargs: seen.append(info.path))
+    a = system.use(mw, "/a")
+    b = system.use(mw, "/b")
+    assert mw.prefix == ()
+    assert (a.prefix, b.prefix) == (("a",), ("b",))
+    system.call_sync("/a/get", x=1)
+    system.call_sync("/b/get", x=1)
+    assert seen == [("a", "get"), ("b", "get")]
+
+def test_unuse_removes_the_returned_middleware(system):
+    seen = []
+    mw = system.use(Middleware(before=lambda info, args, kwargs: seen.append(1)), "/a")
+    system.call_sync("/a/get", x=1)
+    system.unuse(mw)
+    system.call_sync("/a/get", x=1)
+    assert seen == [1]
+
+def test_chains_are_compiled_before_the_first_call(act, Api, system, monkeypatch):
+    from system.mods import system_
+    system.use(around=lambda info, call, args, kwargs: call(*args, **kwargs), prefix="/a")
+    assert set(system._chains) == {("a", "get"), ("b", "get")}
+    comp = Api(name="c", prefix="/c")
+    def get(x: Int) -> Message:
+        return act.success(data=x)
+    comp.act("/get")(get)
+    system.include(comp, None)
+    assert ("c", "get") in system._chains
+
+    monkeypatch.setattr(system_, "compile_chain", None)
+    assert system.call_sync("/c/get", x=1).data == 1
+    system.exclude(comp)
+    assert ("c", "get") not in system._chains
+
+def test_before_and_after_run_outside_around(system):
+    seen = []
+    system.use(
+        before=lambda info, args, kwargs: seen.append("before"),
+        after=lambda info, result: seen.append("after"),
+        around=lambda info, call, args, kwargs: seen.append("around") or call(*args, **kwargs),
+        prefix="/a",
+    )
+    system.use(around=lambda info, call, args, kwargs: seen.append("outer") or call(*args, **kwargs), prefix="/")
+    system.call_sync("/a/get", x=1)
+    assert seen == ["before", "outer", "around", "after"]
@@ -0,0 +1,63 @@
+import pytest
+from typed import Int, Maybe
+from system import Message
+
+@pytest.fixture
+def calls():
+    return []
+
+@pytest.fixture
+def api(act, Api, system, calls):
+    api = Api(name="api", prefix="/api")
+    def numbers(cursor: Maybe(Int) = None, page_size: Int = 3) -> Message:
+        start = cursor or 0
+        calls.append(start)
+        stop = min(start + page_size, 10)
+        return act.page(list(range(start, stop)), stop if stop < 10 else None)
+    def whole(cursor: Maybe(Int) = None) -> Message:
+        return act.success(data=[cursor, 1, 2])
+    api.act("/numbers", paginated=True)(numbers)
+    api.act("/whole")(whole)
+    system.include(api, None)
+    return api
+
+def test_pagination_is_opt_in(act, api):
+    assert api.numbers.is_paginated
+    assert not api.whole.is_paginated
+    def plain(x: Int) -> Message:
+        return act.success(data=x)
+    with pytest.raises(TypeError):
+        act(plain, paginated=True)
+
+def test_iter_data_walks_every_page(act, api, calls):
+    assert list(act.iter_data(api.numbers, page_size=4)) == list(range(10))
+    assert calls == [0, 4, 8]
+    assert list(act.iter_data(api.numbers, page_size=4, prefetch=False)) == list(range(10))
+
+def test_iter_data_is_lazy(act, api, calls):
+    items = act.iter_data(api.numbers, page_size=3, prefetch=False)
+    assert next(items) == 0
+    assert calls == [0]
+
+def test_data_hands_each_page_to_the_callback(act, api):
+    pages = []
+    assert act.data(api.numbers, callback=pages.append, page_size=5) is None
+    assert pages == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+    with pytest.raises(TypeError):
+        act.data(api.numbers, page_size=5)
+    with pytest.raises(ValueError):
+        act.data(api.numbers, callback=pages.append, page_size=0)
+
+def test_page_size_is_rejected_on_other_handlers(act, api):
+    with pytest.raises(TypeError):
+        act.data(api.whole, callback=list, page_size=2)
+    with pytest.raises(TypeError):
+        list(act.iter_data(api.whole, page_size=2))
+    assert list(act.iter_data(api.whole, cursor=0)) == [0, 1, 2]
+
+def test_data_keeps_its_contract(act, api):
+    assert act.data(api.whole) == [None, 1, 2]
+    with pytest.raises(TypeError):
+        act.data(api.whole, propagate="sometimes")
+    with pytest.raises(TypeError):
+        act.data(lambda: None)
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def build(act, Api, Root):
+    def make(seen):
+        system = Root()
+        api = Api(name="api", prefix="/api")
+
+        def inc(x: Int) -> Message:
+            seen.append("inc")
+            return act.success(data={"x": x + 1})
+        api.act("/inc")(inc)
+
+        def double(x: Int) -> Message:
+            seen.append("double")
+            return act.success(data=2 * x)
+        api.act("/double")(double)
+
+        def check(n: Int) -> Message:
+            seen.append("check")
+            if n > 10:
+                return act.failure(code=400, message="too big")
+            return act.success(data=n)
+        api.act("/check")(check)
+
+        async def square(n: Int) -> Message:
+            seen.append("square")
+            return act.success(data=n * n)
+        api.act("/square")(square)
+        system.include(api, None)
+        return system
+    return make
+
+def test_stages_run_in_order_and_pass_data(build):
+    seen = []
+    pipe = build(seen).pipeline("/api/inc", "/api/double", ("/api/check", "n"))
+    msg = pipe(x=2)
+    assert seen == ["inc", "double", "check"]
+    assert msg.data == 6
+
+def test_first_failure_short_circuits(build):
+    seen = []
+    pipe = build(seen).pipeline("/api/inc", "/api/double", ("/api/check", "n"), ("/api/square", "n"))
+    msg = pipe(x=9)
+    assert seen == ["inc", "double", "check"]
+    assert msg.code == 400 and msg.message == "too big"
+
+def test_sync_and_async_agree(build):
+    sync_seen, async_seen = [], []
+    stages = ("/api/inc", "/api/double", ("/api/check", "n"), ("/api/square", "n"))
+    for x in (1, 9):
+        sync_msg = build(sync_seen).pipeline(*stages)(x=x)
+        async_msg = asyncio.run(build(async_seen).pipeline(*stages).acall(x=x))
+        assert (sync_msg.data, sync_msg.code) == (async_msg.data, async_msg.code)
+    assert sync_seen == async_seen
+
+def test_acall_dispatches_the_compiled_stages(build):
+    system = build([])
+    pipe = system.pipeline("/api/inc", "/api/double")
+    asyncio.run(pipe.acall(x=1))
+    system.get_handler_info = None
+    assert asyncio.run(pipe.acall(x=1)).data == 4
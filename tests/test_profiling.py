@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+from system.mods.profiling import Profile, _match
+
+@pytest.fixture
+def system(act, Api, system):
+    api = Api(name="api", prefix="/api")
+    sub = Api(name="sub", prefix="/sub")
+    def run(x: Int) -> Message:
+        return act.success(data=x)
+    sub.act("/run")(run)
+    api.include(sub)
+    system.include(api, None)
+    return system
+
+def test_match_picks_longest_prefix():
+    outer, inner = object(), object()
+    profiles = {("api",): outer, ("api", "sub"): inner}
+    assert _match(profiles, ("api", "sub", "run")) is inner
+    assert _match(profiles, ("api", "other")) is outer
+    assert _match(profiles, ("other",)) is None
+
+def test_nested_session_gets_the_call(system):
+    outer = system.profile("/api")
+    inner = system.profile("/api/sub")
+    system.call_sync("/api/sub/run", x=1)
+    outer.stop(), inner.stop()
+    assert ("api", "sub", "run") in inner.profiles
+    assert not outer.profiles
+
+def _marker_a():
+    return sum(range(100))
+
+def _marker_b():
+    return sum(range(100))
+
+def test_async_steps_profile_only_their_own_task(system):
+    session = Profile(system, "/api")
+
+    async def a():
+        for _ in range(20):
+            _marker_a()
+            await asyncio.sleep(0)
+
+    async def b():
+        for _ in range(20):
+            _marker_b()
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(
+            session.run(("a",), a, (), {}),
+            session.run(("b",), b, (), {}),
+        )
+
+    asyncio.run(main())
+    session.stop()
+
+    def called(path):
+        return {func[2] for func in session.stats(path).stats}
+
+    assert "_marker_a" in called("/a") and "_marker_b" not in called("/a")
+    assert "_marker_b" in called("/b") and "_marker_a" not in called("/b")
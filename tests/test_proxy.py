@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def component(act, Api):
+    def make(tag):
+        api = Api(name="api", prefix="/api")
+        def get(x: Int) -> Message:
+            return act.success(message=tag, data=x)
+        api.act("/get")(get)
+        return api
+    return make
+
+@pytest.fixture
+def system(system, component):
+    system.include(component("v1"), None)
+    return system
+
+def test_proxy_call_sync(system):
+    assert system.api.get(x=1).data == 1
+
+def test_proxy_sees_registry_changes(system, component):
+    proxy = system.api.get
+    assert proxy(x=1).message == "v1"
+    system.replace("/api", component("v2"))
+    assert proxy(x=1).message == "v2"
+
+def test_proxy_returns_awaitable_inside_loop(system):
+
+    async def main():
+        return await system.api.get(x=2)
+
+    assert asyncio.run(main()).data == 2
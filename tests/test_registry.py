@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+from system.mods.handler import _freeze_meta
+
+@pytest.fixture
+def api(act, Api, system):
+    api = Api(name="api", prefix="/api")
+    def get(x: Int) -> Message:
+        return act.success(data=x)
+    api.act("/get")(get)
+    system.include(api, None)
+    return api
+
+def test_meta_cache_keeps_types_apart():
+    assert type(_freeze_meta({"a": 1})["a"]) is int
+    assert _freeze_meta({"a": True})["a"] is True
+    assert type(_freeze_meta({"a": 1.0})["a"]) is float
+    assert _freeze_meta({"a": 1}) is _freeze_meta({"a": 1})
+
+def test_component_views_stay_relative_while_attached(system, api):
+    assert api.get_handler_info("/get").path == ("get",)
+    assert api._local_handlers[("get",)].path == ("get",)
+    assert system.get_handler_info("/api/get").path == ("api", "get")
+    api.detach()
+    assert api.get_handler_info("/get").path == ("get",)
+
+def test_component_call_uses_the_absolute_path(system, api):
+    session = system.profile("/api")
+    assert asyncio.run(api.call("/get", x=3)).data == 3
+    session.stop()
+    assert ("api", "get") in session.profiles
+
+def test_handler_added_after_attach(act, system, api):
+    def put(x: Int) -> Message:
+        return act.success(data=-x)
+    api.act("/put")(put)
+    assert api.get_handler_info("/put").path == ("put",)
+    assert system.call_sync("/api/put", x=2).data == -2
@@ -0,0 +1,120 @@
+import pytest
+from typed import Str
+from system import new, Message
+from system.mods.component import Component
+
+@pytest.fixture
+def Other(act):
+    Other = new.component("Other")
+    Other.attach(name="act", handler=act)
+    return Other
+
+@pytest.fixture
+def component(act, Api):
+    def make(name, prefix, tag, cls=Api):
+        comp = cls(name=name, prefix=prefix)
+        def run(x: Str) -> Message:
+            return act.success(message=tag, data={"x": x})
+        comp.act("/run")(run)
+        return comp
+    return make
+
+@pytest.fixture
+def system(system, component):
+    api = component("api", "/api", "api")
+    api.include(component("sub", "/sub", "sub"))
+    system.include(api, None)
+    return system
+
+def _state(system):
+    return (
+        dict(system._handlers),
+        dict(system._components_by_prefix),
+        {name: value for name, value in vars(system).items() if isinstance(value, Component)},
+        sorted(vars(system.info)),
+    )
+
+def test_replace_swaps_component(system, component):
+    old = system["/api/sub"]
+    new_sub = component("sub2", "", "sub2")
+    assert system.replace("/api/sub", new_sub) is old
+    assert old.system is None and old.prefix == ("sub",)
+    assert system("/api/sub/run", x="1").message == "sub2"
+    assert system["/api"]._components[-1] is new_sub
+
+def test_replace_nested_new_key_mounts_under_parent(system, component):
+    extra = component("extra", "", "extra")
+    assert system.replace("/api/extra", extra) is None
+    api = system["/api"]
+    assert extra in api._components
+    assert extra not in system._components
+    assert extra.prefix == ("api", "extra")
+    assert system("/api/extra/run", x="1").message == "extra"
+    extra.detach()
+    assert extra.prefix == ("extra",)
+    assert "extra" not in api.__dict__
+
+def test_failing_replace_rolls_back(system, component, Other):
+    old = system["/api"]
+    before = _state(system)
+    children = list(system._components)
+    bad = component("api", "", "bad", cls=Other)
+
+    with pytest.raises(TypeError):
+        system.replace("/api", bad)
+
+    assert _state(system) == before
+    assert system._components == children
+    assert old.system is system and old.prefix == ("api",)
+    assert old["/sub"].prefix == ("api", "sub")
+    assert bad.system is None and bad.prefix == ()
+    assert system["api"] is old
+    assert system("/api/sub/run", x="1").message == "sub"
+
+def test_failure_inside_attach_rolls_back(system, component, monkeypatch):
+    import system.mods.component as component_mod
+    before = _state(system)
+    children = list(system["/api"]._components)
+    sub = system["/api/sub"]
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(component_mod, "register_handler", boom)
+
+    new_sub = component("sub2", "", "sub2")
+    with pytest.raises(RuntimeError):
+        system.replace("/api/sub", new_sub)
+    monkeypatch.undo()
+
+    assert _state(system) == before
+    assert system["/api"]._components == children
+    assert new_sub.system is None and new_sub.prefix == ()
+    assert sub.system is system and sub.prefix == ("api", "sub")
+    assert system("/api/sub/run", x="1").message == "sub"
+
+def test_replace_rejects_attached_component(system):
+    with pytest.raises(ValueError):
+        system.replace("/other", system["/api/sub"])
+
+def test_replace_and_exclude_cost_the_subtree(system, component, monkeypatch):
+    from system.mods import helper, system_
+    with system.batch():
+        for i in range(500):
+            system.include(component(f"c{i}", f"/c{i}", f"c{i}"), None)
+    system.c0
+    handlers, components, index = system._handlers, system._components_by_prefix, system._prefix_index
+    assert index is not None
+
+    indexed = []
+    count = lambda index, path: indexed.append(path) or _index_path(index, path)
+    _index_path = helper._index_path
+    monkeypatch.setattr(helper, "_index_path", count)
+    monkeypatch.setattr(system_, "_index_path", count)
+
+    system.replace("/api", component("api2", "", "api2"))
+    system.exclude(system["/c1"])
+    assert len(indexed) <= 2
+    assert system._handlers is handlers and system._components_by_prefix is components
+    assert system._prefix_index is index
+    assert ("c1",) not in index and ("api", "sub") not in index
+    assert system.call_sync("/api/run", x="y").message == "api2"
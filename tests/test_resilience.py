@@ -0,0 +1,50 @@
+import time
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def flaky(act, Api, system):
+    def make(fail):
+        calls = []
+        api = Api(name="api", prefix="/api")
+        def flaky(x: Int) -> Message:
+            calls.append(x)
+            if len(calls) <= fail:
+                return act.failure(code=503)
+            return act.success(data=len(calls))
+        api.act("/flaky")(flaky)
+        system.include(api, None)
+        return calls
+    return make
+
+def test_retry_sync(system, flaky):
+    flaky(fail=2)
+    retry = system.retry("/api", attempts=3, backoff=0.001, codes=(503,))
+    assert system.call_sync("/api/flaky", x=1).data == 3
+    assert retry.retries == 2
+
+def test_retry_gives_up(system, flaky):
+    calls = flaky(fail=5)
+    system.retry("/api", attempts=2, backoff=0.001, codes=(503,))
+    assert system.call_sync("/api/flaky", x=1).code == 503
+    assert len(calls) == 2
+
+def test_sync_handler_retry_does_not_block_the_loop(system, flaky):
+    flaky(fail=1)
+    system.retry("/api", attempts=2, backoff=0.2, jitter=0, codes=(503,))
+    ticks = []
+
+    async def ticker():
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.15:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        result, _ = await asyncio.gather(system.call("/api/flaky", x=1), ticker())
+        return result
+
+    assert asyncio.run(main()).data == 2
+    assert len(ticks) > 5
@@ -0,0 +1,58 @@
+import time
+import asyncio
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def calls():
+    return []
+
+@pytest.fixture
+def system(act, Api, system, calls):
+    api = Api(name="api", prefix="/api")
+    def tick(n: Int) -> Message:
+        calls.append((n, time.monotonic()))
+        return act.success(data=n)
+    api.act("/tick")(tick)
+    system.include(api, None)
+    return system
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_restart_after_stop(system, calls):
+    scheduler = system.scheduler
+    periodic = scheduler.schedule("/api/tick", every=0.1, n=0)
+    _wait(lambda: len(calls) >= 3)
+    scheduler.stop()
+    assert scheduler.wheel.now > 20
+
+    start = time.monotonic()
+    scheduler.schedule("/api/tick", delay=0.05, n=1)
+    _wait(lambda: any(n == 1 for n, _ in calls))
+    fired = next(at for n, at in calls if n == 1)
+    assert fired - start < 0.2
+    # The periodic timer armed before stop() keeps running.
+    runs = periodic.runs
+    _wait(lambda: periodic.runs > runs + 1)
+    assert periodic.missed == 0
+    system.shutdown()
+
+def test_restart_on_a_new_loop(system, calls):
+
+    async def once(n, wait):
+        start = time.monotonic()
+        system.scheduler.schedule("/api/tick", delay=0.05, n=n)
+        while not any(m == n for m, _ in calls):
+            await asyncio.sleep(0.01)
+        fired = next(at for m, at in calls if m == n)
+        await asyncio.sleep(wait)
+        return fired - start
+
+    assert asyncio.run(once(0, 0.3)) < 0.2
+    # The first loop is closed: the scheduler restarts on the second one.
+    assert asyncio.run(once(1, 0)) < 0.2
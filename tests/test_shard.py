@@ -0,0 +1,37 @@
+import time
+from typed import Int
+from system import new, Message
+from system.mods.shard import ShardedSystem
+from system.mods.system_ import _default_workers
+
+def build():
+    act = new.handler(name="act")
+    Api = new.component("Api")
+    Api.attach(name="act", handler=act)
+    Root = new.system("Root")
+    Root.allow(Api)
+
+    system = Root()
+    api = Api(name="api", prefix="/api")
+    def slow(x: Int) -> Message:
+        time.sleep(0.01)
+        return act.success(data=x)
+    api.act("/slow")(slow)
+    system.include(api, None)
+    return system
+
+def test_call_many_requests_beyond_pool_size():
+    with ShardedSystem(build, workers=1) as sharded:
+        worker = sharded._workers[0]
+        calls = [(("api", "slow"), (), {"x": i}) for i in range(4)]
+        futures = [worker.request("call_many", calls) for _ in range(3 * _default_workers())]
+        for future in futures:
+            results = future.result(timeout=60)
+            assert [msg["data"] for msg in results] == [0, 1, 2, 3]
+
+def test_call_many_routes_and_orders():
+    with ShardedSystem(build, workers=2) as sharded:
+        results = sharded.call_many_sync(*(("/api/slow", (), {"x": i}) for i in range(10)))
+        assert [msg.data for msg in results] == list(range(10))
+        batch = sharded.call_many_sync(("/api/slow", (), {"x": 1}), batch=True)
+        assert len(batch) == 1 and batch.data == [1]
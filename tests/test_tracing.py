@@ -0,0 +1,47 @@
+import pytest
+from typed import Int
+from system import Message
+
+@pytest.fixture
+def api(act, Api, system):
+    api = Api(name="api", prefix="/api")
+
+    def inner(x: Int) -> Message:
+        return act.success(data=x)
+    api.act("/inner")(inner)
+    inner_handler = api["/inner"]
+
+    def outer(x: Int) -> Message:
+        return act.call(inner_handler, x=x)
+    api.act("/outer")(outer)
+    system.include(api, None)
+    return api
+
+@pytest.mark.usefixtures("api")
+def test_nested_handler_call_span_has_path(system):
+    tracer = system.trace()
+    system.call_sync("/api/outer", x=1)
+    spans = {span.name: span for span in tracer.exporter.spans}
+    assert spans["call"].path == "/api/outer"
+    assert spans["inner"].path == "/api/inner"
+    assert spans["inner"].parent_id == spans["call"].span_id
+
+def test_shared_handler_span_has_the_callers_mount(act, Api, Root, system):
+    class Svc(Api):
+        @act
+        def inner(x: Int) -> Message:
+            return act.success(data=x)
+
+        @act
+        def outer(x: Int) -> Message:
+            return act.call(Svc.inner, x=x)
+
+    Root.allow(Svc)
+    system.include(Svc(name="a", prefix="/a"), None)
+    system.include(Svc(name="b", prefix="/b"), None)
+    tracer = system.trace()
+    system.call_sync("/a/outer", x=1)
+    system.call_sync("/b/outer", x=2)
+    inner = [span.path for span in tracer.exporter.spans if span.name == "inner"]
+    assert inner == ["/a/inner", "/b/inner"]
+    assert not hasattr(Svc.inner, "handler_path")
@@ -0,0 +1,102 @@
+import copy
+import pytest
+from typed import Int
+from system import Message
+from system.mods import helper
+
+@pytest.fixture
+def Root(Root, act):
+    Root.attach(name="act", handler=act)
+    return Root
+
+@pytest.fixture
+def handler(act):
+    def make(tag):
+        def run(x: Int) -> Message:
+            return act.success(message=tag, data=x)
+        run.__name__ = tag
+        return run
+    return make
+
+@pytest.fixture
+def api(Api, handler):
+    api = Api(name="api", prefix="/api")
+    for tag in ("b", "a"):
+        api.act(f"/{tag}")(handler(tag))
+    api.act("/a/deep")(handler("deep"))
+    return api
+
+@pytest.fixture
+def other(Api, handler):
+    other = Api(name="other", prefix="/other")
+    other.act("/x")(handler("x"))
+    return other
+
+@pytest.fixture
+def system(system, api, other):
+    system.include(api, None)
+    system.include(other, None)
+    return system
+
+def _paths(entries):
+    return [getattr(e, "path", None) or tuple(e.prefix) for e in entries]
+
+def test_walk_in_path_order(system):
+    assert _paths(system.walk()) == [
+        ("api",), ("api", "a"), ("api", "a", "deep"), ("api", "b"), ("other",), ("other", "x"),
+    ]
+    assert _paths(system.walk("/api", depth=1)) == [("api", "a"), ("api", "b")]
+    assert _paths(system.walk(kind="component")) == [("api",), ("other",)]
+    # list() reads the same index: direct children in path order.
+    assert _paths(system.list("/api")) == [("api", "a"), ("api", "b")]
+
+def test_walk_follows_changes(system, api, other, handler):
+    list(system.walk())
+    api.act("/aa")(handler("aa"))
+    assert ("api", "aa") in _paths(system.walk("/api"))
+    system.exclude(other)
+    assert _paths(system.walk()) == [("api",), ("api", "a"), ("api", "a", "deep"), ("api", "aa"), ("api", "b")]
+
+def test_walk_rebuilds_past_the_change_log(system, api, handler, monkeypatch):
+    monkeypatch.setattr(helper, "_LOG_SIZE", 2)
+    list(system.walk())
+    for i in range(5):
+        api.act(f"/n{i}")(handler(f"n{i}"))
+    assert [p for p in _paths(system.walk("/api", depth=1)) if p[1].startswith("n")] == [
+        ("api", f"n{i}") for i in range(5)
+    ]
+
+def test_export_tree_keeps_old_snapshots(system, api, other, handler):
+    first = system.export_tree()
+    before = copy.deepcopy(first)
+    api.act("/c")(handler("c"))
+    second = system.export_tree()
+    assert first == before
+    assert "c" in second["children"]["api"]["children"]
+    assert second["children"]["other"] is first["children"]["other"]
+    assert second["handlers"] == first["handlers"] + 1
+    assert system.export_tree() is second
+
+    system.exclude(other)
+    third = system.export_tree()
+    assert "other" not in third["children"] and "other" in second["children"]
+
+def test_export_tree_drops_and_prunes(system, api):
+    system.export_tree()
+    system.exclude(api)
+    tree = system.export_tree()
+    assert "api" not in tree["children"]
+    assert tree == _fresh(system)
+
+def test_handler_and_component_at_one_path(system, handler):
+    system.export_tree()
+    system.act("/api")(handler("top"))
+    node = system.export_tree()["children"]["api"]
+    assert node["type"] == "handler" and node["name"] == "top"
+    assert node["component"]["name"] == "api"
+    assert set(node["children"]) == {"a", "b"}
+    assert system.export_tree() == _fresh(system)
+
+def _fresh(system):
+    system._tree = None
+    return system.export_tree()